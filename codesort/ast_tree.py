@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          ast_tree.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 23:41:06 2026
+@modified:      Sun Oct 18 23:41:06 2026
+@descr:         Builds the same tree of code blocks as block_tree, from the
+                abstract syntax tree of a .py file instead of its tokens.
+
+    ast.parse reads the whole file once, in C, and only the statements
+    are then walked in Python. Blocks only hold rows, so no source text
+    is sliced until a block is emitted.
+
+    Python 2.7 gives every statement its first row but not its last. A
+    block therefore ends on the last line of code before the next
+    statement that is not inside it, and the comments between two
+    statements are handed out the way the DEDENT tokens of block_tree
+    would: comments indented into a closing body belong to it, the
+    others to the next block. Python 2.7 also has a few quirks that are
+    worked around:
+
+    - A decorated class or function starts on its first decorator.
+    - A statement that starts with a multi-line string is placed on the
+      last row of the string, in column -1.
+    - A with statement is placed on its first context manager.
+
+    Blocks are classified from their nodes rather than from their first
+    tokens, so that a statement that merely starts with a string is no
+    docstring. The file must be valid code for the running interpreter.
+"""
+
+from __future__ import print_function, division
+import ast
+import bisect
+import re
+import tokenize
+from block_tree import Block, CONSTANT_NAME
+
+
+# Start of the line of a class or function after its decorators
+DEFINITION = re.compile(r'[ \t\f]*(?:class|def)\b')
+
+# Start of the lines of clauses, which hold no statement of their own
+ELIF = re.compile(r'[ \t\f]*elif\b')
+ELSE = re.compile(r'[ \t\f]*else[ \t\f]*:')
+FINALLY = re.compile(r'[ \t\f]*finally[ \t\f]*:')
+
+# Nodes whose decorators come before their own line
+DEFINITIONS = (ast.ClassDef, ast.FunctionDef)
+
+# Fields of the statement nodes that hold an indented suite
+SUITES = ('body', 'handlers', 'orelse', 'finalbody')
+
+# The fields of SUITES that each type of node has, by type. Filled in by
+# _suite_fields.
+SUITE_FIELDS = {}
+
+TRIPLE_QUOTES = ('"""', "'''")
+
+WHITESPACE = ' \t\f'
+
+
+class TreeBuilder(object):
+    """
+    Builds the block tree of the lines of a file. The blocks are made in
+    row order first, along with the clauses (else, elif, except, finally)
+    that continue them, then their ends and leading comments are set.
+    """
+    def __init__(self, lines):
+        """ Init class attributes """
+        self.lines = lines
+        self.blocks = []            # every block but the root, in row order
+        self.events = []            # (row, block, owner) of every block
+                                    # and clause; block is None for clauses
+        self.event_rows = []        # row of each of events, once built
+        self.subtree_ends = []      # index in events past each block
+
+    def __str__(self):
+        """ String representation """
+        return "TreeBuilder of {} lines".format(len(self.lines))
+
+    def build(self, module):
+        """ Returns the root Block of the ast.Module module """
+        root = Block(1, -1)
+        root.kind = 'module'
+        root.children = []
+        self.add_suites(root, module, -1)
+        self.event_rows = [event[0] for event in self.events]
+        self.set_ends(root)
+        return root
+
+    def add_suites(self, owner, node, indent):
+        """
+        Adds the statements of the suites of node, and their own suites,
+        under the Block owner, whose line has indent. Statements that do
+        not start a line of their own that is indented further, such as
+        elif or the second statement after a semicolon, continue the
+        line of owner, so their suites are owner's.
+        """
+        lines = self.lines
+        events = self.events
+        for field in _suite_fields(type(node)):
+            suite = getattr(node, field)
+            if not suite:
+                continue
+            if field == 'orelse' or field == 'finalbody':
+                events.append((self.clause_row(suite, field), None, owner))
+            for child in suite:
+                child_type = type(child)
+                if child_type is ast.ExceptHandler:
+                    events.append((child.lineno, None, owner))
+                    self.add_suites(owner, child, indent)
+                    continue
+                col = child.col_offset
+                if col < 0 or child_type is ast.With:
+                    row, col = self.statement_start(child)
+                else:
+                    row = child.lineno
+                line = lines[row - 1]
+                child_indent = len(line) - len(line.lstrip(WHITESPACE))
+                if child_indent != col or child_indent <= indent:
+                    if _suite_fields(child_type):
+                        self.add_suites(owner, child, indent)
+                    continue
+
+                block = Block(row, owner.indent + 1, owner)
+                block.kind, block.name = classify_node(child)
+                if child_type in DEFINITIONS and child.decorator_list:
+                    decorators = child.decorator_list
+                    block.decorator_start = row
+                    block.decorator_count = len(decorators)
+                    block.head = self.definition_row(decorators[-1].lineno)
+                    block.end = block.head
+                if not owner.children:
+                    owner.children = []
+                owner.children.append(block)
+                self.blocks.append(block)
+                events.append((row, block, owner))
+                if _suite_fields(child_type):
+                    index = len(self.subtree_ends)
+                    self.subtree_ends.append(None)
+                    self.add_suites(block, child, child_indent)
+                    self.subtree_ends[index] = len(events)
+                else:
+                    self.subtree_ends.append(len(events))
+
+    def clause_row(self, suite, field):
+        """ Row of the else, elif or finally line of suite """
+        row, _ = self.statement_start(suite[0])
+        if field == 'orelse' and ELIF.match(self.lines[row - 1]):
+            return row
+        keyword = ELSE if field == 'orelse' else FINALLY
+        while not keyword.match(self.lines[row - 1]):
+            row -= 1
+        return row
+
+    def code_row(self, row):
+        """ Last row of code before row, or 0 """
+        code_row = row - 1
+        lines = self.lines
+        while code_row > 0:
+            text = lines[code_row - 1].lstrip(WHITESPACE)
+            if text.strip() and not (text[0] == '#' and
+                                     self.is_comment(code_row)):
+                break
+            code_row -= 1
+        # A line ending in a backslash joins the next one, even if it is
+        # blank.
+        while (code_row < row - 1 and
+               lines[code_row - 1].rstrip('\r\n').endswith('\\')):
+            code_row += 1
+        return code_row
+
+    def comment_rows(self, first, stop):
+        """ (row, column) of the comment lines from first to stop - 1 """
+        comments = []
+        for row in range(first, stop):
+            if self.is_comment(row):
+                comments.append((row, _indent(self.lines[row - 1])))
+        return comments
+
+    def definition_row(self, row):
+        """ Row of the class or function line from the row of a decorator """
+        while not DEFINITION.match(self.lines[row - 1]):
+            row += 1
+        return row
+
+    def in_string(self, row):
+        """
+        Tells if row is inside a multi-line string, by tokenizing the
+        lines from the start of the statement before it.
+        """
+        rows = self.event_rows
+        first = rows[bisect.bisect_left(rows, row) - 1] if rows else 1
+        first = min(first, row)
+        lines = iter([line + '\n' for line in self.lines[first - 1:row]])
+        try:
+            for token in tokenize.generate_tokens(lambda: next(lines, '')):
+                start, end = token[2][0] + first - 1, token[3][0] + first - 1
+                if start > row:
+                    break
+                if token[0] == tokenize.STRING and start < row <= end:
+                    return True
+        except tokenize.TokenError:
+            pass
+        return False
+
+    def is_comment(self, row):
+        """
+        Tells if row is a comment line. A line that looks like one but
+        holds triple quotes may be the end of a multi-line string.
+        """
+        text = self.lines[row - 1].lstrip(WHITESPACE)
+        if not text.startswith('#'):
+            return False
+        if '"""' not in text and "'''" not in text:
+            return True
+        return not self.in_string(row)
+
+    def set_ends(self, root):
+        """
+        Sets the end of every block, and the start of those with leading
+        comments, along with the end of root.
+        """
+        events = self.events + [(len(self.lines) + 1, None, root)]
+        # The last row of code before each event
+        code_rows = [self.code_row(event[0]) for event in events]
+        for block, stop in zip(self.blocks, self.subtree_ends):
+            if block.end < code_rows[stop]:
+                block.end = code_rows[stop]
+
+        # The bodies that are open, as (owner, column of the body), the
+        # way block_tree keeps them.
+        stack = []
+        comments = []
+        for (row, block, owner), last_row in zip(events, code_rows):
+            if last_row + 1 < row:
+                comments = self.comment_rows(last_row + 1, row)
+            elif comments:
+                comments = []
+            # A clause closes the body of its owner, a block the bodies
+            # that it is not in. Each takes the comments indented into it.
+            depth = block.indent if block is not None else owner.indent
+            depth = max(depth, 0)
+            while len(stack) > depth:
+                body_owner, col = stack.pop()
+                count = 0
+                while count < len(comments) and comments[count][1] >= col:
+                    count += 1
+                if count:
+                    last_row = comments[count - 1][0]
+                    del comments[:count]
+                body_owner.end = max(body_owner.end, last_row)
+            if block is None:
+                continue
+            if len(stack) < depth:
+                stack.append((owner, _indent(self.lines[row - 1])))
+            if comments:
+                block.start = comments[0][0]
+
+        # Trailing comments at the end of the file stay with the last block.
+        if comments:
+            if root.children:
+                root.children[-1].end = comments[-1][0]
+            else:
+                block = Block(comments[0][0], 0, root)
+                block.kind = 'comment'
+                block.end = comments[-1][0]
+                root.children.append(block)
+            last_row = comments[-1][0]
+        root.end = max(last_row, 1)
+
+    def statement_start(self, node):
+        """ (row, column) of the first token of the statement node """
+        row, col = node.lineno, node.col_offset
+        line = self.lines[row - 1]
+        if isinstance(node, ast.With):
+            col = max(line.rfind('with', 0, col), 0)
+        elif col < 0:
+            # Find the opening quotes of the string that ends on row.
+            ends = [(line.find(quotes), quotes) for quotes in TRIPLE_QUOTES
+                    if quotes in line]
+            if not ends:
+                return row, _indent(line)
+            quotes = min(ends)[1]
+            row -= 1
+            while quotes not in self.lines[row - 1]:
+                row -= 1
+            line = self.lines[row - 1]
+            col = line.find(quotes)
+            while col and line[col - 1] in 'bBrRuU':
+                col -= 1
+            if not line[:col].strip(WHITESPACE + '(['):
+                col = _indent(line)
+        return row, col
+
+
+def classify_node(node):
+    """
+    Returns the (kind, name) of a statement node. The kinds match those
+    of block_tree.classify_head.
+    """
+    node_type = type(node)
+    if node_type is ast.Assign:
+        target = node.targets[0]
+        if type(target) is ast.Name:
+            name = target.id
+            if CONSTANT_NAME.match(name):
+                return 'constant', name
+            return 'instance_var', name
+    elif node_type is ast.FunctionDef:
+        return 'function', node.name
+    elif node_type is ast.Expr:
+        if type(node.value) is ast.Str:
+            return 'docstring', ''
+    elif node_type is ast.ClassDef:
+        return 'class', node.name
+    elif node_type is ast.Import:
+        return 'import', node.names[0].name.split('.')[0]
+    elif node_type is ast.ImportFrom:
+        if node.level:
+            return 'import', '.'
+        return 'import', node.module.split('.')[0]
+    elif node_type is ast.If:
+        test = node.test
+        if type(test) is ast.BoolOp:
+            test = test.values[0]
+        if _is_main_test(test):
+            return 'other', '__main__'
+    return 'other', ''
+
+
+def tree_from_source(source, profile=None):
+    """
+    Returns the root Block of source, a SourceBuffer, like
+    block_tree.tree_from_tokens. With profile, a profiling.FileProfile,
+    the parse stage is timed.
+
+    The nodes of a large file are enough objects to set off the cyclic
+    garbage collector over and over while the tree is built, although
+    none of them are garbage yet, so it is paused until then.
+    """
+    import gc
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        module = ast.parse(source.data)
+        if profile is not None:
+            profile.mark('parse')
+        return TreeBuilder(source.data.split('\n')).build(module)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _indent(line):
+    """ Column of the first character of line that is not whitespace """
+    return len(line) - len(line.lstrip(WHITESPACE))
+
+
+def _is_main_test(test):
+    """ Tells if test is __name__ == '__main__' """
+    return (isinstance(test, ast.Compare) and
+            isinstance(test.left, ast.Name) and
+            test.left.id == '__name__' and
+            isinstance(test.ops[0], ast.Eq) and
+            isinstance(test.comparators[0], ast.Str) and
+            test.comparators[0].s == '__main__')
+
+
+def _suite_fields(node_type):
+    """
+    Returns the fields of SUITES that nodes of node_type have. The code
+    of an exec statement is its body, but no suite.
+    """
+    fields = SUITE_FIELDS.get(node_type)
+    if fields is None:
+        fields = ()
+        if node_type is not ast.Exec:
+            fields = tuple(field for field in SUITES
+                           if field in node_type._fields)
+        SUITE_FIELDS[node_type] = fields
+    return fields
+
+
+if __name__ == "__main__":
+    pass
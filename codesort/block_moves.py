@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          block_moves.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 17:02:48 2026
+@modified:      Sun Oct 18 17:02:48 2026
+@descr:         Describes sorting as the fewest block moves, and as a
+                unified diff built from those moves.
+
+    Sorting never edits a line, it only moves runs of lines. Of the runs
+    of the sorted output, the subsequence that is already in source order
+    and holds the most lines (a longest increasing subsequence, weighted
+    by line count) stays where it is; every other run is a move. A file
+    with one misplaced function is then one move, or a diff of a few
+    hunks, however large the file.
+
+    Lines are numbered from 0 and spans are (start, stop) pairs, as in
+    source_buffer.SourceBuffer. A move is a (start, stop, anchor) tuple:
+    lines start through stop - 1 go right before line anchor, or to the
+    end of the file when anchor is the line count. Moves that share an
+    anchor are inserted in the order they are listed.
+"""
+
+from __future__ import print_function, division
+
+
+# Lines of context around each hunk of a unified diff
+DIFF_CONTEXT = 3
+
+NO_EOL = '\\ No newline at end of file\n'
+
+
+def apply_moves(source, moves):
+    """
+    Returns the spans of source after moves, ready for source.join or
+    source.write.
+    """
+    events = []
+    for number, (start, stop, anchor) in enumerate(moves):
+        events.append((start, 1, number))
+        events.append((anchor, 0, number))
+    events.sort()
+
+    spans = []
+    row = 0
+    for position, removal, number in events:
+        start, stop, _ = moves[number]
+        if row < position:
+            spans.append((row, position))
+            row = position
+        if removal:
+            row = stop
+        else:
+            spans.append((start, stop))
+    spans.append((row, len(source)))
+    return spans
+
+
+def block_moves(source, spans):
+    """ Returns the fewest moves that turn source into the output of spans """
+    pieces = merge_spans(spans)
+    staying = heaviest_increasing_run([start for start, _ in pieces],
+                                      [stop - start for start, stop in pieces])
+
+    moves = []
+    anchor = len(source)
+    for number in reversed(range(len(pieces))):
+        start, stop = pieces[number]
+        if number in staying:
+            anchor = start
+        else:
+            moves.append((start, stop, anchor))
+    moves.reverse()
+    return moves
+
+
+def format_moves(moves):
+    """
+    Yields one line per move, such as "move 12-30 before 4", with row
+    numbers counted from 1 like an editor does.
+    """
+    for start, stop, anchor in moves:
+        if start + 1 == stop:
+            rows = "{}".format(stop)
+        else:
+            rows = "{}-{}".format(start + 1, stop)
+        yield "move {} before {}\n".format(rows, anchor + 1)
+
+
+def heaviest_increasing_run(values, weights=None):
+    """
+    Returns the set of indices of the increasing subsequence of values
+    with the largest total weight, in O(n log n). values must be
+    distinct. Without weights, this is a longest increasing subsequence.
+
+    A Fenwick tree over the ranks of the values gives the heaviest run
+    that ends below each value.
+    """
+    if weights is None:
+        weights = [1] * len(values)
+    ranks = dict((value, rank)
+                 for rank, value in enumerate(sorted(values), 1))
+    tree = [(0, -1)] * (len(values) + 1)    # (weight, index) of best run
+    previous = [-1] * len(values)
+    best = (0, -1)
+    for index, value in enumerate(values):
+        rank = ranks[value]
+        below = (0, -1)
+        position = rank - 1
+        while position:
+            below = max(below, tree[position])
+            position -= position & -position
+        previous[index] = below[1]
+        run = (below[0] + weights[index], index)
+        best = max(best, run)
+        position = rank
+        while position < len(tree):
+            tree[position] = max(tree[position], run)
+            position += position & -position
+
+    run = set()
+    index = best[1]
+    while index != -1:
+        run.add(index)
+        index = previous[index]
+    return run
+
+
+def merge_spans(spans):
+    """
+    Returns spans without the empty ones, joining the spans that follow
+    each other in the source as well.
+    """
+    pieces = []
+    for start, stop in spans:
+        if start >= stop:
+            continue
+        if pieces and pieces[-1][1] == start:
+            pieces[-1] = (pieces[-1][0], stop)
+        else:
+            pieces.append((start, stop))
+    return pieces
+
+
+def unified_diff(source, spans, fromfile='', tofile='',
+                 context=DIFF_CONTEXT):
+    """
+    Yields the lines of a unified diff from source to the output of
+    spans. Lines keep their original endings. Nothing is yielded when
+    the output is the source itself.
+    """
+    groups = list(_grouped_opcodes(_opcodes(source, spans), context))
+    if not groups:
+        return
+
+    count = len(source)
+    new_count = sum(stop - start for start, stop in spans)
+
+    def old_line(row):
+        """ Line row of the source, and whether it lacks a line ending """
+        text = source.text(row, row + 1)
+        if row == count - 1 and source.missing_eol:
+            return text + '\n', True
+        return text, False
+
+    def new_line(row, new_row):
+        """ Line row of the source as line new_row of the output """
+        text = source.text(row, row + 1)
+        if not source.missing_eol:
+            return text, False
+        if new_row == new_count - 1:
+            return text.rstrip('\r\n') + '\n', True
+        if row == count - 1:
+            return text + source.newline, False
+        return text, False
+
+    yield '--- {}\n'.format(fromfile)
+    yield '+++ {}\n'.format(tofile)
+    for group in groups:
+        first, last = group[0], group[-1]
+        yield '@@ -{} +{} @@\n'.format(_format_range(first[1], last[2]),
+                                       _format_range(first[3], last[4]))
+        for tag, i1, i2, j1, j2, row in group:
+            if tag == 'insert':
+                lines = [('+', ) + new_line(row + new_row - j1, new_row)
+                         for new_row in xrange(j1, j2)]
+            else:
+                prefix = ' ' if tag == 'equal' else '-'
+                lines = [(prefix, ) + old_line(old_row)
+                         for old_row in xrange(i1, i2)]
+            for prefix, text, marked in lines:
+                yield prefix + text
+                if marked:
+                    yield NO_EOL
+
+
+def _format_range(start, stop):
+    """ Formats a range of rows like difflib's unified diffs """
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return '{}'.format(beginning)
+    if not length:
+        beginning -= 1
+    return '{},{}'.format(beginning, length)
+
+
+def _grouped_opcodes(opcodes, context):
+    """
+    Yields the opcodes in hunks with up to context lines around each
+    change, like difflib.SequenceMatcher.get_grouped_opcodes.
+    """
+    if not any(code[0] != 'equal' for code in opcodes):
+        return
+    codes = list(opcodes)
+    tag, i1, i2, j1, j2, row = codes[0]
+    if tag == 'equal':
+        start = max(i1, i2 - context)
+        codes[0] = (tag, start, i2, max(j1, j2 - context), j2, start)
+    tag, i1, i2, j1, j2, row = codes[-1]
+    if tag == 'equal':
+        codes[-1] = (tag, i1, min(i2, i1 + context), j1,
+                     min(j2, j1 + context), i1)
+
+    group = []
+    for tag, i1, i2, j1, j2, row in codes:
+        if tag == 'equal' and i2 - i1 > 2 * context:
+            group.append((tag, i1, i1 + context, j1, j1 + context, i1))
+            yield group
+            group = []
+            i1, j1 = i2 - context, j2 - context
+            row = i1
+        group.append((tag, i1, i2, j1, j2, row))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def _opcodes(source, spans):
+    """
+    Returns the (tag, i1, i2, j1, j2, row) edits from source to the
+    output of spans: equal runs are the runs that stay, deletes and
+    inserts are the runs that move. i and j count lines of the source
+    and of the output, and row is the first source line of the edit.
+    """
+    pieces = merge_spans(spans)
+    staying = heaviest_increasing_run([start for start, _ in pieces],
+                                      [stop - start for start, stop in pieces])
+    moved = sorted(piece for number, piece in enumerate(pieces)
+                   if number not in staying)
+
+    edits = []
+    inserts = []
+    removed = 0
+    for number, piece in enumerate(pieces):
+        if number not in staying:
+            inserts.append(piece)
+            continue
+        while removed < len(moved) and moved[removed][0] < piece[0]:
+            edits.append(('delete', ) + moved[removed])
+            removed += 1
+        edits.extend(('insert', ) + insert for insert in inserts)
+        edits.append(('equal', ) + piece)
+        inserts = []
+    edits.extend(('delete', ) + piece for piece in moved[removed:])
+    edits.extend(('insert', ) + insert for insert in inserts)
+
+    # The line that ends up last loses its line ending, and the line that
+    # had none gains one, so unless they are the same line, neither one
+    # is equal on both sides.
+    count = len(source)
+    if source.missing_eol:
+        last = max(number for number, edit in enumerate(edits)
+                   if edit[0] != 'delete')
+        for number in reversed(range(len(edits))):
+            tag, start, stop = edits[number]
+            if tag == 'equal' and (number == last) != (stop == count):
+                edits[number:number + 1] = [(tag, start, stop - 1),
+                                            ('delete', stop - 1, stop),
+                                            ('insert', stop - 1, stop)]
+
+    opcodes = []
+    old_row = new_row = 0
+    for tag, start, stop in edits:
+        size = stop - start
+        if not size:
+            continue
+        if tag == 'equal':
+            opcodes.append((tag, old_row, old_row + size,
+                            new_row, new_row + size, start))
+            old_row += size
+            new_row += size
+        elif tag == 'delete':
+            opcodes.append((tag, old_row, old_row + size,
+                            new_row, new_row, start))
+            old_row += size
+        else:
+            opcodes.append((tag, old_row, old_row,
+                            new_row, new_row + size, start))
+            new_row += size
+    return opcodes
+
+
+if __name__ == "__main__":
+    pass
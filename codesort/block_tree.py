@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          block_tree.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 09:12:40 2026
+@modified:      Sun Oct 18 09:12:40 2026
+@descr:         Builds the tree of code blocks of a .py file in a single
+                pass over the tokenizer.
+
+    Each top-level statement (and each statement inside an indented body)
+    becomes a Block. A block runs from its leading comments, through its
+    decorators and header, to the last line of its body. Compound
+    statement clauses (else, elif, except, finally) stay with the block
+    that they continue.
+
+    ast_tree builds the same tree from the abstract syntax tree instead,
+    which is faster for large files. BACKEND tells parse_code and
+    check_code of codesort which one to use.
+"""
+
+from __future__ import print_function, division
+import re
+import tokenize
+from StringIO import StringIO
+
+
+# Builder of the block trees of whole files: 'tokenize' for this module,
+# 'ast' for ast_tree. Set with set_backend.
+BACKEND = 'tokenize'
+BACKENDS = ('tokenize', 'ast')
+
+CONSTANT_NAME = re.compile(r'[A-Z0-9_]+$')
+CONTINUATION_KEYWORDS = frozenset(['else', 'elif', 'except', 'finally'])
+HEAD_TOKENS = 4
+
+
+class Block(object):
+    """
+    A single node of the block tree.
+
+    Rows are 1-indexed, like the tokenize module. ``start`` is the first
+    row of the block (leading comments included), ``head`` is the row of
+    the statement itself, ``end`` is the last row of the block. ``indent``
+    is the nesting level of the statement: 0 for module-level code.
+    """
+    __slots__ = ('kind',
+                 'name',
+                 'start',
+                 'head',
+                 'end',
+                 'indent',
+                 'decorator_start',
+                 'decorator_count',
+                 'parent',
+                 'children',
+                 )
+
+    def __init__(self, start, indent, parent=None):
+        """ Init class attributes """
+        self.kind = ''
+        self.name = ''
+        self.start = start
+        self.head = start
+        self.end = start
+        self.indent = indent
+        self.decorator_start = None
+        self.decorator_count = 0
+        self.parent = parent
+        self.children = ()
+
+    def __str__(self):
+        """ String representation """
+        str_rep = "A {kind} named {name} on rows {start}-{end}."
+        return str_rep.format(kind=self.kind,
+                              name=self.name,
+                              start=self.start,
+                              end=self.end,
+                              )
+
+    @property
+    def decorators(self):
+        """ The (first, last) rows of the decorators, or None """
+        if self.decorator_start is None:
+            return None
+        return (self.decorator_start, self.head - 1)
+
+    @property
+    def line_count(self):
+        """ Number of rows that the block spans """
+        return self.end - self.start + 1
+
+    def walk(self):
+        """ Yields this block and all of its descendants, in row order. """
+        stack = [self]
+        while stack:
+            block = stack.pop()
+            yield block
+            stack.extend(reversed(block.children))
+
+
+def build_block_tree(code):
+    """
+    Returns the root Block of ``code``. The top-level blocks are the
+    children of the root.
+    """
+    readline = StringIO(code).readline
+    return tree_from_tokens(tokenize.generate_tokens(readline))
+
+
+def classify_head(head):
+    """
+    Returns the (kind, name) of a statement from its first few
+    (toknum, tokval) pairs. The kinds match those of codesort.BLOCK_TYPE.
+    """
+    head = head + [(None, '')] * (HEAD_TOKENS - len(head))
+    (num_0, val_0), (num_1, val_1), (_, val_2), (_, val_3) = head
+
+    if num_0 == tokenize.OP and val_0 == '@':
+        return 'decorator', ''
+    if num_0 == tokenize.STRING:
+        return 'docstring', ''
+    if num_0 != tokenize.NAME:
+        return 'other', ''
+    if val_0 == 'class':
+        return 'class', val_1
+    if val_0 == 'def':
+        return 'function', val_1
+    if val_0 == 'async' and val_1 == 'def':
+        return 'function', val_2
+    if val_0 in ('import', 'from'):
+        return 'import', val_1
+    if num_1 == tokenize.OP and val_1 == '=':
+        if CONSTANT_NAME.match(val_0):
+            return 'constant', val_0
+        return 'instance_var', val_0
+    if val_0 == 'if' and val_1 == '__name__' and val_2 == '==':
+        if val_3.strip('\'"') == '__main__':
+            return 'other', '__main__'
+    return 'other', ''
+
+
+def iter_top_level(tokens, root=None):
+    """
+    Builds the block tree from a stream of tokenize tokens, yielding each
+    top-level block as soon as it is complete: once the next top-level
+    block starts, or at the end of the stream. The stream is walked
+    exactly once, and no further than needed for the blocks yielded so
+    far.
+
+    The tree hangs from root, a new Block if none is given. Raises
+    tokenize.TokenError for a stream that no valid code gives.
+    """
+    if root is None:
+        root = Block(1, -1)
+    root.kind = 'module'
+    root.children = []
+    stack = [(root, 0)]     # (owner of the body, column of the body)
+    comments = []           # (row, col) of comment lines awaiting a block
+    block = None            # block that the current logical line belongs to
+    decorated = None        # block whose decorators have been read so far
+    head = None             # first tokens of the current logical line
+    last_row = 0            # last row claimed by a block
+
+    for toknum, tokval, (srow, scol), (erow, ecol), _ in tokens:
+        if toknum == tokenize.COMMENT:
+            if head is None:
+                comments.append((srow, scol))
+        elif toknum == tokenize.NL:
+            continue
+        elif toknum == tokenize.NEWLINE:
+            if head is None:
+                # Only code that cannot be tokenized ends a statement
+                # without a token.
+                raise tokenize.TokenError("NEWLINE without a statement",
+                                          (srow, scol))
+            if not block.kind:
+                kind, name = classify_head(head)
+                if kind == 'decorator':
+                    decorated = block
+                else:
+                    block.kind, block.name = kind, name
+            block.end = last_row = srow
+            head = None
+        elif toknum == tokenize.INDENT:
+            owner = stack[-1][0]
+            if owner.children:
+                owner = owner.children[-1]
+            if not owner.children:
+                # Blocks without a body share the empty tuple.
+                owner.children = []
+            stack.append((owner, ecol))
+        elif toknum == tokenize.DEDENT:
+            owner, col = stack.pop()
+            # Comments indented into the closing body belong to it.
+            count = 0
+            while count < len(comments) and comments[count][1] >= col:
+                count += 1
+            if count:
+                last_row = comments[count - 1][0]
+                del comments[:count]
+            owner.end = max(owner.end, last_row)
+        elif toknum == tokenize.ENDMARKER:
+            break
+        elif head is None:
+            head = [(toknum, tokval)]
+            container = stack[-1][0]
+            siblings = container.children
+            if decorated is not None:
+                block = decorated
+                if not (toknum == tokenize.OP and tokval == '@'):
+                    block.head = srow
+                    decorated = None
+                else:
+                    block.decorator_count += 1
+            elif (siblings and toknum == tokenize.NAME
+                    and tokval in CONTINUATION_KEYWORDS):
+                block = siblings[-1]
+            else:
+                start = comments[0][0] if comments else srow
+                block = Block(start, len(stack) - 1, container)
+                block.head = srow
+                if toknum == tokenize.OP and tokval == '@':
+                    block.decorator_start = srow
+                    block.decorator_count = 1
+                siblings.append(block)
+                if container is root and len(siblings) > 1:
+                    yield siblings[-2]
+            del comments[:]
+        elif len(head) < HEAD_TOKENS:
+            head.append((toknum, tokval))
+
+    # Trailing comments at the end of the file stay with the last block.
+    if comments:
+        if root.children:
+            root.children[-1].end = comments[-1][0]
+        else:
+            block = Block(comments[0][0], 0, root)
+            block.kind = 'comment'
+            block.end = comments[-1][0]
+            root.children.append(block)
+        last_row = comments[-1][0]
+    root.end = max(last_row, 1)
+    if root.children:
+        yield root.children[-1]
+
+
+def set_backend(name):
+    """ Sets BACKEND. Raises ValueError if name is not one of BACKENDS """
+    global BACKEND
+
+    if name not in BACKENDS:
+        raise ValueError("unknown backend {}, expected one of {}".format(
+            name, ', '.join(BACKENDS)))
+    BACKEND = name
+
+
+def shift_blocks(blocks, rows):
+    """
+    Moves blocks and all of their descendants down by rows. A single
+    stack covers every block, since the order does not matter.
+    """
+    stack = list(blocks)
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        block = pop()
+        block.start += rows
+        block.head += rows
+        block.end += rows
+        if block.decorator_start is not None:
+            block.decorator_start += rows
+        extend(block.children)
+
+
+def tree_from_tokens(tokens):
+    """
+    Builds the block tree from a stream of tokenize tokens. The stream is
+    walked exactly once.
+    """
+    root = Block(1, -1)
+    for _ in iter_top_level(tokens, root):
+        pass
+    return root
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          cache.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 12:51:09 2026
+@modified:      Sun Oct 18 12:51:09 2026
+@descr:         On-disk cache of sorting results, so that files that have
+                not changed since the last run are not tokenized again,
+                and a stat index in front of it, so that most of those
+                files are not even read.
+"""
+
+from __future__ import print_function, division
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+
+CACHE_FORMAT = 2
+MAX_ENTRIES = 100000
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'),
+                                  '.codesort_cache.json')
+INDEX_FORMAT = 2
+
+
+class ResultCache(object):
+    """
+    Least-recently-used cache of sorting results.
+
+    Entries are keyed by a hash of the file content and of ``signature``,
+    which describes the CodeSort version and sorting settings: changing
+    either one invalidates every entry. The entries of files are also
+    keyed by their import_groups.import_context; see file_key. Each entry
+    tells if the code is sorted.
+
+    Without a path, the cache only lives in memory.
+    """
+    def __init__(self, path=None, signature='', max_entries=MAX_ENTRIES):
+        """ Init class attributes """
+        self.path = path
+        self.signature = signature
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._hasher = hashlib.sha1(signature)
+        if path is not None and os.path.isfile(path):
+            self.load()
+
+    def __len__(self):
+        """ Number of entries """
+        return len(self.entries)
+
+    def __str__(self):
+        """ String representation """
+        return "ResultCache of {} entries at {}".format(len(self), self.path)
+
+    def file_key(self, directory, *chunks):
+        """
+        Returns the cache key of the code made of chunks, for a file in
+        directory. Whether its imports are local depends on directory.
+        """
+        from import_groups import import_context
+
+        return self.key(import_context(directory), *chunks)
+
+    def get(self, key):
+        """ Returns the entry for key, or None. Marks it as recently used """
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.entries[key] = entry
+        return entry
+
+    def key(self, *chunks):
+        """
+        Returns the cache key of the code made of chunks, which can be
+        str, memoryview or buffer slices.
+        """
+        hasher = self._hasher.copy()
+        for chunk in chunks:
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def load(self):
+        """
+        Reads the entries from the cache file. A cache file that cannot be
+        read is ignored, since the cache can always be rebuilt.
+        """
+        try:
+            with open(self.path, 'rb') as open_file:
+                data = json.load(open_file)
+            if data['format'] != CACHE_FORMAT:
+                return
+            entries = [(str(key), bool(is_sorted))
+                       for key, is_sorted in data['entries']]
+        except (IOError, ValueError, KeyError, TypeError):
+            return
+        self.entries = OrderedDict(entries[-self.max_entries:])
+
+    def put(self, key, is_sorted):
+        """ Adds or replaces an entry, evicting the least recently used """
+        self.entries.pop(key, None)
+        self.entries[key] = is_sorted
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        """
+        Writes the entries to the cache file, oldest first, and tells if
+        it was written; see _write_json.
+        """
+        if self.path is None:
+            return False
+        data = {'format': CACHE_FORMAT,
+                'entries': self.entries.items(),
+                }
+        return _write_json(self.path, data)
+
+    def update(self, entries):
+        """ Adds (key, is_sorted) pairs, such as from a worker """
+        for key, is_sorted in entries:
+            self.put(key, is_sorted)
+
+
+class StatIndex(object):
+    """
+    Index of the last verdict (sorted or not) of each file, keyed by the
+    file path and valid for as long as the (mtime, size, inode) of the
+    file does not change. This is the trick that git uses to avoid
+    reading unchanged files.
+
+    A file modified at or after the mtime of the index file could change
+    again within the same mtime tick without its stat changing, so, as
+    in git, its verdict is not trusted. An index that was never saved or
+    loaded trusts all of its entries.
+
+    The index file holds ``signature``, as in ResultCache: an index file
+    saved with other sorting settings is ignored, since its verdicts do
+    not hold for them. Each verdict also holds the
+    import_groups.import_context of the directory of its file, and is
+    dropped when that changes.
+
+    Without a path, the index only lives in memory.
+    """
+    def __init__(self, path=None, signature=''):
+        """ Init class attributes """
+        self.path = path
+        self.signature = signature
+        self.entries = {}
+        self.saved_at = None
+        if path is not None and os.path.isfile(path):
+            self.load()
+
+    def __len__(self):
+        """ Number of entries """
+        return len(self.entries)
+
+    def __str__(self):
+        """ String representation """
+        return "StatIndex of {} entries at {}".format(len(self), self.path)
+
+    def load(self):
+        """ Reads the entries from the index file, ignoring a bad file """
+        try:
+            with open(self.path, 'rb') as open_file:
+                data = json.load(open_file)
+            if (data['format'] != INDEX_FORMAT or
+                    data['signature'] != self.signature):
+                return
+            saved_at = os.stat(self.path).st_mtime
+            entries = dict((filepath, tuple(entry))
+                           for filepath, entry in data['entries'].items())
+        except (EnvironmentError, ValueError, KeyError, TypeError):
+            return
+        self.saved_at = saved_at
+        self.entries = entries
+
+    def lookup(self, filepath):
+        """
+        Returns the last verdict of filepath if its stat is unchanged since
+        then, otherwise None. The file itself is never opened.
+        """
+        entry = self.entries.get(os.path.abspath(filepath))
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        mtime, size, inode, is_sorted, context = entry
+        if self.saved_at is not None and mtime >= self.saved_at:
+            return None
+        if (stat.st_mtime, stat.st_size, stat.st_ino) != (mtime, size, inode):
+            return None
+        if context != _context(filepath):
+            return None
+        return is_sorted
+
+    def put(self, filepath, is_sorted):
+        """ Records the verdict of filepath along with its current stat """
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return
+        self.entries[os.path.abspath(filepath)] = (stat.st_mtime,
+                                                   stat.st_size,
+                                                   stat.st_ino,
+                                                   is_sorted,
+                                                   _context(filepath),
+                                                   )
+
+    def save(self):
+        """
+        Writes the entries to the index file, and tells if it was written;
+        see _write_json
+        """
+        if self.path is None:
+            return False
+        data = {'format': INDEX_FORMAT,
+                'signature': self.signature,
+                'entries': self.entries,
+                }
+        if not _write_json(self.path, data):
+            return False
+        try:
+            self.saved_at = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        return True
+
+
+def _context(filepath):
+    """ import_groups.import_context of the directory of filepath """
+    from import_groups import import_context
+
+    return import_context(os.path.dirname(os.path.abspath(filepath)))
+
+
+def _write_json(path, data):
+    """
+    Writes data to the JSON file at path and tells if it was written.
+
+    The file is written to a temporary file of its own beside the old one
+    and then renamed over it, so an interrupted save never leaves a
+    truncated file behind, and runs that save at the same time do not
+    share a temporary file. The last rename wins. A file that cannot be
+    written is left as it was, since a cache can always be rebuilt.
+    """
+    try:
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                             prefix=os.path.basename(path),
+                                             suffix='.tmp')
+    except EnvironmentError:
+        return False
+    try:
+        with os.fdopen(handle, 'wb') as open_file:
+            json.dump(data, open_file, separators=(',', ':'))
+        os.rename(temp_path, path)
+    except EnvironmentError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    pass
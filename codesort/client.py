@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          client.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 18:05:37 2026
+@modified:      Sun Oct 18 18:05:37 2026
+@descr:         Client of the codesort daemon (see server.py).
+
+    Only imports what it needs to talk to the daemon, so that a call
+    from an editor save hook or a pre-commit hook costs little more than
+    starting the interpreter.
+
+Usage:
+    client.py [--check] [-n] [--socket=FILE] PATH...
+"""
+
+from __future__ import print_function, division
+import json
+import os
+import socket
+import sys
+
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser('~'),
+                                   '.codesort.sock')
+
+
+def main(argv=None):
+    """ Parses the command line and sends it to the daemon """
+    if argv is None:
+        argv = sys.argv[1:]
+    paths = []
+    options = {'--check': False, '-n': False, '--socket': None}
+    for arg in argv:
+        name, _, value = arg.partition('=')
+        if name == '--socket' and value:
+            options[name] = value
+        elif name in ('--check', '-n'):
+            options[name] = True
+        elif arg.startswith('-'):
+            print(__doc__.split('Usage:')[1].strip())
+            return 2
+        else:
+            paths.append(arg)
+    if not paths:
+        print(__doc__.split('Usage:')[1].strip())
+        return 2
+    return run(paths, options['--check'], options['-n'], options['--socket'])
+
+
+def request(paths, check=False, new_file=False, socket_path=None):
+    """
+    Asks the daemon to sort, or with check to check, the .py files under
+    paths. Yields the (filepath, status, detail) result of each file as
+    the daemon sends it.
+    """
+    if socket_path is None:
+        socket_path = DEFAULT_SOCKET_PATH
+    command = 'check' if check else 'sort'
+    message = {'command': command,
+               'paths': [os.path.abspath(path) for path in paths],
+               'new_file': new_file,
+               }
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(message) + '\n')
+        for line in connection.makefile('rb'):
+            yield tuple(json.loads(line))
+    finally:
+        connection.close()
+
+
+def run(paths, check=False, new_file=False, socket_path=None):
+    """
+    Prints the result of each file that the daemon did not leave
+    unchanged. Returns the exit status: 1 if check found files that are
+    not sorted, or if any file could not be sorted.
+    """
+    status = 0
+    try:
+        for filepath, result, detail in request(paths, check, new_file,
+                                                socket_path):
+            if result != 'unchanged':
+                print("{}: {}".format(result, filepath))
+            if detail:
+                print("    {}".format(detail))
+            if result == 'error' or (check and result != 'unchanged'):
+                status = 1
+    except socket.error as err:
+        print("codesort daemon not reachable: {}".format(err))
+        return 2
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
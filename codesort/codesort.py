@@ -23,6 +23,8 @@ Created on Wed Jun 18 16:50:37 2014
         b. standard library imports
         c. 3rd party imports
         d. local package imports
+       Only imports that follow each other are grouped; imports of the
+       same group keep their order.
     4. Module constants
         a. "Magic" globals (__author__, __version__, etc.)
         b. Module globals
@@ -45,36 +47,96 @@ Created on Wed Jun 18 16:50:37 2014
             14. __get__
             15. __set__
             16. __delete__
-        c. Private methods (organized alphabetically)
-        d. Public methods (organized alphabetically)
+        c. Methods named by the method_order option, in that order
+        d. Private methods (organized alphabetically)
+        e. Public methods (organized alphabetically)
+       Attributes, and any other statements, that follow a method keep
+       their place after it, since they may use it. Only the members
+       between two of them are sorted.
     6. Module functions (organized alphabetically)
     7. Main() function
-    8. toplevel module code
+    8. toplevel module code, which keeps its place after the classes and
+       functions before it, since it may use them. Only the classes and
+       functions between two of its statements are sorted.
     9. if __name__ == '__main__' block
 
 Requires:
     docopt >= 0.6.1         Python command-line argument parser
 
 Usage:
-    codesort.py
-    codesort.py FILE
-    codesort.py FILE [-n]
+    codesort.py [--config=FILE]
+    codesort.py FILE [-n] [--jobs=N] [--config=FILE] [--profile]
+                [--backend=NAME]
+    codesort.py PATH... [-n] [--jobs=N] [--io-jobs=N]
+                [--cache=FILE | --no-cache] [--config=FILE] [--profile]
+                [--backend=NAME]
+    codesort.py --check PATH... [--jobs=N] [--cache=FILE | --no-cache]
+                [--config=FILE] [--profile] [--backend=NAME]
+    codesort.py (--diff | --moves) PATH... [--config=FILE]
+    codesort.py --since=REV [--check | --diff | --moves] [PATH...] [-n]
+                [--config=FILE]
+    codesort.py --serve [--socket=FILE] [--config=FILE]
+    codesort.py --client [--check] PATH... [-n] [--socket=FILE]
 
 Options:
     -n --new-file       # Create a new file rather than replacing the old one.
+    --config=FILE       # Read the dunder_order and method_order of class
+                        # members from the [codesort] section of FILE.
+                        # Defaults to setup.cfg, if there is one.
+    --check             # Only report the files that are not sorted, and
+                        # exit with status 1 if there are any.
+    --diff              # Print a unified diff of the sorting instead of
+                        # sorting, and exit with status 1 if there is any.
+    --moves             # Print the block moves that would sort each file
+                        # instead of sorting it, and exit with status 1 if
+                        # there are any.
+    -j N --jobs=N       # Number of worker processes for many files or
+                        # directories. Defaults to the number of CPUs.
+                        # A single large FILE is split between N worker
+                        # processes at its top-level blocks; by default
+                        # it is sorted in this process.
+    --io-jobs=N         # Read and write N files at a time, for slow or
+                        # network file systems.
+    --since=REV         # Only sort the blocks that overlap lines changed
+                        # since the git revision REV into the rest of
+                        # each file, which is left untouched.
+                        # PATH defaults to the current directory.
+    --cache=FILE        # Cache of already sorted files, for many files or
+                        # directories. The stat index of those files is
+                        # kept in FILE.index. Defaults to
+                        # ~/.codesort_cache.json.
+    --no-cache          # Do not read or write the cache.
+    --profile           # Write the time of each stage of sorting, and
+                        # counters, of every file to stderr as JSON lines.
+    --backend=NAME      # Find the blocks of each file with the tokenize
+                        # module, or with the ast module, which is faster
+                        # for large files but needs code that the running
+                        # Python can compile. [default: tokenize]
+    --serve             # Run the codesort daemon, which keeps its cache
+                        # warm between runs, on a Unix socket.
+    --client            # Have the daemon sort, or with --check check, the
+                        # files.
+    --socket=FILE       # Socket of the daemon. Defaults to
+                        # ~/.codesort.sock.
     -h --help           # Show this screen.
     --version           # Show version.
+
+    Directories are searched recursively for .py files.
 """
 
 
+# Only what every run needs is imported here. The tokenizer, docopt and
+# the other modules are imported by the code paths that use them, so
+# that --version, --help and the daemon client start quickly.
 from __future__ import print_function, division
-from docopt import docopt
-import os.path
+import os
 import re
-import tokenize
-import StringIO
-import pyclbr
-import find_fold_points as ffp
+import sys
+import profiling
+import sort_schema
+from sort_schema import (CLASS_DOCSTRING, CLASS_ATTRIBUTE, CLASS_CODE,
+                         DUNDER, NAMED, PRIVATE, PUBLIC)
+from source_buffer import SourceBuffer
 
 
 __author__ = "Douglas Thor"
@@ -82,18 +144,60 @@ __version__ = "CodeSort v0.1.0"
 __license__ = "MIT"
 
 
-BLOCK_TYPE = [(re.compile(r'[ ]*@.'), 'decorator'),
-              (re.compile(r'[ ]*class .'), 'class'),
-              (re.compile(r'[ ]*def .'), 'function'),
-              (re.compile(r'[ ]*#.'), 'comment'),
-              (re.compile(r'[ ]*from .'), 'import'),
-              (re.compile(r'[ ]*import .'), 'import'),
-              (re.compile(r'[ ]*""".'), 'docstring'),
-              (re.compile(r'[ ]*[A-Z0-9_]+ = .*'), 'constant'),
-              (re.compile(r'[ ]*[a-z0-9_]+ = .*'), 'instance_var'),
-              (re.compile(r'[ ]*.'), 'other'),
+class LazyRegex(object):
+    """ A regular expression that is only compiled when first used """
+    __slots__ = ('pattern', '_regex')
+
+    def __init__(self, pattern):
+        """ Init class attributes """
+        self.pattern = pattern
+        self._regex = None
+
+    def __str__(self):
+        """ String representation """
+        return "LazyRegex({!r})".format(self.pattern)
+
+    def match(self, string, *args):
+        """ Same as re.match, compiling the pattern if needed """
+        if self._regex is None:
+            self._regex = re.compile(self.pattern)
+        return self._regex.match(string, *args)
+
+
+BLOCK_TYPE = [(LazyRegex(r'[ ]*@.'), 'decorator'),
+              (LazyRegex(r'[ ]*class .'), 'class'),
+              (LazyRegex(r'[ ]*def .'), 'function'),
+              (LazyRegex(r'[ ]*#.'), 'comment'),
+              (LazyRegex(r'[ ]*from .'), 'import'),
+              (LazyRegex(r'[ ]*import .'), 'import'),
+              (LazyRegex(r'[ ]*""".'), 'docstring'),
+              (LazyRegex(r'[ ]*[A-Z0-9_]+ = .*'), 'constant'),
+              (LazyRegex(r'[ ]*[a-z0-9_]+ = .*'), 'instance_var'),
+              (LazyRegex(r'[ ]*.'), 'other'),
               ]
 
+# BLOCK_TYPE as a single alternation, of which the first pattern that
+# matches wins, just as in the list. Each pattern gets a group named
+# after its index, and BLOCK_TYPE_GROUPS gives the type of the group.
+BLOCK_TYPES = LazyRegex('|'.join(
+    '(?P<type{}>{})'.format(index, regex_key.pattern)
+    for index, (regex_key, _) in enumerate(BLOCK_TYPE)))
+BLOCK_TYPE_GROUPS = dict(('type{}'.format(index), code_type)
+                         for index, (_, code_type) in enumerate(BLOCK_TYPE))
+
+# Change of the bracket depth at each bracket token
+BRACKET_DEPTH = {'(': 1, '[': 1, '{': 1, ')': -1, ']': -1, '}': -1}
+
+# Bytes read at a time when comparing files
+COMPARE_CHUNK_SIZE = 1 << 20
+
+# Rank of each module section of the sorting schema
+(HEADER, FUTURE, PREAMBLE, CLASS, FUNCTION, MAIN, TOPLEVEL,
+ IF_MAIN) = range(8)
+
+# Config file read when --config is not given, if it exists
+DEFAULT_CONFIG = 'setup.cfg'
+
 
 class CodeSort(object):
     """
@@ -101,38 +205,262 @@ class CodeSort(object):
 
     Contains all the methods and attributes for the module.
     """
-    def __init__(self, filepath):
-        """ Init class attributes """
+    def __init__(self, filepath, new_file=False, cache=None, index=None,
+                 rows=None, jobs=1):
+        """
+        Init class attributes.
+
+        cache is an optional cache.ResultCache: files that it knows to be
+        sorted already are not tokenized again. index is an optional
+        cache.StatIndex: files whose stat has not changed since they were
+        found to be sorted are not even read.
+
+        rows is an optional list of (first, last) rows, counted from 1:
+        only the blocks that overlap them are sorted, see sorted_spans.
+        Such a partial sort is never recorded in cache or index.
+
+        With more than one job, a large file is sorted across that many
+        worker processes, see sharding.sort_source, and code_blocks only
+        holds its top-level blocks, without their children.
+        """
         self.filepath = filepath
+        self.new_file = new_file
+        self.cache = cache
+        self.index = index
+        self.rows = rows
+        self.jobs = jobs
+        self.changed = False
+        self.source = None
+        self.code_blocks = []
+        self._fold_index = None
 
     def __str__(self):
         """ String representation """
         return "CodeSort Class for {}".format(self.filepath)
 
+    @property
+    def directory(self):
+        """ Directory of the python file, for its local imports """
+        return os.path.dirname(os.path.abspath(self.filepath))
+
+    @property
+    def fold_index(self):
+        """ FoldIndex of every block of the last parsed code """
+        from fold_index import FoldIndex
+
+        if self._fold_index is None:
+            self._fold_index = FoldIndex.from_blocks(
+                [code_block.block for code_block in self.code_blocks])
+        return self._fold_index
+
+    def check(self):
+        """
+        Tells if the python file is sorted already, without sorting it.
+        The file is never written.
+        """
+        if self.rows is not None:
+            source = self.parse()
+            return source.is_original(sorted_spans(self.code_blocks, source,
+                                                   self.rows))
+
+        if self.index is not None and self.index.lookup(self.filepath):
+            return True
+
+        profile = profiling.start(self.filepath)
+        try:
+            source = SourceBuffer.from_file(self.filepath)
+            if profile is not None:
+                profile.mark('read')
+                profile.count('bytes', len(source.data))
+                profile.count('lines', len(source))
+
+            entry = key = None
+            if self.cache is not None:
+                key = self.cache.file_key(self.directory, source.data)
+                entry = self.cache.get(key)
+                if profile is not None:
+                    profile.mark('cache')
+            if entry is not None:
+                is_sorted = entry
+            else:
+                is_sorted = check_code(source, self.directory)
+                if key is not None:
+                    self.cache.put(key, is_sorted)
+                if profile is not None:
+                    profile.mark('check')
+        finally:
+            if profile is not None:
+                profile.finish()
+
+        if self.index is not None:
+            self.index.put(self.filepath, is_sorted)
+        return is_sorted
+
+    def block_at(self, row):
+        """
+        Returns the innermost block_tree.Block of the last parsed code that
+        contains row, or None.
+        """
+        number = self.fold_index.enclosing(row)
+        if number == -1:
+            return None
+        return self.fold_index.items[number]
+
+    def diff(self):
+        """
+        Returns the lines of a unified diff from the python file to its
+        sorted code, made of the fewest block moves. The file is never
+        written.
+        """
+        import block_moves
+
+        source = self.parse()
+        spans = sorted_spans(self.code_blocks, source, self.rows)
+        tofile = self.new_filepath() if self.new_file else self.filepath
+        return list(block_moves.unified_diff(source, spans, self.filepath,
+                                             tofile))
+
+    def moves(self):
+        """
+        Returns the fewest (start, stop, anchor) block moves that sort the
+        python file; see block_moves. The file is never written.
+        """
+        import block_moves
+
+        source = self.parse()
+        return block_moves.block_moves(source,
+                                       sorted_spans(self.code_blocks, source,
+                                                    self.rows))
+
+    def new_filepath(self):
+        """ Path of the file written when new_file is set """
+        root, ext = os.path.splitext(self.filepath)
+        return root + "_sorted" + ext
+
+    def edit(self, start, stop, text):
+        """
+        Replaces lines start through stop - 1 of the parsed code with
+        text, as an editor would, and updates the parsed blocks to match;
+        see reparse_code. The file itself is not touched. Returns the
+        SourceBuffer of the code.
+
+        If the edited code cannot be tokenized, the error is raised, and
+        the next edit parses the whole code again.
+        """
+        if self.source is None:
+            self.parse()
+        code_blocks = self.code_blocks
+        self.code_blocks = None
+        self._fold_index = None
+        line_count = len(self.source)
+        self.source.replace(start, stop, text)
+        if code_blocks is None:
+            self.source, self.code_blocks = parse_code(
+                self.source, directory=self.directory)
+        else:
+            self.code_blocks = reparse_code(self.source, code_blocks, start,
+                                            stop, line_count, self.directory)
+        return self.source
+
+    def parse(self, code=None, profile=None):
+        """
+        Tokenizes code, or the file if code is None, and wraps its blocks
+        in CodeBlocks. code is a str or a SourceBuffer. Returns the
+        SourceBuffer of the code.
+
+        profile is an optional profiling.FileProfile; see parse_code.
+        """
+        if code is None:
+            code = SourceBuffer.from_file(self.filepath)
+        self.source, self.code_blocks = parse_code(code, profile,
+                                                   self.directory)
+        self._fold_index = None
+        return self.source
+
     def sort(self):
         """
-        Sorts the python file according to the sorting schema.
+        Sorts the python file according to the sorting schema. Returns the
+        path of the sorted file.
         """
-#
-#        The Algorithm:
-#        First, we obviously need to open the file.
-#        Then we collect information on the classes, functions, global
-#        variables, etc.
-#        Each code block should be put into some kind of container
-#        This container should have an attribute for the code block name
-#        so that I can use that for sorting.
-#        After parsing all code blocks into the container, sort them and
-#        re-write them into a new file. Always into a new file. Overwriting
-#        the old file would be a 2nd step.
-#        If the user wants a new file created, then we're done.
-#        If the user wants the original file overwritten (default), then
-#        we open original file, delete all contents, and then copy all
-#        contents from the new file into the original. I intentionally do not
-#        want to just delete the original and rename the new because that
-#        could mess up some SVN to backup functions (because the file
-#        creation date would change, or perhaps there's a file UID that would
-#        change).
-        pass
+        self.changed = False
+        if self.index is not None and not self.new_file:
+            if self.index.lookup(self.filepath):
+                return self.filepath
+
+        profile = profiling.start(self.filepath)
+        try:
+            return self._sort(profile)
+        finally:
+            if profile is not None:
+                profile.finish()
+
+    def _sort(self, profile):
+        """
+        Sorts the python file once the index does not know it, recording
+        each stage in profile, a profiling.FileProfile or None.
+        """
+        source = SourceBuffer.from_file(self.filepath)
+        if profile is not None:
+            profile.mark('read')
+            profile.count('bytes', len(source.data))
+            profile.count('lines', len(source))
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.file_key(self.directory, source.data)
+            entry = self.cache.get(key)
+            if profile is not None:
+                profile.mark('cache')
+            if entry and not self.new_file:
+                if self.index is not None:
+                    self.index.put(self.filepath, True)
+                return self.filepath
+
+        sharded = None
+        if self.jobs > 1 and self.rows is None:
+            import sharding
+            sharded = sharding.sort_source(source, self.jobs, self.directory)
+        if sharded is None:
+            self.parse(source, profile)
+            spans = sorted_spans(self.code_blocks, source, self.rows)
+        else:
+            self.source = source
+            self._fold_index = None
+            self.code_blocks, spans = sharded
+        self.changed = not source.is_original(spans)
+        if profile is not None:
+            profile.mark('sort')
+            profile.count('changed', int(self.changed))
+
+        if key is not None and self.rows is None:
+            self.cache.put(key, not self.changed)
+            if self.changed:
+                self.cache.put(self.cache.file_key(self.directory,
+                                                   *source.chunks(spans)),
+                               True)
+            if profile is not None:
+                profile.mark('cache')
+
+        if self.new_file:
+            filepath = self.new_filepath()
+            with open(filepath, 'wb') as open_file:
+                source.write(open_file, spans)
+        else:
+            # The original file is rewritten rather than replaced by a new
+            # file, so that its identity (creation date, inode, any version
+            # control or backup metadata) does not change. Only the part
+            # from the first moved line on is written again.
+            filepath = self.filepath
+            if self.changed:
+                with open(self.filepath, 'r+b') as open_file:
+                    source.rewrite(open_file, spans)
+
+        if self.index is not None and self.rows is None:
+            self.index.put(self.filepath,
+                           not (self.new_file and self.changed))
+        if profile is not None:
+            profile.mark('write')
+        return filepath
 
 
 class CodeBlock(object):
@@ -149,15 +477,38 @@ class CodeBlock(object):
         set the type
         set the name
         run the init
+
+    CodeBlocks of a parsed file do not copy any text: they share the
+    SourceBuffer of the file and only hold the Block that gives their rows.
     """
+    __slots__ = ('_code_text',
+                 'block',
+                 'source',
+                 'code_type',
+                 'line_count',
+                 'decorator_count',
+                 'name',
+                 'sort_key',
+                 'children',
+                 )
+
+    def __init__(self, code_text=None, block=None, source=None):
+        """
+        Init class attributes.
 
-    def __init__(self, code_text):
-        """ Init class attributes """
-        self.code_text = code_text
+        A CodeBlock is made either from its own code_text, or from a Block
+        of an already tokenized file along with the SourceBuffer of that
+        file.
+        """
+        self._code_text = code_text
+        self.block = block
+        self.source = source
         self.code_type = ''
         self.line_count = 0
         self.decorator_count = 0
         self.name = ""
+        self.sort_key = None
+        self.children = ()
         self._init_attributes()
 
     def __str__(self):
@@ -168,32 +519,100 @@ class CodeBlock(object):
                               num=self.line_count,
                               )
 
+    @property
+    def code_text(self):
+        """ Source text of the block, only copied when asked for """
+        if self._code_text is None:
+            block = self.block
+            self._code_text = self.source.text(block.start - 1, block.end)
+        return self._code_text
+
+    @property
+    def code_view(self):
+        """ Source text of a parsed block, as a zero-copy slice """
+        if self.source is None:
+            return memoryview(self.code_text)
+        return self.source.view(self.block.start - 1, self.block.end)
+
+    def _set_children(self):
+        """ Wraps the blocks of a class body, which get sorted as well """
+        if self.code_type == 'class':
+            self.children = [CodeBlock(block=child, source=self.source)
+                             for child in self.block.children]
+            set_class_ranks(self.children)
+
     def _set_line_count(self):
         """ Private method that actually sets the line_count attribute """
-        self.line_count = len(self.code_text.splitlines())
+        text = self._code_text
+        if text is not None:
+            self.line_count = text.count('\n') + (text[-1:] not in '\n')
+        elif self.block is not None:
+            self.line_count = self.block.line_count
 
     def _set_type(self):
         """ Private methon that actually sets the type attribute """
-        self.code_type = classify_block(self.code_text)
+        if self.block is None:
+            self.code_type = 'unknown'
+        else:
+            self.code_type = self.block.kind
 
     def _set_name(self):
         """ Private methon that actually sets the name of the code block """
-        # Simple naming, where the line is a func or class
-        name = self.code_text.lstrip().split(' ')[1].split('(')[0]
-        self.name = name
+        if self.block is not None:
+            self.name = self.block.name
 
     def _set_decorator_count(self):
         """ Counts the number of decorators """
-        # TODO: add decorator counting algorithm.
-        count = 0
-        self.decorator_count = count
+        if self.block is not None:
+            self.decorator_count = self.block.decorator_count
+
+    def _set_sort_key(self):
+        """
+        Sets the key that orders the block among its siblings. See the
+        sorting schema in the module docstring.
+        """
+        block = self.block
+        if block is None:
+            return
+        code_type = self.code_type
+        name = self.name
+
+        if block.parent is not None and block.parent.kind == 'class':
+            if code_type == 'docstring' and block is block.parent.children[0]:
+                key = (CLASS_DOCSTRING, )
+            elif code_type not in ('class', 'function'):
+                key = (CLASS_ATTRIBUTE, )
+            else:
+                key = sort_schema.member_key(name)
+        elif code_type == 'class':
+            key = (CLASS, name.lower(), name)
+        elif code_type == 'function' and name == 'main':
+            key = (MAIN, )
+        elif code_type == 'function':
+            key = (FUNCTION, name.lower(), name)
+        elif code_type == 'import' and name == '__future__':
+            key = (FUTURE, )
+        elif code_type in ('docstring', 'comment'):
+            key = (HEADER, )
+        elif code_type == 'other' and name == '__main__':
+            key = (IF_MAIN, )
+        else:
+            key = (TOPLEVEL, )
+        self.sort_key = key
 
     def _init_attributes(self):
-        """ Runs all the various parsers """
+        """ Runs the tokenizer (if needed) and all the various parsers """
+        if self.block is None:
+            import block_tree
+            tree = block_tree.build_block_tree(self._code_text)
+            if tree.children:
+                self.block = tree.children[0]
         self._set_line_count()
         self._set_type()
         self._set_name()
         self._set_decorator_count()
+        self._set_sort_key()
+        self._set_children()
 
 
 def file_prompt():
@@ -215,52 +634,118 @@ def file_prompt():
     return filepath
 
 
+def check_code(code, directory=None):
+    """
+    Tells if code, a str or a SourceBuffer, is sorted already. directory
+    holds the local modules that code may import; see iter_module_ranks.
+
+    Top-level blocks are checked as soon as the tokenizer is done with
+    them, and the tokenizer stops at the first block that is out of
+    order, so the sorted code is never built. The ast backend builds the
+    whole tree first.
+    """
+    import tokenize
+    import block_tree
+
+    if isinstance(code, SourceBuffer):
+        source = code
+    else:
+        source = SourceBuffer(code)
+
+    if block_tree.BACKEND == 'ast':
+        import ast_tree
+        blocks = ast_tree.tree_from_source(source).children
+    else:
+        tokens = tokenize.generate_tokens(source.readline())
+        blocks = block_tree.iter_top_level(tokens)
+    code_blocks = (CodeBlock(block=block, source=source)
+                   for block in blocks)
+    return in_order(iter_module_ranks(code_blocks, directory=directory))
+
+
 def classify_block(code_block):
     """ Classifies a code block to one BLOCK_TYPE category """
-    match = False
-
-    for regex_key, code_type in BLOCK_TYPE:
-        if regex_key.match(code_block):
-            # if it's a decorator, we need to go deeper
-            if code_type == 'decorator':
-                new_block = '\n'.join(code_block.split('\n')[1:])
-                code_type = classify_block(new_block)
+    position = 0
+    while True:
+        for regex_key, code_type in BLOCK_TYPE:
+            if regex_key.match(code_block, position):
+                break
+        else:
+            return 'unknown'
+        # if it's a decorator, we need to go deeper: classify from the
+        # next line on, without copying the rest of the block
+        if code_type != 'decorator':
             return code_type
+        position = code_block.find('\n', position) + 1
+        if not position:
+            return 'unknown'
 
-    if not match:
-        return 'unknown'
 
+def classify_blocks(code_blocks):
+    """
+    Classifies many code blocks at once, the way classify_block does, and
+    returns the list of their BLOCK_TYPE categories. Each line is matched
+    against all of BLOCK_TYPE in a single pass of BLOCK_TYPES.
+    """
+    code_types = []
+    for code_block in code_blocks:
+        position = 0
+        while True:
+            match = BLOCK_TYPES.match(code_block, position)
+            if match is None:
+                code_type = 'unknown'
+                break
+            code_type = BLOCK_TYPE_GROUPS[match.lastgroup]
+            if code_type != 'decorator':
+                break
+            position = code_block.find('\n', position) + 1
+            if not position:
+                code_type = 'unknown'
+                break
+        code_types.append(code_type)
+    return code_types
 
-def binary_file_compare(file1, file2):
+
+def binary_file_compare(file1, file2, use_hash=False):
     """
     Compares two files byte-by-byte. Usefull if the md5sum is different
     for some reason.
+
+    The sizes are compared first, then fixed-size chunks, stopping at the
+    first chunk that differs. With use_hash, streaming digests of the two
+    files are compared instead.
     """
-    match = False
     with open(file1, 'rb') as ref:
         with open(file2, 'rb') as tmp:
             # File Size Check
-            ref.seek(-1, 2)
-            tmp.seek(-1, 2)
-            ref_size = ref.tell()
-            if not ref_size == tmp.tell():
-                return match
-            # Last byte check
-            if not ref.read() == tmp.read():
-                return match
-            # move back to the begining and iterate through the file
-            ref.seek(0, 0)
-            tmp.seek(0, 0)
-            for ref_byte, tmp_byte in zip(ref, tmp):
-                match = ref_byte == tmp_byte
-                if not match:
-                    break
-    return match
+            ref_size = os.fstat(ref.fileno()).st_size
+            if ref_size != os.fstat(tmp.fileno()).st_size:
+                return False
+            if use_hash:
+                return file_digest(ref) == file_digest(tmp)
+            while True:
+                ref_chunk = ref.read(COMPARE_CHUNK_SIZE)
+                if ref_chunk != tmp.read(COMPARE_CHUNK_SIZE):
+                    return False
+                if not ref_chunk:
+                    return True
+
+
+def file_digest(open_file):
+    """ Returns the sha1 digest of an open file, read in chunks """
+    import hashlib
+
+    hasher = hashlib.sha1()
+    for chunk in iter(lambda: open_file.read(COMPARE_CHUNK_SIZE), b''):
+        hasher.update(chunk)
+    return hasher.digest()
 
 
 def print_tokens(code):
     """ Prints out the tokenized form of code in an easy-to-ready format. """
     import os.path
+    import tokenize
+    import StringIO
 
     if os.path.isfile(code):
         with open(code) as open_file:
@@ -293,99 +778,592 @@ def find_fold_points(block):
     Returns a list of (start_row, end_row, indent) tuples that denote fold
     locations. Basically anywhere that there's an indent.
     """
+    import find_fold_points as ffp
+
     return ffp.find_fold_points(block)
 
 
-def split_blocks(code, fold_points):
-    """ splits code into separate blocks """
-    # if a fold point starts with class or def, then it's the start of a block
-    code_lines = code.splitlines()
-    for start, end, indent in fold_points:
-        if code_lines[start - 1].lstrip().startswith('def'):
-            block = '\n'.join(code_lines[start - 1:end])
-            print("----------")
-            print(block)
-            print("----------")
-    return
+def split_blocks(code):
+    """
+    Splits code into its top-level blocks. Returns a list of
+    (Block, block_text) tuples.
+
+    The code is tokenized once; each block is then a single slice of it,
+    line endings included.
+    """
+    import tokenize
+    import block_tree
+
+    source = SourceBuffer(code)
+    tree = block_tree.tree_from_tokens(
+        tokenize.generate_tokens(source.readline()))
+    return [(block, source.text(block.start - 1, block.end))
+            for block in tree.children]
+
+
+def in_order(code_blocks):
+    """
+    Tells if code_blocks, and the blocks of their class bodies, are in
+    sorted order. Stops at the first pair of blocks out of order.
+    """
+    previous = None
+    for code_block in code_blocks:
+        if previous is not None and code_block.sort_key < previous:
+            return False
+        if code_block.children and not in_order(code_block.children):
+            return False
+        previous = code_block.sort_key
+    return True
+
+
+def iter_module_ranks(code_blocks, header=True, preamble=True,
+                      directory=None, segment=0):
+    """
+    Adjusts the sort keys of top-level blocks that depend on position,
+    yielding each block once its key is final.
+
+    Only the comments and docstring at the very top of the file make up
+    the header. Code before the first class or function keeps its
+    place, since imports and module globals may depend on each other.
+    header and preamble tell if code_blocks start within either.
+
+    Within that code, imports that follow each other are grouped into
+    standard library, 3rd party and local imports, see import_groups,
+    for a file in directory.
+
+    Top-level code after the first class or function keeps its place as
+    well, since it may use the classes and functions before it, and the
+    ones after it may use what it defines. Each of its statements starts
+    a new segment, keyed (TOPLEVEL, segment), and the blocks that follow
+    it up to the next one are only sorted among themselves. segment is
+    the number of the segment that code_blocks start in. Blocks ranked
+    already are ranked again from their own keys.
+    """
+    from import_groups import import_group
+
+    run = 0
+    for code_block in code_blocks:
+        key = code_block.sort_key
+        if key[0] == TOPLEVEL:
+            key = key[2:] or key[:1]
+        rank = key[0]
+        if rank != HEADER:
+            header = False
+        elif not header:
+            rank = TOPLEVEL
+        if rank in (CLASS, FUNCTION, MAIN):
+            preamble = False
+        elif preamble and rank in (TOPLEVEL, PREAMBLE):
+            # Every other statement starts a new run of imports.
+            if code_block.code_type == 'import':
+                code_block.sort_key = (PREAMBLE, run,
+                                       import_group(code_block.name,
+                                                    directory))
+            else:
+                run += 1
+                code_block.sort_key = (PREAMBLE, run)
+            yield code_block
+            continue
+        elif rank == TOPLEVEL:
+            segment += 1
+            code_block.sort_key = (TOPLEVEL, segment)
+            yield code_block
+            continue
+        if rank == IF_MAIN:
+            code_block.sort_key = (IF_MAIN, segment)
+        elif segment:
+            code_block.sort_key = (TOPLEVEL, segment, rank) + key[1:]
+        else:
+            code_block.sort_key = (rank, ) + key[1:]
+        yield code_block
+
+
+def diff_paths(paths, moves=False, changes=None):
+    """
+    Prints the diff, or with moves the block moves, that would sort each
+    .py file under paths. Returns the exit status: 1 if any file is not
+    sorted or could not be read.
+
+    changes is an optional {filepath: rows} dict from
+    git_changes.changed_rows, which then replaces paths.
+    """
+    import block_moves
+    import parallel
+
+    if changes is None:
+        changes = dict.fromkeys(parallel.find_python_files(paths))
+    status = 0
+    for filepath in sorted(changes):
+        code_sort = CodeSort(filepath, rows=changes[filepath])
+        try:
+            if moves:
+                lines = ["{}: {}".format(filepath, line)
+                         for line in block_moves.format_moves(
+                             code_sort.moves())]
+            else:
+                lines = code_sort.diff()
+        except Exception as err:
+            print("{}: {}".format(parallel.ERROR, filepath))
+            print("    {}: {}".format(type(err).__name__, err))
+            status = 1
+            continue
+        if lines:
+            status = 1
+        sys.stdout.writelines(lines)
+    return status
+
+
+def emit_code(source, code_blocks):
+    """
+    Returns the code of parse_code() output with the blocks in sorted
+    order. The output is assembled from slices of the original lines, so
+    blank lines between blocks stay where they were.
+    """
+    return source.join(sorted_spans(code_blocks, source))
+
+
+def parse_code(code, profile=None, directory=None):
+    """
+    Tokenizes code, a str or a SourceBuffer, once and wraps every
+    top-level block in a CodeBlock. Returns a (source, code_blocks)
+    tuple, where source is the SourceBuffer of the code. directory holds
+    the local modules that code may import; see iter_module_ranks.
+
+    With profile, a profiling.FileProfile, the tokens are listed before
+    the tree is built, so that the tokenize, tree and blocks stages are
+    timed apart. The ast backend times a parse stage instead of
+    tokenize.
+    """
+    import tokenize
+    import block_tree
+
+    if isinstance(code, SourceBuffer):
+        source = code
+    else:
+        source = SourceBuffer(code)
+
+    if block_tree.BACKEND == 'ast':
+        import ast_tree
+        tree = ast_tree.tree_from_source(source, profile)
+    else:
+        tokens = tokenize.generate_tokens(source.readline())
+        if profile is not None:
+            tokens = list(tokens)
+            profile.mark('tokenize')
+            profile.count('tokens', len(tokens))
+        tree = block_tree.tree_from_tokens(tokens)
+    if profile is not None:
+        profile.mark('tree')
+    code_blocks = [CodeBlock(block=block, source=source)
+                   for block in tree.children]
+    set_module_ranks(code_blocks, directory)
+    if profile is not None:
+        profile.count('blocks', sum(1 for _ in tree.walk()) - 1)
+        profile.mark('blocks')
+    return source, code_blocks
+
+
+def reparse_code(source, code_blocks, start, stop, line_count,
+                 directory=None):
+    """
+    Returns the top-level CodeBlocks of source, which was just edited, as
+    with SourceBuffer.replace: lines start through stop - 1 of its
+    previous line_count lines were replaced. code_blocks are the
+    CodeBlocks of source before the edit, and directory is passed on to
+    iter_module_ranks.
+
+    Top-level statements start in column 0, where the tokenizer holds no
+    state. So only the code from the top-level block before the edit on
+    is tokenized again, until a new top-level block starts after the
+    edit where an old one did. The old blocks from there on are kept,
+    their rows shifted.
+    """
+    import bisect
+    import tokenize
+    import block_tree
+
+    rows = len(source) - line_count
+    starts = [code_block.block.start for code_block in code_blocks]
+    first = max(bisect.bisect_right(starts, start + 1) - 2, 0)
+    first_row = code_blocks[first].block.start if first else 1
+    # Rows past the edit, where an old block may start again. The line
+    # after the replaced text may have been joined to it.
+    resync_row = stop + rows + 2
+
+    # Bracket depth of the tokens read so far. An unbalanced closing
+    # bracket leaves the tokenizer in a state that only fails at the end
+    # of the file, so there is no resynchronizing past it.
+    depth = [0]
+
+    def tokens():
+        """ Tokens from first_row on, numbered as rows of the file """
+        offset = first_row - 1
+        for toknum, tokval, (srow, scol), (erow, ecol), line in \
+                tokenize.generate_tokens(source.readline(offset)):
+            if toknum == tokenize.OP and tokval in BRACKET_DEPTH:
+                depth[0] += BRACKET_DEPTH[tokval]
+            yield (toknum, tokval, (srow + offset, scol),
+                   (erow + offset, ecol), line)
+
+    root = block_tree.Block(first_row, -1)
+    kept = len(code_blocks)
+    for _ in block_tree.iter_top_level(tokens(), root):
+        newest = root.children[-1]
+        if (newest.start >= resync_row and newest.indent == 0
+                and depth[0] == 0):
+            old = bisect.bisect_left(starts, newest.start - rows)
+            if old < kept and starts[old] == newest.start - rows:
+                root.children.pop()
+                kept = old
+                break
+
+    old_definition = _first_definition(code_blocks)
+    tail = code_blocks[kept:]
+    if rows:
+        block_tree.shift_blocks([code_block.block for code_block in tail],
+                                rows)
+    fresh = [CodeBlock(block=block, source=source)
+             for block in root.children]
+    code_blocks = code_blocks[:first] + fresh + tail
+    fresh_stop = first + len(fresh)
+
+    # The ranks of the blocks up to the first class or function depend on
+    # what comes before them, so they are ranked again from scratch, up
+    # to the first definition both before and after the edit. Past it,
+    # only the new blocks need their ranks adjusted.
+    if old_definition >= kept:
+        old_definition += fresh_stop - kept
+    elif old_definition >= first:
+        old_definition = fresh_stop
+    prefix = min(max(old_definition, _first_definition(code_blocks)) + 1,
+                 len(code_blocks))
+    for code_block in code_blocks[:prefix]:
+        code_block._set_sort_key()
+    set_module_ranks(code_blocks[:prefix], directory)
+    # The segments of the old blocks after the new ones are renumbered,
+    # unless the new blocks start as many segments as the ones they
+    # replaced. The blocks up to prefix are ranked already.
+    start = max(prefix, first)
+    if start >= len(code_blocks):
+        return code_blocks
+    tail_start = max(fresh_stop, start)
+    old_segment = None
+    if tail_start < len(code_blocks):
+        old_segment = _segment(code_blocks[tail_start])
+    ranks = iter_module_ranks(code_blocks[start:], header=False,
+                              preamble=False,
+                              segment=_segment(code_blocks[start - 1]))
+    for index, code_block in enumerate(ranks, start):
+        if index == tail_start and _segment(code_block) == old_segment:
+            break
+    return code_blocks
+
+
+def schema_signature():
+    """ Everything that changes the result of sorting, for the cache """
+    import block_tree
+
+    return repr((__version__, block_tree.BACKEND) + sort_schema.ORDERINGS)
+
+
+def set_class_ranks(code_blocks):
+    """
+    Adjusts the sort keys of the blocks of a class body. A statement that
+    follows a method or a nested class, such as an attribute that wraps
+    them, keeps its place after them: it starts a new segment of the
+    body, keyed (CLASS_CODE, segment), and the members that follow it up
+    to the next one are only sorted among themselves.
+    """
+    segment = 0
+    member = False
+    for code_block in code_blocks:
+        key = code_block.sort_key
+        if key[0] == CLASS_ATTRIBUTE and member:
+            segment += 1
+            code_block.sort_key = (CLASS_CODE, segment)
+            continue
+        if key[0] > CLASS_ATTRIBUTE:
+            member = True
+        if segment:
+            code_block.sort_key = (CLASS_CODE, segment) + key
+
+
+def set_module_ranks(code_blocks, directory=None):
+    """
+    Adjusts the sort keys of a list of top-level blocks of a file in
+    directory
+    """
+    for _ in iter_module_ranks(code_blocks, directory=directory):
+        pass
+
+
+def sort_code(code):
+    """ Returns code sorted according to the sorting schema. """
+    return emit_code(*parse_code(code))
+
+
+def sorted_spans(code_blocks, source, rows=None, body_spans=None):
+    """
+    Returns the (start, stop) line spans of source that rebuild it with
+    code_blocks, its top-level blocks, in sorted order.
+
+    With rows, a list of (first, last) rows counted from 1, only the
+    blocks that overlap one of them are sorted: they are merged, in
+    sorted order, into the other blocks, which keep their order and
+    their content. The result is sorted if the other blocks were.
+
+    body_spans is an optional dict of the spans of blocks that are sorted
+    already, by the start row of the block; those blocks are not sorted
+    again.
+    """
+    spans = []
+    _sorted_spans(code_blocks, 1, len(source), spans, rows, body_spans)
+    return spans
+
+
+def _first_definition(code_blocks):
+    """
+    Index of the first class or function of top-level code_blocks, or
+    their number if there is none
+    """
+    for index, code_block in enumerate(code_blocks):
+        if code_block.sort_key[0] in (CLASS, FUNCTION, MAIN):
+            return index
+    return len(code_blocks)
+
+
+def _overlaps(block, rows):
+    """ Tells if block overlaps any of the (first, last) rows """
+    return any(first <= block.end and block.start <= last
+               for first, last in rows)
+
+
+def _segment(code_block):
+    """
+    Number of the segment of top-level code that code_block is in; see
+    iter_module_ranks
+    """
+    key = code_block.sort_key
+    if key[0] in (TOPLEVEL, IF_MAIN):
+        return key[1]
+    return 0
+
+
+def _sorted_spans(code_blocks, first_row, last_row, spans, rows=None,
+                  body_spans=None):
+    """
+    Appends to spans the (start, stop) line indices that rebuild rows
+    first_row through last_row with code_blocks in sorted order.
+
+    Blocks keep the blank lines that preceded them, except that the first
+    position keeps its own: the block that used to be first takes the
+    blank lines of the block that replaces it.
+
+    With rows, only the blocks that overlap them move, and body_spans
+    holds the spans of blocks that are sorted already; see sorted_spans.
+    """
+    import heapq
+
+    gaps = []
+    row = first_row
+    for code_block in code_blocks:
+        gaps.append((row - 1, code_block.block.start - 1))
+        row = code_block.block.end + 1
+
+    def sort_key(index):
+        """ Sorts equal blocks in their original order """
+        return (code_blocks[index].sort_key, index)
+
+    if rows is None:
+        order = sorted(range(len(code_blocks)), key=sort_key)
+    else:
+        touched = set(index for index, code_block in enumerate(code_blocks)
+                      if _overlaps(code_block.block, rows))
+        order = list(heapq.merge(
+            [sort_key(index) for index in range(len(code_blocks))
+             if index not in touched],
+            sorted(sort_key(index) for index in touched)))
+        order = [index for _, index in order]
+    if order:
+        gaps[0], gaps[order[0]] = gaps[order[0]], gaps[0]
+
+    for index in order:
+        spans.append(gaps[index])
+        code_block = code_blocks[index]
+        block = code_block.block
+        if code_block.children and (rows is None or index in touched):
+            _sorted_spans(code_block.children, block.start, block.end,
+                          spans, rows, body_spans)
+        elif body_spans and block.start in body_spans:
+            spans.extend(body_spans[block.start])
+        else:
+            spans.append((block.start - 1, block.end))
+    spans.append((row - 1, last_row))
 
 
 def main():
     """ Main Code """
+    from docopt import docopt
+
     args = docopt(__doc__, version=__version__)
 
-#    if args['FILE'] is None:
-#        args['FILE'] = file_prompt()
-#        if args['FILE'] == 'exit':
-#            print("Exiting Program")
-#            return
+    config = args['--config']
+    if config is None and os.path.isfile(DEFAULT_CONFIG):
+        config = DEFAULT_CONFIG
+    if config is not None:
+        try:
+            sort_schema.configure(*sort_schema.load_config(config))
+        except (EnvironmentError, ValueError) as err:
+            print("config: {}".format(err))
+            return 2
 
-    if args['--new-file']:
-        print("A new file will be made.")
+    if args['--backend'] != 'tokenize':
+        import block_tree
+        try:
+            block_tree.set_backend(args['--backend'])
+        except ValueError as err:
+            print("backend: {}".format(err))
+            return 2
+
+    for option in ('--jobs', '--io-jobs'):
+        if args[option] is None:
+            continue
+        try:
+            args[option] = int(args[option])
+            if args[option] < 1:
+                raise ValueError
+        except ValueError:
+            print("{}: expected a positive number, got {!r}"
+                  .format(option[2:], args[option]))
+            return 2
 
-# ---------------------------------------------------------
-# Quick Testing
-# ---------------------------------------------------------
+    if args['--profile']:
+        profiling.set_hook(profiling.json_lines(sys.stderr))
 
-    cs = CodeSort(args['FILE'])
-    print(cs)
+    if args['--serve']:
+        import server
+        try:
+            return server.serve(args['--socket'])
+        except server.DaemonRunning as err:
+            print("serve: {}".format(err))
+            return 1
 
-    block_1 = """class HelloKitty(object):
+    if args['--client']:
+        import client
+        return client.run(args['PATH'], args['--check'], args['--new-file'],
+                          args['--socket'])
 
-    def __init__(self):
-        if bagle:
-            eat
-        else:
-            sleep
+    if args['--since']:
+        return since_paths(args['--since'], args['PATH'] or ['.'], args)
 
-    def method(self):
-        return 5"""
+    if args['--diff'] or args['--moves']:
+        return diff_paths(args['PATH'], args['--moves'])
 
-    block_2 = """def my_function(a, b):
-    'string'
-    return a + b
+    if args['PATH']:
+        return sort_paths(args['PATH'], args)
 
-def my_func_b(x):
-    return x
+    if args['FILE'] is None:
+        args['FILE'] = file_prompt()
+        if args['FILE'] == 'exit':
+            print("Exiting Program")
+            return
 
-print(5)"""
+    if os.path.isdir(args['FILE']):
+        return sort_paths([args['FILE']], args)
 
-    # (block, (name, type, num_lines))
-    known_values = ((block_1, ("HelloKitty", 'class', 6)),
-                    (block_2, ("my_function", 'function', 2)),
-                    )
+    if args['--new-file']:
+        print("A new file will be made.")
 
-    # KVT for the CodeBlock class.
-    for block, expected in known_values:
-        result_obj = CodeBlock(block)
-        print(result_obj)
+    cs = CodeSort(args['FILE'], args['--new-file'], jobs=args['--jobs'] or 1)
+    print("Sorted {} into {}".format(args['FILE'], cs.sort()))
 
-    print()
-    print()
-# ---------------------------------------------------------
-# End Quick Testing
-# ---------------------------------------------------------
-#    print(find_fold_points(block_1))
 
-    root_dir = os.getcwd()
-    test_data_path = r"tests\\test_data"
-    file_1_name = "sorted_1.py"
-    file_1 = os.path.join(root_dir, test_data_path, file_1_name)
-#    print_tokens(file_1)
-    
-#    folds = find_fold_points(block_2)
-#    print(folds)
-#    split_blocks(block_2, folds)
-    
+def since_paths(rev, paths, args):
+    """
+    Sorts, checks or diffs, as sort_paths and diff_paths do, the .py files
+    under paths that changed since the git revision rev. Only the blocks
+    that overlap changed lines are sorted. Returns the exit status, or 2
+    if git fails.
+    """
+    import git_changes
+    import parallel
+
+    try:
+        changes = git_changes.changed_rows(rev, paths)
+    except git_changes.GitError as err:
+        print("git: {}".format(err))
+        return 2
+
+    if args['--diff'] or args['--moves']:
+        return diff_paths(paths, args['--moves'], changes)
+
+    summary = parallel.Summary()
+    for filepath in sorted(changes):
+        if args['--check']:
+            result = parallel.check_file(filepath, rows=changes[filepath])
+        else:
+            result = parallel.sort_file(filepath, args['--new-file'],
+                                        rows=changes[filepath])
+        summary.add(result)
+        filepath, status, detail = result
+        if status != parallel.UNCHANGED:
+            print("{}: {}".format(status, filepath))
+        if detail:
+            print("    {}".format(detail))
+    print(summary)
+    if args['--check']:
+        return int(summary.total != summary.counts[parallel.UNCHANGED])
+    return 0
+
+
+def sort_paths(paths, args):
+    """
+    Sorts every .py file under paths across worker processes, printing
+    each result as it arrives and a summary at the end.
+
+    With --check, the files are only checked. Returns the exit status:
+    1 if --check found files that are not sorted or could not be read.
+    """
+    import parallel
+    from cache import DEFAULT_CACHE_PATH, ResultCache, StatIndex
+
+    jobs = args['--jobs']
+    cache = index = None
+    if not args['--no-cache']:
+        cache_path = DEFAULT_CACHE_PATH
+        if args['--cache'] is not None:
+            cache_path = os.path.expanduser(args['--cache'])
+        signature = schema_signature()
+        cache = ResultCache(cache_path, signature)
+        index = StatIndex(cache_path + '.index', signature)
+
+    summary = parallel.Summary()
+    filepaths = parallel.find_python_files(paths)
+    if args['--io-jobs']:
+        import pipeline
+        results = pipeline.sort_files(filepaths, jobs,
+                                      args['--io-jobs'],
+                                      args['--new-file'], cache, index)
+    else:
+        results = parallel.sort_files(filepaths, jobs, args['--new-file'],
+                                      cache, index, args['--check'])
+    try:
+        for result in results:
+            summary.add(result)
+            filepath, status, detail = result
+            if status != parallel.UNCHANGED:
+                print("{}: {}".format(status, filepath))
+            if detail:
+                print("    {}".format(detail))
+    finally:
+        if cache is not None:
+            cache.save()
+            index.save()
+    print(summary)
+    if args['--check']:
+        return int(summary.total != summary.counts[parallel.UNCHANGED])
+    return 0
 
 
 if __name__ == "__main__":
-    main()
-
-    path = ["X:\\WinPython27\\projects\\github\\CodeSort\\trunk\\codesort"]
-    a = pyclbr.readmodule_ex("codesort", path=path)
-    print(a)
-    for k, v in a.items():
-        if isinstance(v, pyclbr.Function):
-            print(k, v.name)
-        elif isinstance(v, pyclbr.Class):
-            print(k, v.methods)
+    sys.exit(main())
@@ -7,19 +7,176 @@
 @modified:      Sun Jun 29 17:03:12 2014
 @descr:         Returns the fold points - where code gets indented and
                 dedented - of a .py file.
+
+    Files given by path are memory-mapped and handed to the tokenizer one
+    line at a time, so even a file of hundreds of MB is never held in a
+    str. Generated files often are mostly data: a top-level assignment of
+    a large literal, such as a lookup table, cannot hold a fold, so it is
+    checked with a regex over the mapping and then skipped, rather than
+    tokenized. The tokenizer gets a one-line stand-in for it, and the rows
+    of the tokens after it are shifted back to the rows of the file.
 """
 
 from __future__ import print_function, division
+import contextlib
+import mmap
 import os.path
+import re
 import tokenize
 from StringIO import StringIO
 
 
+# Bytes counted at a time when skipping a statement
+COUNT_CHUNK_SIZE = 1 << 20
+
+# The start of a top-level assignment with a bracket on its first line
+DATA_START = re.compile(r'[A-Za-z_][\w.]*[ \t]*=[ \t]*[\w.]*[\[({]')
+
+# What the bracket scan of a data statement steps through: strings and
+# comments are skipped, and a statement with triple quotes, a line
+# continuation or a stray quote is not skipped at all.
+DATA_TOKENS = re.compile(r'(?P<triple>"""|\'\'\')'
+                         r'|(?P<skip>"(?:[^"\\\n]|\\.)*"'
+                         r'|\'(?:[^\'\\\n]|\\.)*\''
+                         r'|#[^\n]*)'
+                         r'|(?P<open>[\[({])'
+                         r'|(?P<close>[\])}])'
+                         r'|(?P<stray>["\'\\])')
+
+# Statements of fewer bytes than this are tokenized
+MIN_DATA_SIZE = 1 << 16
+
+# The start of a line at column 0 that may start a statement
+NEXT_STATEMENT = re.compile(r'\n(?=[^ \t\f\r\n#\])}])')
+
+# What the tokenizer gets for a skipped statement
+STAND_IN = '0\n'
+
+
+class MappedReader(object):
+    """
+    Hands the lines of a memory-mapped file to the tokenizer, skipping
+    the large data statements at the top level. The tokens have to go
+    through track(), which tells the reader where statements start and
+    gives the tokens the rows of the file.
+    """
+    def __init__(self, mapping):
+        """ Init class attributes """
+        self.mapping = mapping
+        self.rows = 0               # lines handed to the tokenizer
+        self.skips = []             # (row of the stand-in, rows skipped)
+        self.depth = 0              # open brackets
+        self.at_statement = True    # the next line starts a statement
+
+    def __str__(self):
+        """ String representation """
+        return "MappedReader of {} bytes, {} skips".format(len(self.mapping),
+                                                          len(self.skips))
+
+    def data_end(self, start):
+        """
+        Returns the position past the last line of the data statement at
+        start, or None if it is not one or too small to skip.
+        """
+        mapping = self.mapping
+        if mapping[start:start + 1] in ('', ' ', '\t', '\f'):
+            return None
+        match = DATA_START.match(mapping, start)
+        if match is None:
+            return None
+        next_statement = NEXT_STATEMENT.search(mapping, match.end())
+        stop = next_statement.end() if next_statement else len(mapping)
+        if stop - start < MIN_DATA_SIZE:
+            return None
+
+        depth = 0
+        end = None
+        for token in DATA_TOKENS.finditer(mapping, start, stop):
+            kind = token.lastgroup
+            if end is not None and token.start() >= end:
+                # Only comments may follow the statement.
+                if kind != 'skip' or token.group()[0] != '#':
+                    return None
+            elif kind == 'open':
+                depth += 1
+                end = None
+            elif kind == 'close':
+                depth -= 1
+                if depth < 0:
+                    return None
+                if depth == 0:
+                    end = mapping.find('\n', token.end()) + 1 or stop
+            elif kind != 'skip':
+                return None
+        if end is None or depth:
+            return None
+        return end
+
+    def readline(self):
+        """ Returns the next line for the tokenizer """
+        mapping = self.mapping
+        start = mapping.tell()
+        end = self.data_end(start) if self.at_statement else None
+        self.rows += 1
+        if end is None:
+            return mapping.readline()
+        mapping.seek(end)
+        self.skips.append((self.rows, _count_lines(mapping, start, end) - 1))
+        return STAND_IN
+
+    def track(self, tokens):
+        """
+        Yields the tokens of the tokenizer, with the rows of the file,
+        and keeps track of where the next statement starts.
+        """
+        skips = self.skips
+        skipped = 0
+        offset = 0
+        for token in tokens:
+            toknum = token[0]
+            if toknum == tokenize.OP:
+                if token[1] in ('(', '[', '{'):
+                    self.depth += 1
+                elif token[1] in (')', ']', '}'):
+                    self.depth -= 1
+            self.at_statement = (toknum == tokenize.NEWLINE or
+                                 (toknum == tokenize.NL and not self.depth))
+
+            while skipped < len(skips) and skips[skipped][0] < token[2][0]:
+                offset += skips[skipped][1]
+                skipped += 1
+            if offset:
+                (srow, scol), (erow, ecol) = token[2], token[3]
+                token = (toknum, token[1], (srow + offset, scol),
+                         (erow + offset, ecol), token[4])
+            yield token
+
+
 def find_fold_points(block):
     """
     Returns a list of (start_row, end_row, indent) tuples that denote fold
     locations. Basically anywhere that there's an indent.
     """
+    return list(iter_fold_points(block))
+
+
+def iter_fold_points(source):
+    """
+    Yields the (start_row, end_row, indent) tuple of each fold as soon as
+    the DEDENT that closes it is read.
+
+    source is a file path, an open file or a string of code. Files are
+    read lazily, one line at a time, so memory use depends on the nesting
+    depth of the code rather than on its size. Large data statements of
+    files given by path are skipped; see MappedReader.
+    """
+    with source_tokens(source) as tokens:
+        for fold in fold_points_from_tokens(tokens):
+            yield fold
+
+
+def fold_points_from_tokens(token_block):
+    """ Yields the fold points of a stream of tokenize tokens """
     token_whitelist = (tokenize.NL,
                        tokenize.NEWLINE,
                        tokenize.INDENT,
@@ -27,18 +184,10 @@ def find_fold_points(block):
                        tokenize.COMMENT,
                        )
 
-    # temporary code that allows for running a block or a full file
-    if os.path.isfile(block):
-        with open(block) as open_file:
-            token_block = tokenize.generate_tokens(open_file)
-    else:
-        token_block = tokenize.generate_tokens(StringIO(block).readline)
-
     indent_level = 0
     nl_counter = 0
     comment_counter = 0
     indents = []
-    result = []
     for toknum, _, srowcol, _, _ in token_block:
         # Account for comments at the start of a block and newlines at the
         # end of a block.
@@ -54,9 +203,9 @@ def find_fold_points(block):
             # the last indent from the stack
             indent_level -= 1
             matched_indent = indents.pop()
-            result.append((matched_indent,
-                           srowcol[0] - 1 - nl_counter,
-                           indent_level + 1))
+            yield (matched_indent,
+                   srowcol[0] - 1 - nl_counter,
+                   indent_level + 1)
         if toknum not in token_whitelist:
             nl_counter = 0
             comment_counter = 0
@@ -64,7 +213,71 @@ def find_fold_points(block):
     if len(indents) != 0:
         raise ValueError("Number of DEDENTs does not match number of INDENTs.")
 
-    return result
+
+@contextlib.contextmanager
+def source_readline(source):
+    """
+    Context manager that gives a readline function for source: a file
+    path, an open file or a string of code. A file opened from a path is
+    memory-mapped, and closed on exit.
+    """
+    if hasattr(source, 'readline'):
+        yield source.readline
+    elif '\n' not in source and os.path.isfile(source):
+        with _mapped_file(source) as mapping:
+            yield mapping.readline
+    else:
+        yield StringIO(source).readline
+
+
+@contextlib.contextmanager
+def source_tokens(source):
+    """
+    Context manager that gives the tokenize tokens of source, like
+    source_readline. The large data statements of a file opened from a
+    path are left out; see MappedReader.
+    """
+    if hasattr(source, 'readline') or '\n' in source or \
+            not os.path.isfile(source):
+        with source_readline(source) as readline:
+            yield tokenize.generate_tokens(readline)
+        return
+    with _mapped_file(source) as mapping:
+        if not isinstance(mapping, mmap.mmap):
+            yield tokenize.generate_tokens(mapping.readline)
+            return
+        reader = MappedReader(mapping)
+        yield reader.track(tokenize.generate_tokens(reader.readline))
+
+
+def _count_lines(mapping, start, stop):
+    """ Number of newlines in mapping from start to stop """
+    count = 0
+    while start < stop:
+        end = min(start + COUNT_CHUNK_SIZE, stop)
+        count += mapping[start:end].count('\n')
+        start = end
+    return count
+
+
+@contextlib.contextmanager
+def _mapped_file(filepath):
+    """
+    Context manager that gives a read-only mmap of the file at filepath.
+    Files that cannot be mapped, such as empty files, are read from the
+    open file instead.
+    """
+    with open(filepath, 'rb') as open_file:
+        try:
+            mapping = mmap.mmap(open_file.fileno(), 0,
+                                access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            yield open_file
+            return
+        try:
+            yield mapping
+        finally:
+            mapping.close()
 
 
 if __name__ == "__main__":
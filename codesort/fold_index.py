@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          fold_index.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 15:05:44 2026
+@modified:      Sun Oct 18 15:05:44 2026
+@descr:         Interval index over nested folds, for quick "which block
+                encloses this line" queries.
+
+    Folds (or blocks) never partially overlap: two folds are either
+    disjoint or one contains the other. Sorted by start row, the folds are
+    in pre-order, so the descendants of a fold are the folds right after
+    it, and each fold only needs its parent and the size of its subtree.
+"""
+
+from __future__ import print_function, division
+from array import array
+from bisect import bisect_right
+import find_fold_points as ffp
+
+
+class FoldIndex(object):
+    """
+    Index of nested (start, end, indent) folds.
+
+    Folds are numbered in order of their start row. ``items`` optionally
+    holds an object for each fold, such as the block_tree.Block it came
+    from. Fold -1 stands for the whole file.
+    """
+    def __init__(self, folds, items=None, presorted=False):
+        """
+        Init class attributes. folds is an iterable of (start, end, indent)
+        tuples; pass presorted if it is already ordered by start row, with
+        enclosing folds first.
+        """
+        folds = list(folds)
+        if items is None:
+            items = [None] * len(folds)
+        items = list(items)
+        if not presorted:
+            order = sorted(range(len(folds)),
+                           key=lambda x: (folds[x][0], -folds[x][1]))
+            folds = [folds[x] for x in order]
+            items = [items[x] for x in order]
+
+        self.items = items
+        self.starts = array('i', [fold[0] for fold in folds])
+        self.ends = array('i', [fold[1] for fold in folds])
+        self.indents = array('i', [fold[2] for fold in folds])
+        self.parents = array('i', [-1]) * len(folds)
+        self.sizes = array('i', [0]) * len(folds)
+
+        open_folds = []
+        for number, (start, end, _) in enumerate(folds):
+            while open_folds and self.ends[open_folds[-1]] < start:
+                closed = open_folds.pop()
+                self.sizes[closed] = number - closed - 1
+            if open_folds:
+                self.parents[number] = open_folds[-1]
+            open_folds.append(number)
+        for closed in open_folds:
+            self.sizes[closed] = len(folds) - closed - 1
+
+    def __len__(self):
+        """ Number of folds """
+        return len(self.starts)
+
+    def __str__(self):
+        """ String representation """
+        return "FoldIndex of {} folds".format(len(self))
+
+    @classmethod
+    def from_blocks(cls, blocks):
+        """
+        Builds the index of every block of a block tree: blocks are the
+        top-level block_tree.Block objects. No sorting is needed, since a
+        walk of the tree already gives the blocks in order.
+        """
+        items = [block for top in blocks for block in top.walk()]
+        folds = [(block.start, block.end, block.indent) for block in items]
+        return cls(folds, items, presorted=True)
+
+    @classmethod
+    def from_fold_points(cls, source):
+        """ Builds the index of the fold points of source """
+        return cls(ffp.iter_fold_points(source))
+
+    def children(self, number):
+        """
+        Returns the numbers of the folds directly inside fold number, or
+        of the top-level folds when number is -1.
+        """
+        if number == -1:
+            child, last = 0, len(self) - 1
+        else:
+            child, last = number + 1, number + self.sizes[number]
+        result = []
+        while child <= last:
+            result.append(child)
+            child += self.sizes[child] + 1
+        return result
+
+    def enclosing(self, row):
+        """
+        Returns the number of the innermost fold that contains row, or -1.
+
+        A binary search finds the last fold that starts at or before row.
+        If that fold ended already, the enclosing fold can only be one of
+        its ancestors.
+        """
+        number = bisect_right(self.starts, row) - 1
+        while number != -1 and self.ends[number] < row:
+            number = self.parents[number]
+        return number
+
+    def fold(self, number):
+        """ Returns the (start, end, indent) of fold number """
+        return (self.starts[number], self.ends[number], self.indents[number])
+
+    def top_level(self):
+        """ Returns the numbers of the folds that no other fold contains """
+        return self.children(-1)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          git_changes.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 20:02:45 2026
+@modified:      Sun Oct 18 20:02:45 2026
+@descr:         Asks git which lines of which .py files changed since a
+                base revision.
+
+    A single "git diff -U0" per path gives both the changed files and the
+    rows of every hunk, without any context lines. Files that git does
+    not track yet count as changed everywhere.
+"""
+
+from __future__ import print_function, division
+import os
+import re
+import subprocess
+
+
+# New-file side of a hunk header: "@@ -12,3 +14,5 @@" gives 14 and 5.
+HUNK_HEADER = re.compile(r'@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+
+class GitError(RuntimeError):
+    """ git could not be run, or failed """
+    pass
+
+
+def changed_rows(rev, paths=('.', )):
+    """
+    Returns a {filepath: rows} dict of the .py files under paths that
+    differ from the git revision rev, in the working tree.
+
+    rows is a list of (first, last) rows, counted from 1, of the lines
+    that were added or changed; a deletion counts as a change of the
+    lines around it. rows is None for a file that git does not track.
+    """
+    changes = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        cwd = path if os.path.isdir(path) else os.path.dirname(path)
+        toplevel = _git(['rev-parse', '--show-toplevel'], cwd).strip()
+        diff = _git(['-c', 'core.quotePath=false', 'diff', '-U0',
+                     '--no-color', '--no-ext-diff', '--no-textconv',
+                     '--no-renames', '--src-prefix=a/', '--dst-prefix=b/',
+                     rev, '--', path], toplevel)
+        for filepath, rows in parse_diff(diff.splitlines()):
+            if filepath.endswith('.py'):
+                changes[os.path.join(toplevel, filepath)] = rows
+        untracked = _git(['ls-files', '-z', '--others', '--exclude-standard',
+                          '--', path], toplevel)
+        for filepath in untracked.split('\0'):
+            if filepath.endswith('.py'):
+                changes[os.path.join(toplevel, filepath)] = None
+    return changes
+
+
+def parse_diff(lines):
+    """
+    Yields the (filepath, rows) of every file of a "git diff -U0", where
+    filepath is relative to the top of the repository. Deleted files are
+    skipped.
+    """
+    filepath = None
+    rows = []
+    in_header = False
+    for line in lines:
+        if line.startswith('diff --git '):
+            if filepath is not None:
+                yield filepath, rows
+            filepath = None
+            rows = []
+            in_header = True
+        elif in_header and line.startswith('+++ '):
+            # Names with a space end with a tab, for the sake of patch.
+            name = line[4:].rstrip('\t')
+            if name.startswith('b/'):
+                filepath = name[2:]
+        elif line.startswith('@@'):
+            in_header = False
+            match = HUNK_HEADER.match(line)
+            if match is None or filepath is None:
+                continue
+            start = int(match.group(1))
+            count = 1 if match.group(2) is None else int(match.group(2))
+            if count:
+                rows.append((start, start + count - 1))
+            else:
+                # Lines were only removed, after row start.
+                rows.append((max(start, 1), start + 1))
+    if filepath is not None:
+        yield filepath, rows
+
+
+def _git(args, cwd):
+    """ Runs git with args in cwd and returns its output """
+    try:
+        process = subprocess.Popen(['git'] + args, cwd=cwd,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+    except OSError as err:
+        raise GitError("git could not be run: {}".format(err))
+    out, err = process.communicate()
+    if process.returncode != 0:
+        raise GitError(err.strip() or "git {} failed".format(args[0]))
+    return out
+
+
+if __name__ == "__main__":
+    pass
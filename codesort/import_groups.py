@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          import_groups.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 22:58:20 2026
+@modified:      Sun Oct 18 22:58:20 2026
+@descr:         Tells which group of the sorting schema an imported module
+                belongs to: standard library, 3rd party or local.
+
+    Standard library modules are looked up in STDLIB_NAMES, the top-level
+    modules and packages of Python 2.7 on every platform, so they never
+    cost a file system lookup. Other names are resolved once per run and
+    per process by an ImportClassifier: a relative import, a module next
+    to the file being sorted, or a module at the root of its project, is
+    local; a module that imp finds in a site-packages directory, or not
+    at all, is 3rd party; a module that imp finds anywhere else is local,
+    unless it is in the standard library directory.
+
+    The root of the project of a file is the directory above the topmost
+    package, with an __init__.py, that holds the file. The directory of
+    codesort itself, which is on sys.path when it runs as a script, is
+    never searched, so that its own modules do not pass for local ones.
+
+    The group of an import thus depends on the directory of the file, so
+    cached verdicts about a file are keyed by its import_context as well.
+"""
+
+from __future__ import print_function, division
+import os
+import sys
+
+
+# Groups of import statements, in the order of the sorting schema
+STDLIB, THIRD_PARTY, LOCAL = range(3)
+
+# Directory of the codesort modules, which is not searched for imports
+CODESORT_DIRECTORY = os.path.normcase(os.path.dirname(os.path.abspath(
+    __file__)))
+
+# Directories of installed 3rd party packages
+SITE_DIRECTORIES = ('site-packages', 'dist-packages')
+
+STDLIB_NAMES = frozenset("""
+    __builtin__ __future__ __main__ _winreg abc aifc antigravity
+    anydbm argparse array ast asynchat asyncore atexit audiodev
+    audioop base64 BaseHTTPServer Bastion bdb binascii binhex bisect
+    bsddb bz2 calendar Canvas cgi CGIHTTPServer cgitb chunk cmath cmd
+    code codecs codeop collections colorsys commands compileall
+    compiler ConfigParser contextlib Cookie cookielib copy copy_reg
+    cPickle cProfile crypt cStringIO csv ctypes curses datetime dbhash
+    dbm decimal Dialog difflib dircache dis distutils dl doctest
+    DocXMLRPCServer dumbdbm dummy_thread dummy_threading email
+    encodings ensurepip errno exceptions fcntl filecmp FileDialog
+    fileinput FixTk fnmatch formatter fpformat fractions ftplib
+    functools future_builtins gc gdbm genericpath getopt getpass
+    gettext glob grp gzip hashlib heapq hmac hotshot htmlentitydefs
+    htmllib HTMLParser httplib idlelib ihooks imageop imaplib imghdr
+    imp importlib imputil inspect io itertools json keyword lib2to3
+    linecache linuxaudiodev locale logging macpath macurl2path mailbox
+    mailcap markupbase marshal math md5 mhlib mimetools mimetypes
+    MimeWriter mimify mmap modulefinder msilib msvcrt multifile
+    multiprocessing mutex netrc new nis nntplib ntpath nturl2path
+    numbers opcode operator optparse os os2emxpath ossaudiodev parser
+    pdb pickle pickletools pipes pkgutil platform plistlib popen2
+    poplib posix posixfile posixpath pprint profile pstats pty pwd
+    py_compile pyclbr pydoc pydoc_data pyexpat Queue quopri random re
+    readline repr resource rexec rfc822 rlcompleter robotparser runpy
+    sched ScrolledText select sets sgmllib sha shelve shlex shutil
+    signal SimpleHTTPServer SimpleXMLRPCServer site smtpd smtplib
+    sndhdr socket SocketServer spwd sqlite3 sre sre_compile
+    sre_constants sre_parse ssl stat statvfs string StringIO stringold
+    stringprep strop struct subprocess sunau sunaudio symbol symtable
+    sys sysconfig syslog tabnanny tarfile telnetlib tempfile termios
+    test textwrap this thread threading time timeit Tix tkColorChooser
+    tkCommonDialog Tkconstants tkdnd tkFileDialog tkFont Tkinter
+    tkMessageBox tkSimpleDialog toaiff token tokenize trace traceback
+    ttk tty turtle types unicodedata unittest urllib urllib2 urlparse
+    user UserDict UserList UserString uu uuid warnings wave weakref
+    webbrowser whichdb winsound wsgiref xdrlib xml xmllib xmlrpclib
+    xxsubtype zipfile zipimport zlib
+    """.split())
+
+
+class ImportClassifier(object):
+    """
+    Memoizes the group of every top-level module name, and the modules
+    of every directory, so that each costs a single lookup per run.
+    """
+    def __init__(self):
+        """ Init class attributes """
+        self.groups = {}
+        self.directories = {}
+        self.roots = {}
+        self.contexts = {}
+        self._stdlib_directory = os.path.dirname(os.__file__)
+
+    def __str__(self):
+        """ String representation """
+        return "ImportClassifier of {} names".format(len(self.groups))
+
+    def context(self, directory):
+        """
+        Returns the names that are local to the files of directory, the
+        modules of directory and of the root of its project, as a str
+        that ends with a NUL byte
+        """
+        context = self.contexts.get(directory)
+        if context is None:
+            names = self.modules_in(directory)
+            names = names.union(self.modules_in(self.project_root(directory)))
+            context = ' '.join(sorted(names)) + '\0'
+            self.contexts[directory] = context
+        return context
+
+    def group(self, name, directory=None):
+        """
+        Returns the group of the top-level module name, as imported by a
+        file in directory. A name that starts with a dot is a relative
+        import.
+        """
+        if not name or name.startswith('.'):
+            return LOCAL
+        if name in STDLIB_NAMES:
+            return STDLIB
+        if directory is not None:
+            if name in self.modules_in(directory):
+                return LOCAL
+            if name in self.modules_in(self.project_root(directory)):
+                return LOCAL
+        group = self.groups.get(name)
+        if group is None:
+            group = self.groups[name] = self._resolve(name)
+        return group
+
+    def modules_in(self, directory):
+        """ Names of the modules and packages that directory holds """
+        modules = self.directories.get(directory)
+        if modules is None:
+            try:
+                filenames = os.listdir(directory)
+            except OSError:
+                filenames = []
+            modules = set()
+            for filename in filenames:
+                root, ext = os.path.splitext(filename)
+                if ext in ('.py', '.pyc', '.so', '.pyd'):
+                    modules.add(root)
+                elif not ext and os.path.isfile(os.path.join(
+                        directory, filename, '__init__.py')):
+                    modules.add(filename)
+            modules = self.directories[directory] = frozenset(modules)
+        return modules
+
+    def project_root(self, directory):
+        """
+        Returns the directory above the topmost package that directory is
+        in, or directory itself if it is no package
+        """
+        root = self.roots.get(directory)
+        if root is None:
+            root = os.path.abspath(directory)
+            while os.path.isfile(os.path.join(root, '__init__.py')):
+                parent = os.path.dirname(root)
+                if parent == root:
+                    break
+                root = parent
+            self.roots[directory] = root
+        return root
+
+    def _resolve(self, name):
+        """ Looks name up on sys.path, without CODESORT_DIRECTORY """
+        import imp
+
+        if name in sys.builtin_module_names:
+            return STDLIB
+        search_path = [directory for directory in sys.path
+                       if os.path.normcase(os.path.abspath(directory)) !=
+                       CODESORT_DIRECTORY]
+        try:
+            open_file, path, _ = imp.find_module(name, search_path)
+        except ImportError:
+            return THIRD_PARTY
+        if open_file is not None:
+            open_file.close()
+        if not path:
+            # Built into the interpreter
+            return STDLIB
+        parts = os.path.normcase(os.path.abspath(path)).split(os.sep)
+        if any(site in parts for site in SITE_DIRECTORIES):
+            return THIRD_PARTY
+        if path.startswith(self._stdlib_directory + os.sep):
+            return STDLIB
+        return LOCAL
+
+
+# The classifier of this process, shared by every file that it sorts
+CLASSIFIER = ImportClassifier()
+
+
+def import_context(directory):
+    """
+    Returns what the import groups of a file in directory depend on,
+    besides its code; see CLASSIFIER
+    """
+    return CLASSIFIER.context(directory)
+
+
+def import_group(name, directory=None):
+    """ Returns the group of the top-level module name; see CLASSIFIER """
+    return CLASSIFIER.group(name, directory)
+
+
+def reset():
+    """
+    Forgets every name and directory looked up so far, for a process that
+    outlives the files that it sorts, such as the daemon
+    """
+    global CLASSIFIER
+
+    CLASSIFIER = ImportClassifier()
+
+
+if __name__ == "__main__":
+    pass
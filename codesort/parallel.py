@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          parallel.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 11:48:30 2026
+@modified:      Sun Oct 18 11:48:30 2026
+@descr:         Sorts many files, or whole directory trees, across a pool
+                of worker processes.
+"""
+
+from __future__ import print_function, division
+import multiprocessing
+import os
+import codesort
+import profiling
+import sort_schema
+from cache import ResultCache
+
+
+# Chunks handed to each worker over the whole run. More chunks balance
+# the load better, fewer chunks cost less inter-process traffic.
+CHUNKS_PER_JOB = 4
+
+SORTED = 'sorted'
+UNCHANGED = 'unchanged'
+UNSORTED = 'unsorted'
+ERROR = 'error'
+
+# Profiling records of the files that a worker process sorted, which go
+# back to the parent along with their results
+WORKER_RECORDS = []
+
+
+class Summary(object):
+    """ Aggregate of the per-file results of a run """
+    def __init__(self):
+        """ Init class attributes """
+        self.counts = {SORTED: 0, UNCHANGED: 0, UNSORTED: 0, ERROR: 0}
+
+    def __str__(self):
+        """ String representation """
+        str_rep = "{total} files: {sorted} sorted, {unchanged} unchanged, " \
+                  "{error} errors"
+        if self.counts[UNSORTED]:
+            str_rep = "{total} files: {unsorted} unsorted, " \
+                      "{unchanged} unchanged, {error} errors"
+        return str_rep.format(total=self.total, **self.counts)
+
+    @property
+    def total(self):
+        """ Number of files seen so far """
+        return sum(self.counts.values())
+
+    def add(self, result):
+        """ Adds a (filepath, status, detail) result """
+        self.counts[result[1]] += 1
+
+
+def check_file(filepath, cache=None, index=None, rows=None):
+    """
+    Checks a single file without sorting it. Returns a (filepath, status,
+    detail) tuple, where status is UNCHANGED for a sorted file. With rows,
+    only the blocks that overlap them are checked.
+    """
+    try:
+        is_sorted = codesort.CodeSort(filepath, cache=cache, index=index,
+                                      rows=rows).check()
+    except Exception as err:
+        return (filepath, ERROR, "{}: {}".format(type(err).__name__, err))
+    status = UNCHANGED if is_sorted else UNSORTED
+    return (filepath, status, '')
+
+
+def find_python_files(paths):
+    """
+    Yields the .py files found in paths. Directories are searched
+    recursively, skipping hidden directories such as .git.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for filename in sorted(files):
+                if filename.endswith('.py'):
+                    yield os.path.join(root, filename)
+
+
+def init_worker(dunder_order, method_order, backend, profile):
+    """
+    Sets up a worker process with the orderings and the backend of the
+    parent; see worker_args. With profile, the profiling records of the
+    worker are kept for the parent rather than handed to a hook of its
+    own.
+    """
+    import block_tree
+
+    sort_schema.configure(dunder_order, method_order)
+    block_tree.set_backend(backend)
+    profiling.set_hook(WORKER_RECORDS.append if profile else None)
+
+
+def sort_file(filepath, new_file=False, cache=None, index=None, rows=None):
+    """
+    Sorts a single file. Returns a (filepath, status, detail) tuple, where
+    detail is the error message for files that could not be sorted. With
+    rows, only the blocks that overlap them are sorted.
+    """
+    try:
+        code_sort = codesort.CodeSort(filepath, new_file, cache, index,
+                                      rows)
+        code_sort.sort()
+    except Exception as err:
+        return (filepath, ERROR, "{}: {}".format(type(err).__name__, err))
+    status = SORTED if code_sort.changed else UNCHANGED
+    return (filepath, status, '')
+
+
+def worker_args(profile=False):
+    """
+    The arguments of init_worker that give a worker process the settings
+    of this one
+    """
+    import block_tree
+
+    return sort_schema.ORDERINGS + (block_tree.BACKEND, profile)
+
+
+def _cached_result(filepath, cache, index):
+    """
+    Returns the result of a file that index or cache knows to be sorted
+    already, or None. The index only needs a stat of the file, the cache
+    only needs its content hash.
+    """
+    if index is not None and index.lookup(filepath):
+        return (filepath, UNCHANGED, '')
+    if cache is None:
+        return None
+    try:
+        with open(filepath, 'rb') as open_file:
+            entry = cache.get(cache.file_key(
+                os.path.dirname(os.path.abspath(filepath)),
+                open_file.read()))
+    except IOError:
+        return None
+    if entry:
+        if index is not None:
+            index.put(filepath, True)
+        return (filepath, UNCHANGED, '')
+    return None
+
+
+def _sort_file_star(args):
+    """
+    Worker side of sort_files. Unpacks the (filepath, new_file, signature,
+    check) arguments and returns the result along with the cache entries
+    and the profiling records that the parent process should record.
+    """
+    filepath, new_file, signature, check = args
+    cache = None
+    if signature is not None:
+        cache = ResultCache(signature=signature)
+    if check:
+        result = check_file(filepath, cache)
+    else:
+        result = sort_file(filepath, new_file, cache)
+    entries = cache.entries.items() if cache is not None else []
+    records = WORKER_RECORDS[:]
+    del WORKER_RECORDS[:]
+    return result, entries, records
+
+
+def sort_files(filepaths, jobs=None, new_file=False, cache=None,
+               index=None, check=False):
+    """
+    Sorts filepaths across jobs worker processes and yields the result of
+    each file as soon as it is done, in completion order. With check,
+    the files are only checked, see check_file.
+
+    Files are handed to the workers in chunks. With a single job, the
+    files are sorted in this process. Files that index or cache know to
+    be sorted are reported without being sent to a worker, and the
+    workers' results are recorded in both.
+    """
+    filepaths = list(filepaths)
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(min(jobs, len(filepaths)), 1)
+
+    if jobs == 1:
+        for filepath in filepaths:
+            if check:
+                yield check_file(filepath, cache, index)
+            else:
+                yield sort_file(filepath, new_file, cache, index)
+        return
+
+    signature = cache.signature if cache is not None else None
+    work = []
+    for filepath in filepaths:
+        if not new_file:
+            result = _cached_result(filepath, cache, index)
+            if result is not None:
+                yield result
+                continue
+        work.append((filepath, new_file, signature, check))
+    if not work:
+        return
+
+    chunksize = max(len(work) // (jobs * CHUNKS_PER_JOB), 1)
+    # The workers sort with the orderings of this process, even if they
+    # do not inherit its memory.
+    pool = multiprocessing.Pool(min(jobs, len(work)),
+                                initializer=init_worker,
+                                initargs=worker_args(profiling.HOOK is
+                                                     not None))
+    try:
+        for result, entries, records in pool.imap_unordered(
+                _sort_file_star, work, chunksize):
+            if cache is not None:
+                cache.update(entries)
+            for record in records:
+                profiling.emit(record)
+            filepath, status, _ = result
+            if index is not None and status != ERROR:
+                index.put(filepath, status == UNCHANGED or
+                          (status == SORTED and not new_file))
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+if __name__ == "__main__":
+    pass
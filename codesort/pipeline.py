@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          pipeline.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 19:12:26 2026
+@modified:      Sun Oct 18 19:12:26 2026
+@descr:         Sorts many files on slow (network) file systems, where
+                reading and writing take longer than sorting.
+
+    Each file goes through three stages: a read in a pool of I/O threads,
+    the tokenize and sort step in a pool of worker processes, and a
+    write back in the I/O threads. Many files are read and written at
+    once, so their latencies overlap, while the workers only ever see
+    code that is already in memory. At most a fixed number of files are
+    in flight at a time, which bounds the memory held by the pipeline.
+
+    With profiling on, the record of a file only holds the time that its
+    stages took, not the time that it waited for a thread or a worker.
+"""
+
+from __future__ import print_function, division
+import Queue
+import multiprocessing
+import os
+import threading
+from multiprocessing.pool import ThreadPool
+import codesort
+import parallel
+import profiling
+from parallel import SORTED, UNCHANGED, ERROR
+from source_buffer import SourceBuffer
+
+
+# Files read or written at the same time
+DEFAULT_IO_JOBS = 16
+
+# Files in flight, per I/O thread
+FILES_PER_IO_JOB = 4
+
+
+class Pipeline(object):
+    """
+    The state shared by the stages of one run of sort_files. Every stage
+    ends by handing the file to the next one, or by posting its result.
+    """
+    def __init__(self, io_jobs, jobs, new_file, cache, index, opener):
+        """ Init class attributes """
+        self.io_jobs = io_jobs
+        self.io_pool = ThreadPool(io_jobs)
+        self.cpu_pool = None
+        if jobs != 1:
+            # The profiles of the workers come back with their outcomes.
+            self.cpu_pool = multiprocessing.Pool(
+                jobs, initializer=parallel.init_worker,
+                initargs=parallel.worker_args())
+        self.new_file = new_file
+        self.cache = cache
+        self.cache_lock = threading.Lock()
+        self.profile_lock = threading.Lock()
+        self.index = index
+        self.opener = opener
+        self.in_flight = threading.BoundedSemaphore(io_jobs *
+                                                    FILES_PER_IO_JOB)
+        self.results = Queue.Queue()
+
+    def __str__(self):
+        """ String representation """
+        return "Pipeline of {} I/O threads".format(self.io_jobs)
+
+    def close(self):
+        """ Waits for both pools to finish """
+        self.io_pool.close()
+        self.io_pool.join()
+        if self.cpu_pool is not None:
+            self.cpu_pool.close()
+            self.cpu_pool.join()
+
+    def done(self, filepath, status, detail='', profile=None):
+        """
+        Posts the result of a file and makes room for another one. The
+        profiling hook gets the records of the files one at a time.
+        """
+        if self.index is not None and status != ERROR:
+            self.index.put(filepath, status == UNCHANGED or
+                           (status == SORTED and not self.new_file))
+        if profile is not None:
+            with self.profile_lock:
+                profile.finish()
+        self.results.put((filepath, status, detail))
+        self.in_flight.release()
+
+    def read(self, filepath):
+        """ I/O stage: reads the file and sends it to be sorted """
+        profile = None
+        try:
+            if self.index is not None and not self.new_file:
+                if self.index.lookup(filepath):
+                    return self.done(filepath, UNCHANGED)
+            profile = profiling.start(filepath)
+            with self.opener(filepath, 'rb') as open_file:
+                code = open_file.read()
+            if profile is not None:
+                profile.mark('read')
+                profile.count('bytes', len(code))
+            key = None
+            if self.cache is not None:
+                key = self.cache.file_key(_directory(filepath), code)
+                with self.cache_lock:
+                    entry = self.cache.get(key)
+                if profile is not None:
+                    profile.mark('cache')
+                if entry and not self.new_file:
+                    return self.done(filepath, UNCHANGED, profile=profile)
+        except Exception as err:
+            return self.done(filepath, ERROR, _describe(err), profile)
+
+        args = (code, _directory(filepath), profile is not None)
+        if self.cpu_pool is None:
+            self.sorted(filepath, code, key, _sort_spans(*args), profile)
+        else:
+            # The callback runs in the thread that collects the results of
+            # every worker, so it hands the file straight back to the I/O
+            # threads.
+            callback = lambda outcome: self.io_pool.apply_async(
+                self.sorted, (filepath, code, key, outcome, profile))
+            self.cpu_pool.apply_async(_sort_spans, args, callback=callback)
+
+    def sorted(self, filepath, code, key, outcome, profile=None):
+        """
+        Called with the (spans, error, profile) outcome of the sort. Sends
+        the file to be written if sorting changed it.
+        """
+        spans, error, sort_profile = outcome
+        if profile is not None:
+            if sort_profile is not None:
+                profile.extend(sort_profile)
+            profile.begin()
+        if error:
+            return self.done(filepath, ERROR, error, profile)
+        try:
+            source = SourceBuffer(code)
+            changed = not source.is_original(spans)
+        except Exception as err:
+            return self.done(filepath, ERROR, _describe(err), profile)
+        if profile is not None:
+            profile.mark('sort')
+            profile.count('lines', len(source))
+            profile.count('changed', int(changed))
+        if key is not None:
+            with self.cache_lock:
+                self.cache.put(key, not changed)
+            if profile is not None:
+                profile.mark('cache')
+        if changed or self.new_file:
+            self.io_pool.apply_async(self.write,
+                                     (filepath, source, spans, profile))
+        else:
+            self.done(filepath, UNCHANGED, profile=profile)
+
+    def write(self, filepath, source, spans, profile=None):
+        """ I/O stage: writes the sorted code """
+        if profile is not None:
+            profile.begin()
+        changed = not source.is_original(spans)
+        try:
+            if self.new_file:
+                new_filepath = codesort.CodeSort(filepath,
+                                                 True).new_filepath()
+                with self.opener(new_filepath, 'wb') as open_file:
+                    source.write(open_file, spans)
+            else:
+                with self.opener(filepath, 'r+b') as open_file:
+                    source.rewrite(open_file, spans)
+        except Exception as err:
+            return self.done(filepath, ERROR, _describe(err), profile)
+        if profile is not None:
+            profile.mark('write')
+        if self.cache is not None:
+            key = self.cache.file_key(_directory(filepath),
+                                      *source.chunks(spans))
+            with self.cache_lock:
+                self.cache.put(key, True)
+            if profile is not None:
+                profile.mark('cache')
+        self.done(filepath, SORTED if changed else UNCHANGED,
+                  profile=profile)
+
+
+def sort_files(filepaths, jobs=None, io_jobs=DEFAULT_IO_JOBS,
+               new_file=False, cache=None, index=None, opener=open):
+    """
+    Sorts filepaths and yields the (filepath, status, detail) result of
+    each file as soon as it is done, in completion order, like
+    parallel.sort_files.
+
+    io_jobs threads read and write files, and jobs worker processes sort
+    them; with a single job, the I/O threads sort the files themselves.
+    opener is called like open() for every file that is read or written.
+    """
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    pipeline = Pipeline(max(io_jobs, 1), max(jobs, 1), new_file, cache,
+                        index, opener)
+    pending = 0
+    try:
+        for filepath in filepaths:
+            pipeline.in_flight.acquire()
+            pipeline.io_pool.apply_async(pipeline.read, (filepath, ))
+            pending += 1
+            while True:
+                try:
+                    result = pipeline.results.get_nowait()
+                except Queue.Empty:
+                    break
+                pending -= 1
+                yield result
+        while pending:
+            # A timeout keeps the wait interruptible with Ctrl-C.
+            yield pipeline.results.get(timeout=1 << 20)
+            pending -= 1
+    finally:
+        pipeline.close()
+
+
+def _describe(err):
+    """ Detail of a file that could not be sorted """
+    return "{}: {}".format(type(err).__name__, err)
+
+
+def _directory(filepath):
+    """ Directory of filepath, for its local imports """
+    return os.path.dirname(os.path.abspath(filepath))
+
+
+def _sort_spans(code, directory=None, profiled=False):
+    """
+    CPU stage, run in a worker process: returns the (spans, error,
+    profile) of sorting code, a file in directory, where spans rebuild
+    the sorted code from code. With profiled, profile is a
+    profiling.FileProfile of the stages of the sort, else None.
+    """
+    profile = profiling.FileProfile(None) if profiled else None
+    try:
+        source, code_blocks = codesort.parse_code(code, profile, directory)
+        spans = codesort.sorted_spans(code_blocks, source)
+    except Exception as err:
+        return None, _describe(err), None
+    if profile is not None:
+        profile.mark('sort')
+    return spans, None, profile
+
+
+if __name__ == "__main__":
+    pass
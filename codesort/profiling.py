@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          profiling.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 22:05:13 2026
+@modified:      Sun Oct 18 22:05:13 2026
+@descr:         Opt-in timings of the stages of sorting each file, along
+                with counters of what each file holds.
+
+    A hook, set with set_hook, gets one record per file:
+
+        {"file": "a.py",
+         "stages": {"read": 0.0001, "cache": 0.00002, "tokenize": 0.004,
+                    "tree": 0.002, "blocks": 0.0005, "sort": 0.0003,
+                    "write": 0.0001},
+         "counters": {"bytes": 5120, "lines": 180, "tokens": 1400,
+                      "blocks": 42, "changed": 1},
+         "total": 0.0071}
+
+    tokenize is the tokenize module, tree builds and classifies the
+    blocks (block_tree), and blocks wraps them in CodeBlocks with their
+    sort keys. With the ast backend, parse (ast.parse) takes the place
+    of tokenize, and there is no tokens counter. A file that the cache
+    knows to be sorted only gets read and cache. check only times read,
+    cache and check, since it tokenizes and compares the blocks as one
+    stream.
+
+    Without a hook, start returns None, and the code that sorts a file
+    only tests for that a few times per file: nothing is timed or
+    counted per token or block. The module itself only imports time, so
+    that it costs nothing at startup either.
+"""
+
+from __future__ import print_function, division
+import time
+
+
+# Called with the record of every file, or None to turn profiling off.
+HOOK = None
+
+
+class FileProfile(object):
+    """
+    The stage timings and counters of one file. Each stage lasts from
+    the end of the previous one, or from begin(), to its mark().
+    """
+    def __init__(self, filepath):
+        """ Init class attributes """
+        self.filepath = filepath
+        self.stages = []
+        self.counters = {}
+        self._last = time.time()
+
+    def __str__(self):
+        """ String representation """
+        return "FileProfile of {} with {} stages".format(self.filepath,
+                                                         len(self.stages))
+
+    def begin(self):
+        """ Starts the next stage now, leaving out any wait before it """
+        self._last = time.time()
+
+    def count(self, counter, value):
+        """ Adds value to counter """
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def extend(self, other):
+        """ Adds the stages and counters of another FileProfile """
+        self.stages.extend(other.stages)
+        for counter, value in other.counters.items():
+            self.count(counter, value)
+
+    def finish(self):
+        """ Hands the record of the file to the hook """
+        emit(self.record())
+
+    def mark(self, stage):
+        """ Ends stage now """
+        now = time.time()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def record(self):
+        """
+        Returns the record of the file. Stages keep their order, and the
+        time of a stage that ran more than once is added up.
+        """
+        from collections import OrderedDict
+
+        stages = OrderedDict()
+        for stage, seconds in self.stages:
+            stages[stage] = stages.get(stage, 0) + seconds
+        return OrderedDict([('file', self.filepath),
+                            ('stages', stages),
+                            ('counters', self.counters),
+                            ('total', sum(stages.values())),
+                            ])
+
+
+def emit(record):
+    """ Hands a record to the hook, if there still is one """
+    hook = HOOK
+    if hook is not None:
+        hook(record)
+
+
+def json_lines(stream):
+    """ Returns a hook that writes each record to stream as a JSON line """
+    import json
+
+    def write_record(record):
+        """ Writes a single record """
+        stream.write(json.dumps(record) + '\n')
+        stream.flush()
+
+    return write_record
+
+
+def set_hook(hook):
+    """ Sets the hook that gets the record of every file, or None """
+    global HOOK
+
+    HOOK = hook
+
+
+def start(filepath):
+    """ Returns a new FileProfile of filepath, or None without a hook """
+    if HOOK is None:
+        return None
+    return FileProfile(filepath)
+
+
+if __name__ == "__main__":
+    pass
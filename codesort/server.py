@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          server.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 18:21:14 2026
+@modified:      Sun Oct 18 18:21:14 2026
+@descr:         Long-running codesort daemon listening on a Unix socket.
+
+    The daemon pays for starting the interpreter and importing codesort
+    once. It also keeps the result cache of every file it has seen in
+    memory, keyed by content hash, so that sorting a file that was
+    already sorted, or that it sorted itself, only costs a read and a
+    hash.
+
+    Each request is a single line of JSON from client.py, such as
+    {"command": "sort", "paths": [...], "new_file": false}. The daemon
+    answers with one JSON [filepath, status, detail] line per file and
+    closes the connection.
+"""
+
+from __future__ import print_function, division
+import errno
+import json
+import os
+import socket
+import SocketServer
+import codesort
+import import_groups
+import parallel
+from cache import ResultCache
+from client import DEFAULT_SOCKET_PATH
+
+
+class DaemonRunning(RuntimeError):
+    """ A codesort daemon already answers on the socket """
+    pass
+
+
+class SortHandler(SocketServer.StreamRequestHandler):
+    """ Handles a single request of a client """
+    def handle(self):
+        """
+        Reads the request and streams the results back. A connection
+        closed without a request, such as the probe of
+        remove_stale_socket, gets no answer.
+        """
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+            command = message['command']
+        except (ValueError, KeyError, TypeError):
+            self.reply(('', parallel.ERROR, "bad request"))
+            return
+
+        if command == 'shutdown':
+            self.server.running = False
+            return
+        if command not in ('sort', 'check'):
+            self.reply(('', parallel.ERROR,
+                        "unknown command {}".format(command)))
+            return
+
+        # Files and modules may have come and gone since the last request.
+        import_groups.reset()
+        cache = self.server.cache
+        filepaths = parallel.find_python_files(message.get('paths', []))
+        for filepath in filepaths:
+            if command == 'check':
+                result = parallel.check_file(filepath, cache)
+            else:
+                result = parallel.sort_file(filepath,
+                                            message.get('new_file', False),
+                                            cache)
+            self.reply(result)
+
+    def reply(self, result):
+        """ Sends a (filepath, status, detail) result to the client """
+        self.wfile.write(json.dumps(result) + '\n')
+        self.wfile.flush()
+
+
+class SortServer(SocketServer.UnixStreamServer):
+    """
+    The codesort daemon. Requests are handled one at a time, in the
+    order they arrive, so the cache needs no locking.
+    """
+    def __init__(self, socket_path=None, cache=None):
+        """
+        Init class attributes. Binds to socket_path, replacing a socket
+        left behind by a daemon that is no longer running.
+        """
+        if socket_path is None:
+            socket_path = DEFAULT_SOCKET_PATH
+        if cache is None:
+            cache = ResultCache(signature=codesort.schema_signature())
+        self.socket_path = socket_path
+        self.cache = cache
+        self.running = False
+        remove_stale_socket(socket_path)
+        SocketServer.UnixStreamServer.__init__(self, socket_path,
+                                               SortHandler)
+
+    def __str__(self):
+        """ String representation """
+        return "SortServer on {}".format(self.socket_path)
+
+    def server_bind(self):
+        """ Binds the socket so that only this user can connect to it """
+        umask = os.umask(0o177)
+        try:
+            SocketServer.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+
+    def serve(self):
+        """ Handles requests until a client asks for a shutdown """
+        self.running = True
+        try:
+            while self.running:
+                self.handle_request()
+        finally:
+            self.server_close()
+            os.remove(self.socket_path)
+
+
+def remove_stale_socket(socket_path):
+    """
+    Removes socket_path if no daemon answers on it. Raises DaemonRunning
+    if a daemon is still running there.
+    """
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except socket.error as err:
+        if err.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+            raise
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise DaemonRunning("a codesort daemon is already running on "
+                       "{}".format(socket_path))
+
+
+def serve(socket_path=None):
+    """ Runs the daemon until a client asks for a shutdown """
+    server = SortServer(socket_path)
+    print("Serving on {}".format(server.socket_path))
+    server.serve()
+
+
+def shutdown(socket_path=None):
+    """ Asks the daemon at socket_path to stop """
+    if socket_path is None:
+        socket_path = DEFAULT_SOCKET_PATH
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps({'command': 'shutdown'}) + '\n')
+        connection.recv(1)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    serve()
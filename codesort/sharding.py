@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          sharding.py
+@vers:          0.1
+@author:        dthor
+@created:       Mon Oct 19 00:42:18 2026
+@modified:      Mon Oct 19 00:42:18 2026
+@descr:         Sorts a single large file across a pool of worker
+                processes, one shard of top-level blocks at a time.
+
+    The file is split into shards right before top-level classes and
+    functions. Each worker tokenizes its shards and sorts the bodies of
+    their classes, which do not depend on anything outside of them. The
+    parent process only orders the top-level blocks and stitches the
+    sorted class bodies in between.
+
+    The file is written once to a temporary file before the pool starts,
+    and each worker maps it into memory, so a shard is sent to a worker
+    as a pair of offsets rather than as pickled text. Only the path of
+    the file goes to the workers, which works whether they are forked or
+    spawned, as on Windows.
+
+    A split point is only a guess, made from the text: it may be inside a
+    multi-line string or between brackets. The tokenizer then stops in
+    the middle of a statement at the end of the shard before it, and the
+    whole file is sorted in a single process instead.
+"""
+
+from __future__ import print_function, division
+import bisect
+import mmap
+import multiprocessing
+import os
+import re
+import tempfile
+import codesort
+import parallel
+from block_tree import Block
+
+
+# Fields of a Block that the workers send back for each top-level block
+BLOCK_FIELDS = ('kind', 'name', 'start', 'head', 'end', 'decorator_start',
+                'decorator_count')
+
+# Files of fewer bytes are sorted in a single process
+MIN_SHARDED_SIZE = 1 << 20
+
+# Shards handed to each worker. More shards balance the load better.
+SHARDS_PER_JOB = 4
+
+# Blank lines before a top-level class or function, where a shard may
+# end. The line before them must hold code, since the comments right
+# before a block belong to it, and no decorator, which may be followed
+# by blank lines before its class or function.
+SPLIT_POINT = re.compile(r'\n(?:[ \t\f]*\r?\n)+(?=(?:class|def)[ \t]|@)')
+
+# The file, in the memory map of a worker process
+SHARED_SOURCE = None
+
+
+def sort_source(source, jobs, directory=None):
+    """
+    Sorts source, a SourceBuffer of a file in directory, across jobs
+    worker processes. Returns the (code_blocks, spans) of the top-level
+    blocks and of the sorted code, like parse_code and sorted_spans of
+    codesort, or None if the file is too small to shard, or could not be
+    split. Only the top-level blocks are kept, without their children.
+    """
+    shards = split_points(source, jobs * SHARDS_PER_JOB)
+    if len(shards) < 2:
+        return None
+
+    handle, shared_path = tempfile.mkstemp(suffix='.py')
+    try:
+        with os.fdopen(handle, 'wb') as open_file:
+            open_file.write(source.data)
+        pool = multiprocessing.Pool(min(jobs, len(shards)),
+                                    initializer=_init_worker,
+                                    initargs=(shared_path,
+                                              parallel.worker_args()))
+        try:
+            results = pool.map(_sort_shard, shards, 1)
+        finally:
+            # The workers unmap the file as they exit, before it can be
+            # removed on Windows.
+            pool.close()
+            pool.join()
+    finally:
+        os.remove(shared_path)
+    if None in results:
+        return None
+
+    root = Block(1, -1)
+    root.children = []
+    body_spans = {}
+    for shard in results:
+        for fields, spans in shard:
+            block = Block(fields[2], 0, root)
+            for field, value in zip(BLOCK_FIELDS, fields):
+                setattr(block, field, value)
+            root.children.append(block)
+            if spans is not None:
+                body_spans[block.start] = spans
+    code_blocks = [codesort.CodeBlock(block=block, source=source)
+                   for block in root.children]
+    codesort.set_module_ranks(code_blocks, directory)
+    return code_blocks, codesort.sorted_spans(code_blocks, source,
+                                              body_spans=body_spans)
+
+
+def split_points(source, count):
+    """
+    Returns the (start, stop, first_row) of at most count shards of
+    about the same size of source, a SourceBuffer. start and stop are
+    offsets in source.data, and first_row is the row of start, counted
+    from 1. Files smaller than MIN_SHARDED_SIZE are a single shard.
+    """
+    data = source.data
+    size = len(data)
+    if size < MIN_SHARDED_SIZE or count < 2:
+        return [(0, size, 1)]
+
+    offsets = source.offsets
+    shards = []
+    start = 0
+    while len(shards) < count - 1:
+        target = start + (size - start) // (count - len(shards))
+        stop = None
+        for match in SPLIT_POINT.finditer(data, target):
+            line_start = data.rfind('\n', 0, match.start()) + 1
+            line = data[line_start:match.start()].strip()
+            if line and line[0] not in '#@':
+                stop = match.end()
+                break
+        if stop is None:
+            break
+        shards.append((start, stop, bisect.bisect_left(offsets, start) + 1))
+        start = stop
+    shards.append((start, size, bisect.bisect_left(offsets, start) + 1))
+    return shards
+
+
+def _init_worker(shared_path, worker_args):
+    """
+    Sets up a worker process of sort_source with a memory map of the
+    file at shared_path and the settings of the parent; see
+    parallel.worker_args.
+    """
+    global SHARED_SOURCE
+
+    with open(shared_path, 'rb') as open_file:
+        SHARED_SOURCE = mmap.mmap(open_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+    parallel.init_worker(*worker_args)
+
+
+def _sort_shard(shard):
+    """
+    Worker side of sort_source. Tokenizes the (start, stop, first_row)
+    shard of the file and returns the fields of each of its top-level
+    blocks along with the sorted spans of the class bodies, or None for
+    top-level blocks that are no class. Rows and spans are those of the
+    whole file. Returns None if the shard does not end with a whole
+    statement, or with the decorators of a class or function that is in
+    the next shard.
+    """
+    import tokenize
+
+    start, stop, first_row = shard
+    shift = first_row - 1
+    try:
+        _, code_blocks = codesort.parse_code(SHARED_SOURCE[start:stop])
+    except (tokenize.TokenError, SyntaxError):
+        return None
+    if code_blocks and not code_blocks[-1].block.kind:
+        return None
+
+    result = []
+    for code_block in code_blocks:
+        block = code_block.block
+        fields = [getattr(block, field) for field in BLOCK_FIELDS]
+        for index in (2, 3, 4):
+            fields[index] += shift
+        if block.decorator_start is not None:
+            fields[5] += shift
+        spans = None
+        if code_block.children:
+            spans = []
+            codesort._sorted_spans(code_block.children, block.start,
+                                   block.end, spans)
+            spans = [(first + shift, last + shift) for first, last in spans]
+        result.append((tuple(fields), spans))
+    return result
+
+
+if __name__ == "__main__":
+    pass
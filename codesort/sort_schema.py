@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          sort_schema.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 21:14:37 2026
+@modified:      Sun Oct 18 21:14:37 2026
+@descr:         The orderings of class members in the sorting schema, which
+                a config file may change.
+
+    Every member that an ordering names gets its sort key from a table
+    that is built once, when the orderings are set. A member then costs
+    a dict lookup when its key is computed, and sorting a class body only
+    compares small tuples.
+
+    The orderings are read from the [codesort] section of a config file:
+
+        [codesort]
+        dunder_order = __init__ __new__ __str__ __repr__
+        method_order = setUp tearDown
+
+    dunder_order replaces DUNDER_ORDER. The methods of method_order come
+    right after the dunder methods, in that order.
+"""
+
+from __future__ import print_function, division
+
+
+# Rank of each class body section of the sorting schema. The statements
+# that follow a method, and the members after them, rank as CLASS_CODE;
+# see codesort.set_class_ranks.
+(CLASS_DOCSTRING, CLASS_ATTRIBUTE, DUNDER, NAMED, PRIVATE, PUBLIC,
+ CLASS_CODE) = range(7)
+
+DUNDER_ORDER = ['__init__',
+                '__new__',
+                '__del__',
+                '__str__',
+                '__repr__',
+                '__cmp__',
+                '__hash__',
+                '__nonzero__',
+                '__unicode__',
+                '__getattr__',
+                '__setattr__',
+                '__delattr__',
+                '__getattribute__',
+                '__get__',
+                '__set__',
+                '__delete__',
+                ]
+
+# Section of the config file that holds the orderings
+CONFIG_SECTION = 'codesort'
+
+# Sort keys of the members that the orderings name, by name. Set by
+# configure(), along with the (dunder_order, method_order) they come from.
+MEMBER_KEYS = {}
+ORDERINGS = ()
+
+
+def configure(dunder_order=None, method_order=()):
+    """
+    Sets the orderings of class members. dunder_order defaults to
+    DUNDER_ORDER. Dunder methods that it does not name come after those
+    it does, in alphabetical order.
+    """
+    global MEMBER_KEYS, ORDERINGS
+
+    if dunder_order is None:
+        dunder_order = DUNDER_ORDER
+    keys = {}
+    for section, order in ((NAMED, method_order), (DUNDER, dunder_order)):
+        for rank, name in enumerate(order):
+            keys[name] = (section, rank, name.lower(), name)
+    MEMBER_KEYS = keys
+    ORDERINGS = (list(dunder_order), list(method_order))
+
+
+def load_config(filepath):
+    """
+    Returns the (dunder_order, method_order) of the config file at
+    filepath, with None or () for the orderings that it leaves out.
+    Raises ValueError if the file cannot be parsed.
+    """
+    import ConfigParser
+
+    parser = ConfigParser.RawConfigParser()
+    try:
+        with open(filepath) as open_file:
+            parser.readfp(open_file)
+    except ConfigParser.Error as err:
+        raise ValueError(str(err).strip())
+
+    orderings = [None, ()]
+    for index, option in enumerate(('dunder_order', 'method_order')):
+        if parser.has_option(CONFIG_SECTION, option):
+            value = parser.get(CONFIG_SECTION, option)
+            orderings[index] = value.replace(',', ' ').split()
+    return tuple(orderings)
+
+
+def member_key(name):
+    """
+    Returns the sort key of a method or class defined in a class body.
+    Only the members that no ordering names need any string work.
+    """
+    key = MEMBER_KEYS.get(name)
+    if key is not None:
+        return key
+    alphabetical = (name.lower(), name)
+    if name.startswith('__') and name.endswith('__'):
+        return (DUNDER, len(ORDERINGS[0])) + alphabetical
+    if name.startswith('_'):
+        return (PRIVATE, ) + alphabetical
+    return (PUBLIC, ) + alphabetical
+
+
+configure()
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          source_buffer.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 16:20:12 2026
+@modified:      Sun Oct 18 16:20:12 2026
+@descr:         Holds the source of a file once, along with the offset of
+                each of its lines, and hands out its lines as zero-copy
+                slices.
+
+    Sorting only moves whole lines around, so the sorted file is written
+    as slices of the original bytes: line endings, trailing whitespace
+    and anything else on a line come out exactly as they went in.
+"""
+
+from __future__ import print_function, division
+from array import array
+import mmap
+import os
+
+
+class SourceBuffer(object):
+    """
+    The bytes of a source file and the table of its line offsets.
+
+    Lines are numbered from 0, and a (start, stop) pair of line numbers
+    is a span of lines, like a slice of a list of lines. ``data`` is a
+    str, or an mmap when the buffer was made by from_file with use_mmap.
+
+    A last line without a line ending is read as if it had one, since the
+    tokenizer needs it. When that line is moved elsewhere in the output,
+    it gets the line ending of the file, and whichever line ends up last
+    loses its own.
+    """
+    def __init__(self, data):
+        """ Init class attributes """
+        offsets = array('l', [0])
+        _scan_lines(data, 0, len(data), offsets)
+        self._set_data(data, offsets)
+
+    def __len__(self):
+        """ Number of lines """
+        return len(self.offsets) - 1
+
+    def __str__(self):
+        """ String representation """
+        return "SourceBuffer of {} lines".format(len(self))
+
+    @classmethod
+    def from_file(cls, filepath, use_mmap=False):
+        """
+        Reads the file at filepath. With use_mmap, the file is mapped
+        instead of read, so that its bytes are only paged in as they are
+        used; the file must not be rewritten while the buffer is in use.
+        """
+        with open(filepath, 'rb') as open_file:
+            if use_mmap and open_file.read(1):
+                data = mmap.mmap(open_file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+            else:
+                open_file.seek(0)
+                data = open_file.read()
+        return cls(data)
+
+    def chunks(self, spans):
+        """
+        Yields the output made of spans as zero-copy slices of the
+        source, along with the line endings that it lacks.
+        """
+        for start, stop, suffix in self._ranges(spans):
+            yield self._slice(start, stop)
+            if suffix:
+                yield suffix
+
+    def is_original(self, spans):
+        """ Tells if the output made of spans is the source itself """
+        return self.unchanged_rows(spans) == len(self)
+
+    def join(self, spans):
+        """ Returns the output made of spans as a single str """
+        data = self.data
+        return ''.join([data[start:stop] + suffix
+                        for start, stop, suffix in self._ranges(spans)])
+
+    def lines(self, start=0):
+        """
+        Yields every line from line start on as a str, the last one with
+        a line ending even if the source has none. Suited to
+        tokenize.generate_tokens.
+        """
+        data = self.data
+        offsets = self.offsets
+        for line in xrange(start, len(self) - self.missing_eol):
+            yield data[offsets[line]:offsets[line + 1]]
+        if self.missing_eol and start < len(self):
+            yield data[offsets[-2]:] + '\n'
+
+    def readline(self, start=0):
+        """
+        Returns a readline function over the lines of the source, from
+        line start on.
+        """
+        lines = self.lines(start)
+        return lambda: next(lines, '')
+
+    def replace(self, start, stop, text):
+        """
+        Replaces lines start through stop - 1 with text, in place, as an
+        editor would. Returns the change in the number of lines.
+
+        Only text is scanned for line endings: the offsets of the lines
+        before the edit are kept, and those after it are shifted.
+        """
+        offsets = self.offsets
+        count = len(self)
+        data = self.data
+        begin = offsets[start]
+        end = offsets[stop]
+        # Line starts that come from line endings, so not the end of an
+        # unterminated last line.
+        head = offsets[:start + 1 - (self.missing_eol and start == count)]
+        tail = offsets[stop + 1:len(offsets) - self.missing_eol]
+
+        data = data[:begin] + text + data[end:]
+        _scan_lines(data, begin, begin + len(text), head)
+        delta = len(text) - (end - begin)
+        if delta:
+            head.fromlist([offset + delta for offset in tail])
+        else:
+            head.extend(tail)
+        self._set_data(data, head)
+        return len(self) - count
+
+    def rewrite(self, open_file, spans):
+        """
+        Rewrites the source, open in open_file for reading and writing,
+        with the output made of spans. Returns the number of bytes
+        written.
+
+        The lines that the output leaves at the start of the file are not
+        written again: the output is assembled from the first changed line
+        on into a single buffer, written over the file from that offset,
+        and synced once. If writing fails, the original bytes are put back
+        before the error is raised, so the file is never left half
+        sorted by a full disk.
+        """
+        offset = self.offsets[self.unchanged_rows(spans)]
+        chunks = list(self.chunks(spans))
+        output = bytearray(sum(len(chunk) for chunk in chunks) - offset)
+        position = -offset
+        for chunk in chunks:
+            end = position + len(chunk)
+            if end > 0:
+                output[max(position, 0):end] = chunk[max(-position, 0):]
+            position = end
+
+        if self._view is None:
+            original = self.data[offset:]
+        else:
+            original = self._slice(offset, len(self.data))
+        open_file.seek(offset)
+        try:
+            open_file.write(output)
+            open_file.truncate()
+            open_file.flush()
+            os.fsync(open_file.fileno())
+        except EnvironmentError:
+            open_file.seek(offset)
+            open_file.write(original)
+            open_file.truncate()
+            open_file.flush()
+            raise
+        return len(output)
+
+    def text(self, start, stop):
+        """ Returns lines start through stop - 1 as a str """
+        return self.data[self.offsets[start]:self.offsets[stop]]
+
+    def unchanged_rows(self, spans):
+        """ Number of lines that the output made of spans starts with """
+        row = 0
+        for start, stop in spans:
+            if start < stop:
+                if start != row:
+                    break
+                row = stop
+        return row
+
+    def view(self, start, stop):
+        """ Returns lines start through stop - 1 without copying them """
+        return self._slice(self.offsets[start], self.offsets[stop])
+
+    def write(self, open_file, spans):
+        """
+        Writes the output made of spans to open_file, one slice at a time.
+        Returns the number of bytes written.
+        """
+        size = 0
+        for chunk in self.chunks(spans):
+            open_file.write(chunk)
+            size += len(chunk)
+        return size
+
+    def _ranges(self, spans):
+        """
+        Returns the (start, stop, suffix) byte ranges of the output made
+        of spans, where suffix is a line ending to add after the range.
+        """
+        data = self.data
+        offsets = self.offsets
+        count = len(self)
+        ranges = []
+        for start, stop in spans:
+            if start >= stop:
+                continue
+            suffix = ''
+            if stop == count and self.missing_eol:
+                suffix = self.newline
+            ranges.append([offsets[start], offsets[stop], suffix])
+        if self.missing_eol and ranges:
+            last = ranges[-1]
+            if last[2]:
+                last[2] = ''
+            elif data[last[1] - 2:last[1]] == '\r\n':
+                last[1] -= 2
+            else:
+                last[1] -= 1
+        return ranges
+
+    def _set_data(self, data, offsets):
+        """
+        Sets data and its offsets, which lack the end of an unterminated
+        last line.
+        """
+        size = len(data)
+        self.missing_eol = offsets[-1] != size
+        if self.missing_eol:
+            offsets.append(size)
+        self.data = data
+        self.offsets = offsets
+        first_eol = offsets[1] if len(offsets) > 1 else 0
+        if data[first_eol - 2:first_eol] == '\r\n':
+            self.newline = '\r\n'
+        else:
+            self.newline = '\n'
+        if isinstance(data, mmap.mmap):
+            # Python 2 cannot take a memoryview of an mmap.
+            self._view = None
+        else:
+            self._view = memoryview(data)
+
+    def _slice(self, start, stop):
+        """
+        Returns the bytes from offset start to offset stop without copying
+        them: a memoryview of a str, or a buffer of an mmap.
+        """
+        if self._view is None:
+            return buffer(self.data, start, stop - start)
+        return self._view[start:stop]
+
+
+def _scan_lines(data, begin, end, offsets):
+    """
+    Appends to offsets the start of every line that follows a line
+    ending between offsets begin and end of data.
+    """
+    position = data.find('\n', begin, end) + 1
+    while position:
+        offsets.append(position)
+        position = data.find('\n', position, end) + 1
+
+
+if __name__ == "__main__":
+    pass
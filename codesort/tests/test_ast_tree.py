@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_ast_tree.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 23:58:20 2026
+@modified:      Sun Oct 18 23:58:20 2026
+@descr:         Unit Testing for codesort.ast_tree module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import tempfile
+import tokenize
+import codesort.ast_tree as ast_tree
+import codesort.block_tree as block_tree
+import codesort.codesort as codesort
+import codesort.parallel as parallel
+import codesort.pipeline as pipeline
+from codesort.source_buffer import SourceBuffer
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+
+# Valid for the tokenizer, but not for the compiler
+INVALID_CODE = "def b():\n    x = = 1\n\n\ndef a():\n    pass\n"
+
+
+def tree_rows(root):
+    """ Everything that a block of the tree of root holds, in walk order """
+    return [(b.kind, b.name, b.start, b.head, b.end, b.indent,
+             b.decorator_start, b.decorator_count, len(b.children))
+            for b in root.walk()]
+
+
+class TreeFromSource(unittest.TestCase):
+    """ Test the tree_from_source function """
+    code = """# -*- coding: utf-8 -*-
+\"\"\"
+Module docstring
+\"\"\"
+import os, sys
+from . import local
+# lead
+@dec1
+@dec2(a,
+      b)
+def func(x):
+    \"\"\"
+    Docstring
+    \"\"\"
+    if x:
+        pass
+    elif x is None:
+        pass
+    else:
+        y = 1; z = 2
+        # trailing in body
+# next comment
+try:
+    import foo
+except ImportError:
+    foo = None
+else:
+    pass
+finally:
+    # closing
+    bar = \\
+        None
+with open(a) as b, \\
+        open(c) as d:
+    pass
+TEXT = '''
+# not a comment'''
+class A(object):
+    x = 1
+
+
+    # leading
+    def method(self): return 1
+    # end of A
+if __name__ == '__main__' and True:
+    main()
+# trailing
+"""
+
+    def test_matches_tokens(self):
+        """ Both backends build the same tree """
+        texts = [self.code]
+        for name in ("sorted_1.py", "unsorted_1.py", "unsorted_2.py",
+                     "2_multiline_defs.py", "3_comments.py"):
+            with open(os.path.join(DATA_PATH, name), 'rb') as openfile:
+                texts.append(openfile.read())
+        for text in texts:
+            source = SourceBuffer(text)
+            tokens = tokenize.generate_tokens(source.readline())
+            self.assertEqual(
+                tree_rows(ast_tree.tree_from_source(source)),
+                tree_rows(block_tree.tree_from_tokens(tokens)))
+
+    def test_known_values(self):
+        """ Check the kind, name and rows of the top-level blocks """
+        tree = ast_tree.tree_from_source(SourceBuffer(self.code))
+        result = [(b.kind, b.name, b.start, b.head, b.end)
+                  for b in tree.children]
+        expected = [('docstring', '', 1, 2, 4),
+                    ('import', 'os', 5, 5, 5),
+                    ('import', '.', 6, 6, 6),
+                    ('function', 'func', 7, 11, 21),
+                    ('other', '', 22, 23, 32),
+                    ('other', '', 33, 33, 35),
+                    ('constant', 'TEXT', 36, 36, 37),
+                    ('class', 'A', 38, 38, 44),
+                    ('other', '__main__', 45, 45, 47),
+                    ]
+        self.assertEqual(result, expected)
+
+    def test_empty(self):
+        """ A file of comments only is a single comment block """
+        tree = ast_tree.tree_from_source(SourceBuffer("\n# a\n# b\n"))
+        self.assertEqual([(b.kind, b.start, b.end) for b in tree.children],
+                         [('comment', 2, 3)])
+        self.assertEqual(tree.end, 3)
+
+    def test_classify_node(self):
+        """ Blocks are classified from their nodes """
+        code = ("'%s' % x\n"
+                "CONST = 1\n"
+                "name, other = 1, 2\n"
+                "obj.attr = 1\n"
+                "Lower = 1\n")
+        tree = ast_tree.tree_from_source(SourceBuffer(code))
+        self.assertEqual([(b.kind, b.name) for b in tree.children],
+                         [('other', ''),
+                          ('constant', 'CONST'),
+                          ('other', ''),
+                          ('other', ''),
+                          ('instance_var', 'Lower'),
+                          ])
+
+    def test_syntax_error(self):
+        """ Code that does not compile raises SyntaxError """
+        with self.assertRaises(SyntaxError):
+            ast_tree.tree_from_source(SourceBuffer(INVALID_CODE))
+
+
+class Backend(unittest.TestCase):
+    """ Test sorting with the ast backend """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        block_tree.set_backend('ast')
+
+    def tearDown(self):
+        block_tree.set_backend('tokenize')
+        shutil.rmtree(self.temp_dir)
+
+    def test_set_backend(self):
+        """ Unknown backends are refused """
+        with self.assertRaises(ValueError):
+            block_tree.set_backend('pyclbr')
+        self.assertEqual(block_tree.BACKEND, 'ast')
+
+    def test_sort_code(self):
+        """ Both backends sort the test files the same way """
+        for name in ("unsorted_1.py", "unsorted_2.py"):
+            with open(os.path.join(DATA_PATH, name), 'rb') as openfile:
+                code = openfile.read()
+            sorted_code = codesort.sort_code(code)
+            self.assertTrue(codesort.check_code(sorted_code))
+            self.assertFalse(codesort.check_code(code))
+            block_tree.set_backend('tokenize')
+            self.assertEqual(codesort.sort_code(code), sorted_code)
+            block_tree.set_backend('ast')
+
+    def test_signature(self):
+        """ Cached results of one backend are not used by the other """
+        signature = codesort.schema_signature()
+        block_tree.set_backend('tokenize')
+        self.assertNotEqual(codesort.schema_signature(), signature)
+
+    def test_workers(self):
+        """ Worker processes use the backend of the parent """
+        filepaths = []
+        for name in ('a.py', 'b.py'):
+            filepaths.append(os.path.join(self.temp_dir, name))
+            with open(filepaths[-1], 'wb') as openfile:
+                openfile.write(INVALID_CODE)
+        for results in (parallel.sort_files(filepaths, jobs=2),
+                        pipeline.sort_files(filepaths, jobs=2)):
+            self.assertEqual(set(status for _, status, _ in results),
+                             set([parallel.ERROR]))
+        block_tree.set_backend('tokenize')
+        results = parallel.sort_files(filepaths, jobs=2)
+        self.assertEqual(set(status for _, status, _ in results),
+                         set([parallel.SORTED]))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
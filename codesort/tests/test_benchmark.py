@@ -0,0 +1,702 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_benchmark.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 11:02:15 2026
+@modified:      Sun Oct 18 11:02:15 2026
+@descr:         Benchmarks for codesort, run against large generated
+                modules. Timings are printed, and the tests fail when the
+                scaling is clearly worse than linear.
+
+    The margins of the timed benchmarks do not hold on a loaded machine,
+    and they take about a minute, so they only run, along with the memory
+    benchmark, when the environment variable CODESORT_BENCHMARK is set:
+
+        CODESORT_BENCHMARK=1 python -m unittest codesort.tests.test_benchmark
+"""
+
+from __future__ import print_function, division
+import unittest
+import gc
+import multiprocessing
+import os
+import random
+import sys
+import shutil
+import subprocess
+import tempfile
+import time
+import timeit
+import codesort.block_tree as block_tree
+import codesort.codesort as codesort
+import codesort.find_fold_points as ffp
+import codesort.import_groups as import_groups
+import codesort.pipeline as pipeline
+import codesort.sharding as sharding
+import codesort.sort_schema as sort_schema
+from codesort.source_buffer import SourceBuffer
+
+
+# Set to run the benchmarks
+BENCHMARK_VARIABLE = 'CODESORT_BENCHMARK'
+
+# Allowed ratio between measured and linear growth of the run time.
+SCALING_SLACK = 2.5
+
+# File sizes for the file comparison benchmark. Raise the last one to
+# 1 GB for a full run; it is kept small so the test suite stays quick.
+COMPARE_SIZES = (1 << 20, 16 << 20)
+
+# Seconds that a codesort.py run may take on top of a bare interpreter.
+# Runs vary by several ms on a busy machine, so the budgets only catch
+# gross regressions; test_lazy_imports catches modules imported up front.
+STARTUP_BUDGET = {'--version': 0.040,
+                  'tiny file': 0.070,
+                  }
+
+# Seconds that every read and write takes on the simulated network
+# file system
+FILE_LATENCY = 0.005
+
+# Minimum ratio between parsing a whole file and handling a keystroke
+# in it with CodeSort.edit
+EDIT_SPEEDUP = 20
+
+# Bytes that the buffer of the source may hold per byte of source, which
+# is about 1.2 with its table of line offsets
+MAX_BUFFER_RATIO = 1.5
+
+# Bytes that parsed code may hold per block, besides the source buffer:
+# its Block and CodeBlock, with the sort key and name. About 400 bytes
+# now, at any nesting depth.
+MAX_BLOCK_BYTES = 450
+
+# Class sizes, in methods, for the member ordering benchmark
+MEMBER_COUNTS = (1000, 4000, 16000)
+
+# Modules that a plain import of codesort must not pull in
+LAZY_MODULES = ('docopt', 'tokenize', 'hashlib', 'StringIO', 'block_tree',
+                'block_moves', 'find_fold_points', 'fold_index',
+                'import_groups', 'ast', 'ast_tree', 'sharding')
+
+# File sizes, in lines, for the comparison of the tree backends
+BACKEND_SIZES = (10000, 100000)
+
+# Lines of each data literal, and lines of code between them, for the
+# generated data file benchmark
+DATA_LINES = (10000, 2000)
+
+# Lines of the single file that is sorted across worker processes
+SHARDED_LINES = 60000
+
+# Blocks, and the first lines that they are made of, for the block
+# classification benchmark
+CLASSIFY_BLOCKS = 100000
+BLOCK_STARTS = ('class Apple(object):', '    def method(self):',
+                'name = value', 'CONSTANT = 1', '# comment',
+                'from os import path', 'import sys', '""" Docstring """',
+                'print(value)', '    @property\n    def name(self):',
+                '@first\n@second\n@third\ndef function(a):')
+
+# Files, and the imports of each, for the import grouping benchmark
+IMPORT_FILES = 2000
+IMPORTS = ('os', 'sys', 'json', 'docopt', 'numpy', 'codesort', 'cache',
+           'not_installed', 'source_buffer', 'unittest')
+
+
+# Marks the tests that compare timings or measure memory; see
+# BENCHMARK_VARIABLE.
+benchmark = unittest.skipUnless(os.environ.get(BENCHMARK_VARIABLE),
+                                "set {} to run".format(BENCHMARK_VARIABLE))
+
+
+def generate_module(line_count, methods=8):
+    """
+    Returns the text of an unsorted module with about line_count lines:
+    classes and functions in reverse alphabetical order, each class with
+    its methods in reverse order.
+    """
+    lines = ['# -*- coding: utf-8 -*-',
+             '""" Generated module """',
+             '',
+             'from __future__ import print_function',
+             'import os',
+             '',
+             ]
+    # Each class is 4 * methods + 3 lines, each function 4 lines.
+    class_lines = 4 * methods + 3
+    count = max(line_count // (class_lines + 4), 1)
+    for number in reversed(range(count)):
+        lines.extend(['', '',
+                      'class Class{:06d}(object):'.format(number),
+                      '    """ Generated class """',
+                      ])
+        for method in reversed(range(methods)):
+            lines.extend(['',
+                          '    def method_{}(self):'.format(method),
+                          '        """ Generated method """',
+                          '        return {}'.format(method),
+                          ])
+        lines.extend(['', '',
+                      'def function_{:06d}(a):'.format(number),
+                      '    """ Generated function """',
+                      '    return a',
+                      ])
+    lines.extend(['', '', 'if __name__ == "__main__":', '    pass', ''])
+    return '\n'.join(lines)
+
+
+def command_time(command, repeat=20):
+    """
+    Best wall time of a few runs of a command, in a new process, over
+    the best time of a bare interpreter. The two are run in turns, so
+    that both see the same load on the machine.
+    """
+    def run_time(args):
+        """ Wall time of a single run """
+        start = timeit.default_timer()
+        subprocess.check_call(args, stdout=devnull)
+        return timeit.default_timer() - start
+
+    bare = command_best = float('inf')
+    with open(os.devnull, 'wb') as devnull:
+        for _ in range(repeat):
+            bare = min(bare, run_time([sys.executable, '-c', 'pass']))
+            command_best = min(command_best, run_time(command))
+    return command_best - bare
+
+
+class DelayedFile(object):
+    """
+    An open file on a slow file system: reads and writes only return
+    after FILE_LATENCY seconds.
+    """
+    def __init__(self, filepath, mode):
+        self.open_file = open(filepath, mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.open_file.close()
+
+    def __getattr__(self, name):
+        return getattr(self.open_file, name)
+
+    def read(self, *args):
+        time.sleep(FILE_LATENCY)
+        return self.open_file.read(*args)
+
+    def write(self, data):
+        time.sleep(FILE_LATENCY)
+        return self.open_file.write(data)
+
+
+def generate_data_module(tables, rows):
+    """
+    Returns a generated module of tables lookup tables of rows lines
+    each, like the output of a code generator, with a little code between
+    them.
+    """
+    code = generate_module(DATA_LINES[1])
+    parts = []
+    for number in range(tables):
+        parts.append(code)
+        parts.append('\n\nTABLE_{} = {{\n'.format(number))
+        parts.extend('    "key_{0}": ({0}, {0:.3f}, "{0:x}"),\n'.format(row)
+                     for row in range(rows))
+        parts.append('}\n')
+    return ''.join(parts)
+
+
+def generate_nested_module(line_count, depth):
+    """
+    Returns a module of about line_count lines made of classes nested
+    depth levels deep, with a few methods at every level.
+    """
+    lines = []
+    number = 0
+    while len(lines) < line_count:
+        for level in range(depth):
+            indent = '    ' * level
+            lines.extend([indent + 'class Nested{}_{}(object):'.format(
+                              number, level),
+                          indent + '    """ Generated class """',
+                          indent + '    def method_b(self):',
+                          indent + '        return 2',
+                          indent + '    def method_a(self):',
+                          indent + '        return 1',
+                          ])
+        number += 1
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def naive_member_cmp(name1, name2, orderings=(sort_schema.DUNDER_ORDER,
+                                              ['setUp', 'tearDown'])):
+    """
+    Compares two class members by working out their section and rank on
+    every comparison, which is what the precomputed keys save.
+    """
+    def rank(name):
+        """ (section, rank) of name """
+        dunder_order, method_order = orderings
+        if name in dunder_order:
+            return (sort_schema.DUNDER, dunder_order.index(name))
+        if name in method_order:
+            return (sort_schema.NAMED, method_order.index(name))
+        if name.startswith('__') and name.endswith('__'):
+            return (sort_schema.DUNDER, len(dunder_order))
+        if name.startswith('_'):
+            return (sort_schema.PRIVATE, )
+        return (sort_schema.PUBLIC, )
+
+    return cmp(rank(name1) + (name1.lower(), name1),
+               rank(name2) + (name2.lower(), name2))
+
+
+def retained_size(*objects):
+    """
+    Bytes held by objects and everything they reference, each object
+    counted once. Python 2.7 has no tracemalloc, so the object graph is
+    walked with gc.get_referents instead.
+    """
+    seen = set()
+    total = 0
+    pending = list(objects)
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return total
+
+
+def line_file_compare(file1, file2):
+    """
+    The line-by-line binary_file_compare that codesort used to ship, kept
+    as the reference for the file comparison benchmark.
+    """
+    match = False
+    with open(file1, 'rb') as ref:
+        with open(file2, 'rb') as tmp:
+            ref.seek(-1, 2)
+            tmp.seek(-1, 2)
+            ref_size = ref.tell()
+            if not ref_size == tmp.tell():
+                return match
+            if not ref.read() == tmp.read():
+                return match
+            ref.seek(0, 0)
+            tmp.seek(0, 0)
+            for ref_byte, tmp_byte in zip(ref, tmp):
+                match = ref_byte == tmp_byte
+                if not match:
+                    break
+    return match
+
+
+def best_time(func, *args):
+    """ Best wall time of a few runs of func(*args) """
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=3))
+
+
+class SortScaling(unittest.TestCase):
+    """ Benchmark sort_code against 1k, 10k and 100k line modules """
+    sizes = (1000, 10000, 100000)
+
+    @benchmark
+    def test_linear_scaling(self):
+        """ Sorting time grows about linearly with the module size """
+        timings = []
+        for size in self.sizes:
+            code = generate_module(size)
+            timings.append(best_time(codesort.sort_code, code))
+            print("\nsort_code: {:>7} lines in {:.4f} s".format(size,
+                                                             timings[-1]),
+                  end='')
+        for (small, t_small), (large, t_large) in zip(
+                zip(self.sizes, timings), zip(self.sizes[1:], timings[1:])):
+            self.assertLess(t_large / t_small,
+                            SCALING_SLACK * large / small)
+
+    def test_sorted_output(self):
+        """ The generated module really gets sorted """
+        sorted_code = codesort.sort_code(generate_module(1000))
+        self.assertLess(sorted_code.index('class Class000000'),
+                        sorted_code.index('class Class000001'))
+        self.assertLess(sorted_code.index('def method_0'),
+                        sorted_code.index('def method_1'))
+        self.assertEqual(codesort.sort_code(sorted_code), sorted_code)
+
+
+class StartupTime(unittest.TestCase):
+    """
+    Cold start of codesort.py. Python 2.7 has no -X importtime, so the
+    whole run is timed against a bare interpreter, and the modules that a
+    plain import loads are listed from a fresh process.
+    """
+    script = os.path.splitext(codesort.__file__)[0] + '.py'
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_lazy_imports(self):
+        """ Importing codesort leaves the parsing modules unloaded """
+        code = ("import sys; sys.path.insert(0, {!r}); import codesort; "
+                "print(' '.join(sys.modules))")
+        output = subprocess.check_output(
+            [sys.executable, '-c',
+             code.format(os.path.dirname(self.script))])
+        loaded = set(output.split())
+        self.assertEqual([name for name in LAZY_MODULES if name in loaded],
+                         [])
+
+    @benchmark
+    def test_startup_budget(self):
+        """ --version and sorting a tiny file start quickly """
+        tiny_file = os.path.join(self.temp_dir, 'tiny.py')
+        with open(tiny_file, 'wb') as openfile:
+            openfile.write("def b():\n    pass\n\n\ndef a():\n    pass\n")
+        for name, args in (('--version', ['--version']),
+                           ('tiny file', [tiny_file])):
+            overhead = command_time([sys.executable, self.script] + args)
+            print("\ncodesort.py {}: {:.1f} ms over the interpreter".format(
+                name, overhead * 1000), end='')
+            self.assertLess(overhead, STARTUP_BUDGET[name])
+
+
+class SlowFileSystem(unittest.TestCase):
+    """
+    Benchmark the pipeline on a simulated network file system, where the
+    latency of each read and write outweighs sorting a small file.
+    """
+    file_count = 64
+    io_jobs = (1, 16)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.code = generate_module(100)
+        self.paths = [os.path.join(self.temp_dir, '{}.py'.format(x))
+                      for x in range(self.file_count)]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _run(self, io_jobs):
+        """ Time to sort every file with io_jobs I/O threads """
+        for path in self.paths:
+            with open(path, 'wb') as openfile:
+                openfile.write(self.code)
+        start = timeit.default_timer()
+        results = list(pipeline.sort_files(self.paths, 1, io_jobs,
+                                           opener=DelayedFile))
+        elapsed = timeit.default_timer() - start
+        self.assertEqual(set(status for _, status, _ in results),
+                         set([pipeline.SORTED]))
+        return elapsed
+
+    @benchmark
+    def test_overlapped_io(self):
+        """ Overlapping the reads and writes raises the throughput """
+        timings = [self._run(io_jobs) for io_jobs in self.io_jobs]
+        for io_jobs, elapsed in zip(self.io_jobs, timings):
+            print("\npipeline: {} files with {:>2} I/O threads in "
+                  "{:.3f} s".format(self.file_count, io_jobs, elapsed),
+                  end='')
+        self.assertLess(timings[1], timings[0] / 3)
+
+
+class DataFile(unittest.TestCase):
+    """
+    Fold points of a generated file that is mostly lookup tables, read
+    through a memory map that skips the tables, against tokenizing the
+    whole file from a str
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    @benchmark
+    def test_skipped_tables(self):
+        """ Skipping the tables gives the same folds, faster """
+        code = generate_data_module(3, DATA_LINES[0])
+        filepath = os.path.join(self.temp_dir, 'tables.py')
+        with open(filepath, 'wb') as openfile:
+            openfile.write(code)
+        t_mapped = best_time(ffp.find_fold_points, filepath)
+        t_tokens = best_time(ffp.find_fold_points, code)
+        print("\nfold points: {} MB in {:.3f} s mapped, {:.3f} s "
+              "tokenized".format(len(code) >> 20, t_mapped, t_tokens),
+              end='')
+        self.assertEqual(ffp.find_fold_points(filepath),
+                         ffp.find_fold_points(code))
+        self.assertLess(t_mapped * 2, t_tokens)
+
+
+class FileCompare(unittest.TestCase):
+    """ Benchmark binary_file_compare against the line-by-line version """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_pair(self, size):
+        """ Writes two identical files of size bytes of source code """
+        code = generate_module(1000)
+        data = code * (size // len(code) + 1)
+        paths = [os.path.join(self.temp_dir, name) for name in ('a', 'b')]
+        for path in paths:
+            with open(path, 'wb') as openfile:
+                openfile.write(data[:size])
+        return paths
+
+    @benchmark
+    def test_compare_speed(self):
+        """ Chunked comparison is faster than comparing line by line """
+        for size in COMPARE_SIZES:
+            paths = self._write_pair(size)
+            t_lines = best_time(line_file_compare, *paths)
+            t_chunks = best_time(codesort.binary_file_compare, *paths)
+            t_hash = best_time(codesort.binary_file_compare, paths[0],
+                               paths[1], True)
+            print("\nbinary_file_compare: {:>5} MB lines {:.4f} s, "
+                  "chunks {:.4f} s, hash {:.4f} s".format(size >> 20,
+                                                          t_lines,
+                                                          t_chunks,
+                                                          t_hash),
+                  end='')
+        self.assertLess(t_chunks, t_lines)
+
+
+class MemoryUse(unittest.TestCase):
+    """
+    Memory held by parsed code, against the nesting depth. Blocks share
+    the source buffer of the file, so nesting adds no copies of the
+    source text, and each block costs the same at any depth. That cost
+    is one object per block, though, which is many times the source for
+    short statements.
+    """
+    depths = (1, 4, 16)
+    line_count = 20000
+
+    @benchmark
+    def test_nesting_depth(self):
+        """ Deeper nesting does not copy the source text again """
+        for depth in self.depths:
+            code = generate_nested_module(self.line_count, depth)
+            source, code_blocks = codesort.parse_code(code)
+            block_count = sum(1 for code_block in code_blocks
+                              for _ in code_block.block.walk())
+            buffer_size = retained_size(source)
+            block_size = (retained_size(source, code_blocks) -
+                          buffer_size) / block_count
+            print("\nparse_code: depth {:>2} holds {:.2f} x the source in "
+                  "the buffer, {:.0f} bytes per block".format(
+                      depth, buffer_size / len(code), block_size),
+                  end='')
+            self.assertLess(buffer_size, len(code) * MAX_BUFFER_RATIO)
+            self.assertLess(block_size, MAX_BLOCK_BYTES)
+
+
+class IncrementalEdit(unittest.TestCase):
+    """
+    Latency of a keystroke in a 50k line module, as an editor would send
+    it to CodeSort.edit, against parsing the whole module again.
+    """
+    line_count = 50000
+    keystrokes = 25
+
+    @benchmark
+    def test_keystroke_latency(self):
+        """ An edit only costs a small part of a full parse """
+        code_sort = codesort.CodeSort("unused.py")
+        t_parse = best_time(code_sort.parse, generate_module(self.line_count))
+        source = code_sort.source
+        rows = [row for row in range(len(source))
+                if source.text(row, row + 1).strip().startswith('return')]
+        rows = random.Random(0).sample(rows, self.keystrokes)
+
+        def type_character():
+            """ Types a character at the end of a line, then deletes it """
+            for row in rows:
+                line = source.text(row, row + 1)
+                code_sort.edit(row, row + 1, line[:-1] + '1\n')
+                code_sort.edit(row, row + 1, line)
+
+        def press_enter():
+            """ Adds a line, which shifts the rest of the file, and
+            removes it again """
+            for row in rows:
+                code_sort.edit(row, row, '\n')
+                code_sort.edit(row, row + 1, '')
+
+        timings = [best_time(type_character) / (2 * len(rows)),
+                   best_time(press_enter) / (2 * len(rows))]
+        print("\nCodeSort.edit: {} lines parsed in {:.3f} s, a character "
+              "in {:.2f} ms, a line in {:.2f} ms".format(
+                  len(source), t_parse, timings[0] * 1000,
+                  timings[1] * 1000),
+              end='')
+        for elapsed in timings:
+            self.assertLess(elapsed * EDIT_SPEEDUP, t_parse)
+        _, code_blocks = codesort.parse_code(source.data)
+        self.assertEqual([code_block.block.end
+                          for code_block in code_sort.code_blocks],
+                         [code_block.block.end for code_block in code_blocks])
+
+
+class MemberOrdering(unittest.TestCase):
+    """
+    Sorting the members of classes with thousands of methods, with the
+    precomputed keys of sort_schema against a comparison function.
+    """
+    def setUp(self):
+        sort_schema.configure(None, ['setUp', 'tearDown'])
+
+    def tearDown(self):
+        sort_schema.configure()
+
+    @benchmark
+    def test_member_keys(self):
+        """ Precomputed keys sort faster, and in the same order """
+        names = sort_schema.DUNDER_ORDER + ['setUp', 'tearDown', '__eq__']
+        for count in MEMBER_COUNTS:
+            members = names + ['{}method_{}'.format('_' * (number % 3 == 0),
+                                                    number)
+                               for number in range(count - len(names))]
+            random.Random(count).shuffle(members)
+            t_keys = best_time(sorted, members, None, sort_schema.member_key)
+            t_cmp = best_time(sorted, members, naive_member_cmp)
+            print("\nmember order: {:>5} methods, keys in {:.4f} s, cmp in "
+                  "{:.4f} s".format(count, t_keys, t_cmp),
+                  end='')
+            self.assertEqual(sorted(members, key=sort_schema.member_key),
+                             sorted(members, cmp=naive_member_cmp))
+            self.assertLess(t_keys, t_cmp)
+
+
+class ShardedSort(unittest.TestCase):
+    """
+    Sorting a single file of many classes across a worker process per
+    CPU, against sorting it in this process
+    """
+    @benchmark
+    def test_shards(self):
+        """ Sharding gives the same spans, faster with several CPUs """
+        source = SourceBuffer(generate_module(SHARDED_LINES))
+        jobs = multiprocessing.cpu_count()
+
+        def sort_whole():
+            """ Sorts the file in this process """
+            _, code_blocks = codesort.parse_code(source)
+            return codesort.sorted_spans(code_blocks, source)
+
+        t_whole = best_time(sort_whole)
+        t_shards = best_time(sharding.sort_source, source, max(jobs, 2))
+        print("\nsharded sort: {} lines in {:.3f} s with {} jobs, {:.3f} s "
+              "in one process".format(len(source), t_shards, jobs, t_whole),
+              end='')
+        self.assertEqual(sharding.sort_source(source, max(jobs, 2))[1],
+                         sort_whole())
+        if jobs > 2:
+            self.assertLess(t_shards, t_whole)
+
+
+class BlockClassification(unittest.TestCase):
+    """
+    Classifying 100k blocks with classify_blocks against calling
+    classify_block, which tries the patterns of BLOCK_TYPE one at a time,
+    on each of them
+    """
+    @benchmark
+    def test_batch(self):
+        """ The batch gives the same types, faster """
+        choose = random.Random(0).choice
+        blocks = [choose(BLOCK_STARTS) for _ in range(CLASSIFY_BLOCKS)]
+
+        def classify_each():
+            """ Classifies the blocks one at a time """
+            return [codesort.classify_block(block) for block in blocks]
+
+        t_batch = best_time(codesort.classify_blocks, blocks)
+        t_each = best_time(classify_each)
+        print("\nclassify: {} blocks in {:.4f} s, {:.4f} s one at a "
+              "time".format(CLASSIFY_BLOCKS, t_batch, t_each),
+              end='')
+        self.assertEqual(codesort.classify_blocks(blocks), classify_each())
+        self.assertLess(t_batch, t_each)
+
+
+class ImportGrouping(unittest.TestCase):
+    """
+    Classifying the imports of many files with the classifier of the run
+    against a classifier per file, which looks every name up again.
+    """
+    @benchmark
+    def test_memoized_lookups(self):
+        """ A shared classifier only looks each name up once """
+        directory = os.path.dirname(codesort.__file__)
+
+        def classify(shared):
+            """ Groups the imports of every file """
+            classifier = import_groups.ImportClassifier()
+            for _ in range(IMPORT_FILES):
+                if not shared:
+                    classifier = import_groups.ImportClassifier()
+                for name in IMPORTS:
+                    classifier.group(name, directory)
+
+        t_shared = best_time(classify, True)
+        t_per_file = best_time(classify, False)
+        print("\nimport groups: {} files in {:.4f} s, {:.4f} s with a "
+              "classifier per file".format(IMPORT_FILES, t_shared,
+                                           t_per_file),
+              end='')
+        self.assertLess(t_shared * 10, t_per_file)
+
+
+class TreeBackend(unittest.TestCase):
+    """
+    parse_code with the ast backend against the tokenize backend, on
+    10k and 100k line modules
+    """
+    def tearDown(self):
+        block_tree.set_backend('tokenize')
+
+    @benchmark
+    def test_backends(self):
+        """ Both backends find the same blocks, the ast one faster """
+        def block_rows(code_blocks):
+            """ Rows of every block of a file """
+            return [(block.start, block.head, block.end)
+                    for code_block in code_blocks
+                    for block in code_block.block.walk()]
+
+        for size in BACKEND_SIZES:
+            code = generate_module(size)
+            timings = {}
+            rows = {}
+            for backend in block_tree.BACKENDS:
+                block_tree.set_backend(backend)
+                timings[backend] = best_time(codesort.parse_code, code)
+                rows[backend] = block_rows(codesort.parse_code(code)[1])
+            print("\nparse_code: {:>7} lines in {:.4f} s with tokenize, "
+                  "{:.4f} s with ast".format(size, timings['tokenize'],
+                                             timings['ast']),
+                  end='')
+            self.assertEqual(rows['ast'], rows['tokenize'])
+        self.assertLess(timings['ast'], timings['tokenize'])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_block_moves.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 17:40:19 2026
+@modified:      Sun Oct 18 17:40:19 2026
+@descr:         Unit Testing for codesort.block_moves module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import codesort.codesort as codesort
+import codesort.block_moves as block_moves
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+UNSORTED_PATH = os.path.join(DATA_PATH, "unsorted_2.py")
+SORTED_PATH = os.path.join(DATA_PATH, "sorted_2.py")
+
+
+def sorted_source(code):
+    """ Returns the SourceBuffer of code and the spans of its sorting """
+    source, code_blocks = codesort.parse_code(code)
+    return source, codesort.sorted_spans(code_blocks, source)
+
+
+class HeaviestIncreasingRun(unittest.TestCase):
+    """ Test the heaviest_increasing_run function """
+    def test_known_values(self):
+        """ Without weights, the run is as long as it can be """
+        for values, length in (([], 0),
+                               ([3], 1),
+                               ([5, 1, 2, 3, 4, 0], 4),
+                               ([0, 8, 4, 12, 2, 10, 6, 14, 1, 9], 4),
+                               ):
+            run = sorted(block_moves.heaviest_increasing_run(values))
+            self.assertEqual(len(run), length)
+            picked = [values[index] for index in run]
+            self.assertEqual(picked, sorted(picked))
+
+    def test_weights(self):
+        """ A heavy value beats a longer run of light ones """
+        values = [0, 4, 1, 2, 3]
+        weights = [1, 10, 1, 1, 1]
+        run = block_moves.heaviest_increasing_run(values, weights)
+        self.assertEqual(run, set([0, 1]))
+
+
+class BlockMoves(unittest.TestCase):
+    """ Test the block_moves and apply_moves functions """
+    def test_one_misplaced_function(self):
+        """ A single misplaced function is a single move """
+        functions = ["def f{:03}():\n    pass\n".format(x) for x in range(50)]
+        functions.insert(10, functions.pop(40))
+        source, spans = sorted_source('\n\n'.join(functions))
+        moves = block_moves.block_moves(source, spans)
+        self.assertEqual(len(moves), 1)
+        start, stop, anchor = moves[0]
+        self.assertEqual(source.text(start, stop).split()[1], 'f040():')
+
+    def test_apply_moves(self):
+        """ Applying the moves gives the sorted code """
+        with open(UNSORTED_PATH, 'rb') as openfile:
+            code = openfile.read()
+        with open(SORTED_PATH, 'rb') as openfile:
+            expected = openfile.read()
+        source, spans = sorted_source(code)
+        moves = block_moves.block_moves(source, spans)
+        spans = block_moves.apply_moves(source, moves)
+        self.assertEqual(source.join(spans), expected)
+
+    def test_sorted(self):
+        """ Sorted code needs no moves and has no diff """
+        with open(SORTED_PATH, 'rb') as openfile:
+            code = openfile.read()
+        source, spans = sorted_source(code)
+        self.assertEqual(block_moves.block_moves(source, spans), [])
+        self.assertEqual(list(block_moves.unified_diff(source, spans)), [])
+
+    def test_format_moves(self):
+        """ Moves are shown with rows counted from 1 """
+        lines = list(block_moves.format_moves([(0, 1, 5), (6, 9, 2)]))
+        self.assertEqual(lines, ["move 1 before 6\n", "move 7-9 before 3\n"])
+
+
+class UnifiedDiff(unittest.TestCase):
+    """ Test the unified_diff function """
+    def test_known_values(self):
+        """ A swap of two functions, with one line of context """
+        code = "def b():\n    pass\n\n\ndef a():\n    pass\n"
+        source, spans = sorted_source(code)
+        diff = block_moves.unified_diff(source, spans, 'old', 'new', 1)
+        expected = ["--- old\n",
+                    "+++ new\n",
+                    "@@ -1,6 +1,6 @@\n",
+                    "+def a():\n",
+                    "+    pass\n",
+                    "+\n",
+                    "+\n",
+                    " def b():\n",
+                    "     pass\n",
+                    "-\n",
+                    "-\n",
+                    "-def a():\n",
+                    "-    pass\n",
+                    ]
+        self.assertEqual(list(diff), expected)
+
+    def test_missing_newline(self):
+        """ The last lines are marked when they lack a line ending """
+        code = "def b():\r\n    pass\r\n\r\n\r\ndef a():\r\n    pass"
+        source, spans = sorted_source(code)
+        diff = list(block_moves.unified_diff(source, spans))
+        self.assertEqual(diff.count(block_moves.NO_EOL), 2)
+        self.assertEqual(diff[diff.index("+    pass\n") + 1],
+                         block_moves.NO_EOL)
+        self.assertIn("+    pass\r\n", diff)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
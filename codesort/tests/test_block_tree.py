@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_block_tree.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 09:40:02 2026
+@modified:      Sun Oct 18 09:40:02 2026
+@descr:         Unit Testing for codesort.block_tree module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import tokenize
+from StringIO import StringIO
+import codesort.block_tree as block_tree
+import codesort.find_fold_points as ffp
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+
+
+class BuildBlockTree(unittest.TestCase):
+    """ Test the build_block_tree function """
+    code = """# lead
+@dec1
+@dec2(a,
+      b)
+def func(x):
+    if x:
+        pass
+    else:
+        y = 1
+        # trailing in body
+# next comment
+try:
+    import foo
+except ImportError:
+    foo = None
+CONST = 5
+"""
+
+    def test_top_level(self):
+        """ Check the kind, name and rows of the top-level blocks """
+        tree = block_tree.build_block_tree(self.code)
+        result = [(b.kind, b.name, b.start, b.head, b.end)
+                  for b in tree.children]
+        expected = [('function', 'func', 1, 5, 10),
+                    ('other', '', 11, 12, 15),
+                    ('constant', 'CONST', 16, 16, 16),
+                    ]
+        self.assertEqual(result, expected)
+
+    def test_decorators(self):
+        """ Decorators are kept with the function they decorate """
+        func = block_tree.build_block_tree(self.code).children[0]
+        self.assertEqual(func.decorator_count, 2)
+        self.assertEqual(func.decorators, (2, 4))
+
+    def test_compound_clauses(self):
+        """ else and except clauses stay with their statement """
+        tree = block_tree.build_block_tree(self.code)
+        if_block = tree.children[0].children[0]
+        self.assertEqual((if_block.head, if_block.end), (6, 10))
+        self.assertEqual(len(if_block.children), 2)
+        self.assertEqual([b.indent for b in if_block.children], [2, 2])
+
+    def test_matches_fold_points(self):
+        """ Every fold point ends where a block of the tree ends """
+        for name in ("sorted_1.py", "2_multiline_defs.py", "3_comments.py"):
+            with open(os.path.join(DATA_PATH, name)) as openfile:
+                text = openfile.read()
+            tree = block_tree.build_block_tree(text)
+            ends = set((b.end, b.indent + 1) for b in tree.walk()
+                       if b.children and b.parent is not None)
+            folds = set((end, indent)
+                        for _, end, indent in ffp.find_fold_points(text))
+            self.assertSetEqual(folds, ends)
+
+    def test_iter_top_level(self):
+        """ Top-level blocks are complete when they are yielded """
+        tree = block_tree.build_block_tree(self.code)
+        tokens = tokenize.generate_tokens(StringIO(self.code).readline)
+        result = [(b.kind, b.start, b.end)
+                  for b in block_tree.iter_top_level(tokens)]
+        self.assertEqual(result,
+                         [(b.kind, b.start, b.end) for b in tree.children])
+
+    def test_iter_top_level_stops(self):
+        """ Blocks are yielded before the rest of the code is read """
+        code = "a = 1\nb = 2\nc = (\n"
+        tokens = tokenize.generate_tokens(StringIO(code).readline)
+        blocks = block_tree.iter_top_level(tokens)
+        self.assertEqual(next(blocks).name, 'a')
+        self.assertEqual(next(blocks).name, 'b')
+        self.assertRaises(tokenize.TokenError, next, blocks)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_cache.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 13:34:52 2026
+@modified:      Sun Oct 18 13:34:52 2026
+@descr:         Unit Testing for codesort.cache module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import codesort.codesort as codesort
+import codesort.import_groups as import_groups
+import codesort.parallel as parallel
+from codesort.cache import ResultCache, StatIndex
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+UNSORTED_PATH = os.path.join(DATA_PATH, "unsorted_2.py")
+
+
+class ResultCacheTest(unittest.TestCase):
+    """ Test the ResultCache class """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.temp_dir, 'cache.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_lru_eviction(self):
+        """ The least recently used entry is evicted first """
+        cache = ResultCache(max_entries=2)
+        cache.put('a', True)
+        cache.put('b', True)
+        cache.get('a')
+        cache.put('c', False)
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+
+    def test_save_load(self):
+        """ Entries survive a save and load, in LRU order """
+        cache = ResultCache(self.cache_path, 'sig')
+        cache.put(cache.key('x = 1\n'), True)
+        cache.put(cache.key('y = 1\n'), False)
+        cache.save()
+        loaded = ResultCache(self.cache_path, 'sig')
+        self.assertEqual(list(loaded.entries), list(cache.entries))
+        self.assertIs(loaded.get(loaded.key('x = 1\n')), True)
+        self.assertIs(loaded.get(loaded.key('y = 1\n')), False)
+
+    def test_signature(self):
+        """ Keys depend on the sorting settings """
+        self.assertNotEqual(ResultCache(signature='a').key('x'),
+                            ResultCache(signature='b').key('x'))
+
+    def test_bad_file(self):
+        """ An unreadable cache file is ignored """
+        with open(self.cache_path, 'w') as openfile:
+            openfile.write('{not json')
+        self.assertEqual(len(ResultCache(self.cache_path)), 0)
+
+    def test_concurrent_saves(self):
+        """ Runs that save the same cache at once do not get in the way """
+        errors = []
+
+        def save(number):
+            """ Saves a cache of its own many times """
+            cache = ResultCache(self.cache_path, 'sig')
+            cache.put(cache.key(str(number)), True)
+            try:
+                for _ in range(50):
+                    self.assertTrue(cache.save())
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=save, args=(number, ))
+                   for number in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.temp_dir), ['cache.json'])
+        self.assertTrue(ResultCache(self.cache_path, 'sig').entries)
+
+    def test_save_failure(self):
+        """ A cache that cannot be written is not saved, without raising """
+        path = os.path.join(self.temp_dir, 'missing', 'cache.json')
+        cache = ResultCache(path)
+        cache.put('a', True)
+        self.assertFalse(cache.save())
+        self.assertFalse(StatIndex(path).save())
+
+
+class StatIndexTest(unittest.TestCase):
+    """ Test the StatIndex class """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.temp_dir, 'index.json')
+        self.path = os.path.join(self.temp_dir, 'file.py')
+        self._write("x = 1\n", 1000000000.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, text, mtime):
+        """ Rewrites the test file in place and sets its mtime """
+        with open(self.path, 'w') as openfile:
+            openfile.write(text)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_unchanged_stat(self):
+        """ The verdict holds while the stat is unchanged """
+        index = StatIndex()
+        self.assertIsNone(index.lookup(self.path))
+        index.put(self.path, True)
+        # Same size and mtime: the new content is not looked at.
+        self._write("y = 1\n", 1000000000.0)
+        self.assertTrue(index.lookup(self.path))
+
+    def test_changed_stat(self):
+        """ A change of mtime or size drops the verdict """
+        index = StatIndex()
+        index.put(self.path, True)
+        self._write("x = 1\n", 1000000001.0)
+        self.assertIsNone(index.lookup(self.path))
+        index.put(self.path, False)
+        self.assertFalse(index.lookup(self.path))
+        self._write("x = 10\n", 1000000001.0)
+        self.assertIsNone(index.lookup(self.path))
+
+    def test_save_load(self):
+        """ Verdicts survive a save and load """
+        index = StatIndex(self.index_path)
+        index.put(self.path, True)
+        index.save()
+        self.assertTrue(StatIndex(self.index_path).lookup(self.path))
+
+    def test_signature(self):
+        """ Verdicts saved with other sorting settings are dropped """
+        index = StatIndex(self.index_path, 'sig')
+        index.put(self.path, True)
+        index.save()
+        self.assertTrue(StatIndex(self.index_path, 'sig').lookup(self.path))
+        loaded = StatIndex(self.index_path, 'other')
+        self.assertEqual(len(loaded), 0)
+        self.assertIsNone(loaded.lookup(self.path))
+
+    def test_racy_entry(self):
+        """ Files modified after the index was saved are not trusted """
+        index = StatIndex(self.index_path)
+        index.save()
+        future = os.stat(self.index_path).st_mtime + 10
+        self._write("x = 1\n", future)
+        index.put(self.path, True)
+        index.save()
+        os.utime(self.index_path, (future, future))
+        self.assertIsNone(StatIndex(self.index_path).lookup(self.path))
+
+
+class CachedSort(unittest.TestCase):
+    """ Test that cached files are not sorted again """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = [os.path.join(self.temp_dir, '{}.py'.format(x))
+                      for x in range(4)]
+        for path in self.paths:
+            shutil.copy(UNSORTED_PATH, path)
+        self.parse_code = codesort.parse_code
+
+    def tearDown(self):
+        codesort.parse_code = self.parse_code
+        shutil.rmtree(self.temp_dir)
+
+    def _forbid_parsing(self):
+        """ Makes any further tokenizing fail the test """
+        def parse_code(code):
+            self.fail("cached file was parsed again")
+        codesort.parse_code = parse_code
+
+    def test_codesort(self):
+        """ CodeSort skips files that the cache knows to be sorted """
+        cache = ResultCache(signature=codesort.schema_signature())
+        code_sort = codesort.CodeSort(self.paths[0], cache=cache)
+        code_sort.sort()
+        self.assertTrue(code_sort.changed)
+        self.assertEqual(len(cache), 2)
+
+        self._forbid_parsing()
+        code_sort.sort()
+        self.assertFalse(code_sort.changed)
+
+    def test_codesort_index(self):
+        """ CodeSort does not read files that the index knows are sorted """
+        index = StatIndex()
+        code_sort = codesort.CodeSort(self.paths[0], index=index)
+        code_sort.sort()
+        self.assertTrue(code_sort.changed)
+
+        # Make the file unsorted again without changing its stat. The mtime
+        # is first set to a value that utime can restore exactly.
+        os.utime(self.paths[0], (1000000000.0, 1000000000.0))
+        index.put(self.paths[0], True)
+        shutil.copyfile(UNSORTED_PATH, self.paths[0])
+        os.utime(self.paths[0], (1000000000.0, 1000000000.0))
+        self._forbid_parsing()
+        code_sort.sort()
+        self.assertFalse(code_sort.changed)
+
+    def test_sort_files(self):
+        """ Worker results are recorded in the cache of the parent """
+        cache = ResultCache(signature=codesort.schema_signature())
+        results = list(parallel.sort_files(self.paths, 2, cache=cache))
+        self.assertEqual(set(status for _, status, _ in results),
+                         set([parallel.SORTED]))
+
+        self._forbid_parsing()
+        results = list(parallel.sort_files(self.paths, 2, cache=cache))
+        self.assertEqual(set(status for _, status, _ in results),
+                         set([parallel.UNCHANGED]))
+
+    def test_sort_files_index(self):
+        """ Worker results are recorded in the index of the parent """
+        index = StatIndex()
+        list(parallel.sort_files(self.paths, 2, index=index))
+        self.assertEqual(len(index), len(self.paths))
+        for path in self.paths:
+            self.assertTrue(index.lookup(path))
+
+    def test_import_context(self):
+        """ The same code in two directories is cached apart """
+        code = "import zzlocalmod\nimport requests_zz\n"
+        paths = []
+        for name in ('a', 'b'):
+            os.mkdir(os.path.join(self.temp_dir, name))
+            paths.append(os.path.join(self.temp_dir, name, 'm.py'))
+            with open(paths[-1], 'w') as openfile:
+                openfile.write(code)
+        open(os.path.join(self.temp_dir, 'a', 'zzlocalmod.py'), 'w').close()
+        cache = ResultCache(signature=codesort.schema_signature())
+        index = StatIndex()
+        self.assertTrue(codesort.CodeSort(paths[1], cache=cache,
+                                          index=index).check())
+        self.assertFalse(codesort.CodeSort(paths[0], cache=cache,
+                                           index=index).check())
+
+        # A local module added later drops the verdicts of its directory.
+        open(os.path.join(self.temp_dir, 'b', 'zzlocalmod.py'), 'w').close()
+        import_groups.reset()
+        self.assertIsNone(index.lookup(paths[1]))
+        self.assertFalse(codesort.CodeSort(paths[1], cache=cache,
+                                           index=index).check())
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
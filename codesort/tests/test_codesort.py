@@ -13,6 +13,10 @@ Created on Wed Jun 18 16:26:08 2014
 from __future__ import print_function, division
 import unittest
 import os
+import shutil
+import sys
+import tempfile
+import tokenize
 import codesort.codesort as codesort
 import codesort.find_fold_points as ffp
 
@@ -30,31 +34,305 @@ UNSORTED_TEST_PATHS = [os.path.join(DATA_PATH, x) for x in UNSORTED_TEST_FILES]
 class CodeSort(unittest.TestCase):
     """ Unit Testing """
     def setUp(self):
-#        self.path = r"X:\WinPython27\projects\Codesort\tests\test_data"
-        self.path = os.path.split(__file__)[0]
-        self.test_dir = r"tests\test_data"
-        self.filenames = (("unsorted_1.py", "sorted_1.py"),
+        self.filenames = (("unsorted_2.py", "sorted_2.py"),
                           )
         self.known_values = []
         for test_file, ref_file in self.filenames:
-            self.known_values.append((os.path.join(self.path,
-                                                   self.test_dir,
-                                                   test_file),
-                                      os.path.join(self.path,
-                                                   self.test_dir,
-                                                   ref_file)))
+            self.known_values.append((os.path.join(DATA_PATH, test_file),
+                                      os.path.join(DATA_PATH, ref_file)))
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
 
     def test_known_values(self):
         """
         KVT for CodeSort: verify that the sorted test file matches
         with the reference file.
         """
+        for test_file, ref_file in self.known_values:
+            temp_file = os.path.join(self.temp_dir, "test_file.py")
+            shutil.copy(test_file, temp_file)
+            result = codesort.CodeSort(temp_file, True).sort()
+            self.assertNotEqual(result, temp_file)
+            self.assertTrue(codesort.binary_file_compare(result, ref_file))
 
+    def test_overwrite(self):
+        """ Without new_file, the original file is rewritten in place """
         for test_file, ref_file in self.known_values:
-#            result = codesort(test_file, True)
-#            self.assertTrue(codesort.binary_file_compare(result, ref_file))
-#            print(self.known_values)
-            continue
+            temp_file = os.path.join(self.temp_dir, "test_file.py")
+            shutil.copy(test_file, temp_file)
+            inode = os.stat(temp_file).st_ino
+            result = codesort.CodeSort(temp_file).sort()
+            self.assertEqual(result, temp_file)
+            self.assertEqual(os.stat(temp_file).st_ino, inode)
+            self.assertTrue(codesort.binary_file_compare(result, ref_file))
+
+    def test_idempotent(self):
+        """ Sorting sorted code changes nothing """
+        for _, ref_file in self.known_values:
+            with open(ref_file) as openfile:
+                code = openfile.read()
+            self.assertEqual(codesort.sort_code(code), code)
+
+    def test_missing_newline(self):
+        """ Code without a final newline is sorted without adding one """
+        code = "def b():\n    pass\n\n\ndef a():\n    pass"
+        expected = "def a():\n    pass\n\n\ndef b():\n    pass"
+        self.assertEqual(codesort.sort_code(code), expected)
+
+    def test_crlf(self):
+        """ Windows line endings come out as they went in """
+        code = "def b():\r\n    pass\r\n\r\n\r\ndef a():\r\n    pass"
+        expected = "def a():\r\n    pass\r\n\r\n\r\ndef b():\r\n    pass"
+        self.assertEqual(codesort.sort_code(code), expected)
+
+
+class CheckCode(unittest.TestCase):
+    """ Unit testing for the check_code function and CodeSort.check """
+    def test_known_values(self):
+        """ Only the sorted reference file passes the check """
+        for name, expected in (("sorted_2.py", True),
+                               ("unsorted_2.py", False)):
+            with open(os.path.join(DATA_PATH, name), 'rb') as openfile:
+                code = openfile.read()
+            self.assertEqual(codesort.check_code(code), expected)
+            self.assertEqual(codesort.sort_code(code) == code, expected)
+
+    def test_class_body(self):
+        """ Methods out of order make the whole file unsorted """
+        code = ("class A(object):\n"
+                "    def b(self):\n"
+                "        pass\n"
+                "\n"
+                "    def a(self):\n"
+                "        pass\n")
+        self.assertFalse(codesort.check_code(code))
+
+    def test_early_exit(self):
+        """ The check stops at the first blocks that are out of order """
+        code = "def b():\n    pass\n\n\ndef a():\n    pass\n\n\nx = (\n"
+        self.assertFalse(codesort.check_code(code))
+        self.assertRaises(tokenize.TokenError, codesort.sort_code, code)
+
+    def test_file_unchanged(self):
+        """ Checking a file never writes to it """
+        temp_dir = tempfile.mkdtemp()
+        try:
+            temp_file = os.path.join(temp_dir, "test_file.py")
+            shutil.copy(os.path.join(DATA_PATH, "unsorted_2.py"), temp_file)
+            code_sort = codesort.CodeSort(temp_file)
+            self.assertFalse(code_sort.check())
+            self.assertFalse(code_sort.changed)
+            self.assertTrue(codesort.binary_file_compare(
+                temp_file, os.path.join(DATA_PATH, "unsorted_2.py")))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class Segments(unittest.TestCase):
+    """ Code that follows a definition keeps its place after it """
+    def assert_sorted(self, code, expected):
+        """ code sorts to expected, which still runs """
+        result = codesort.sort_code(code)
+        self.assertEqual(result, expected)
+        self.assertTrue(codesort.check_code(result))
+        exec(compile(result, '<sorted>', 'exec'), {'__name__': 'sorted'})
+
+    def test_property(self):
+        """ A property stays after the methods that it wraps """
+        code = ("class T(object):\n"
+                "    def b(self):\n"
+                "        pass\n"
+                "\n"
+                "    def _set_celsius(self, value):\n"
+                "        self._celsius = value\n"
+                "\n"
+                "    def _get_celsius(self):\n"
+                "        return self._celsius\n"
+                "\n"
+                "    celsius = property(_get_celsius, _set_celsius)\n"
+                "\n"
+                "    def a(self):\n"
+                "        pass\n")
+        expected = ("class T(object):\n"
+                    "    def _get_celsius(self):\n"
+                    "        return self._celsius\n"
+                    "\n"
+                    "    def _set_celsius(self, value):\n"
+                    "        self._celsius = value\n"
+                    "\n"
+                    "    def b(self):\n"
+                    "        pass\n"
+                    "\n"
+                    "    celsius = property(_get_celsius, _set_celsius)\n"
+                    "\n"
+                    "    def a(self):\n"
+                    "        pass\n")
+        self.assert_sorted(code, expected)
+
+    def test_alias(self):
+        """ An alias of a method stays after it """
+        code = ("class T(object):\n"
+                "    def __str__(self):\n"
+                "        return 'T'\n"
+                "\n"
+                "    __repr__ = __str__\n"
+                "\n"
+                "    def __init__(self):\n"
+                "        pass\n")
+        self.assert_sorted(code, code)
+
+    def test_module_code(self):
+        """ Module code stays between the definitions around it """
+        code = ("def helper():\n"
+                "    return 1\n"
+                "\n"
+                "\n"
+                "DEFAULT = helper()\n"
+                "\n"
+                "\n"
+                "def b():\n"
+                "    pass\n"
+                "\n"
+                "\n"
+                "if __name__ == '__main__':\n"
+                "    pass\n"
+                "\n"
+                "\n"
+                "class Config(object):\n"
+                "    value = DEFAULT\n")
+        expected = ("def helper():\n"
+                    "    return 1\n"
+                    "\n"
+                    "\n"
+                    "DEFAULT = helper()\n"
+                    "\n"
+                    "\n"
+                    "class Config(object):\n"
+                    "    value = DEFAULT\n"
+                    "\n"
+                    "\n"
+                    "def b():\n"
+                    "    pass\n"
+                    "\n"
+                    "\n"
+                    "if __name__ == '__main__':\n"
+                    "    pass\n")
+        self.assert_sorted(code, expected)
+
+
+class Edit(unittest.TestCase):
+    """ Unit testing for CodeSort.edit """
+    # (start, stop, text) edits, each applied to the result of the last
+    edits = ((0, 0, "import os\n\n\n"),
+             (6, 6, "\n\ndef c():\n    pass\n"),
+             (4, 5, "    return 2\n"),
+             (11, 11, "        # indented into the function above\n"),
+             (2, 3, "class Z(object):\n    x = (1,\n         2)\n"),
+             (0, 1, ""),
+             )
+
+    def block_rows(self, code_blocks):
+        """ (start, end, sort_key) of every block and its children """
+        return [(code_block.block.start,
+                 code_block.block.end,
+                 code_block.sort_key,
+                 self.block_rows(code_block.children),
+                 ) for code_block in code_blocks]
+
+    def test_known_values(self):
+        """ Each edit gives the same blocks as parsing the code again """
+        code_sort = codesort.CodeSort("unused.py")
+        code_sort.parse("def b():\n    return 1\n\n\ndef a():\n    pass\n")
+        for start, stop, text in self.edits:
+            source = code_sort.edit(start, stop, text)
+            expected_source, expected = codesort.parse_code(source.data)
+            self.assertEqual(self.block_rows(code_sort.code_blocks),
+                             self.block_rows(expected))
+            self.assertEqual(
+                codesort.sorted_spans(code_sort.code_blocks, source),
+                codesort.sorted_spans(expected, expected_source))
+
+    def test_resynchronize(self):
+        """ The blocks after an edit are kept, not tokenized again """
+        code = "".join("def f{}():\n    pass\n".format(x) for x in range(9))
+        code_sort = codesort.CodeSort("unused.py")
+        code_sort.parse(code)
+        old_blocks = list(code_sort.code_blocks)
+        code_sort.edit(4, 5, "def g():\n    return 1\n")
+        self.assertEqual(code_sort.code_blocks[2].name, 'g')
+        self.assertIs(code_sort.code_blocks[-1], old_blocks[-1])
+        self.assertEqual(code_sort.code_blocks[-1].block.start, 18)
+
+    def test_segments(self):
+        """ Module code added or removed renumbers the segments after it """
+        code = "".join("def f{}():\n    pass\n".format(x) for x in range(4))
+        code_sort = codesort.CodeSort("unused.py")
+        code_sort.parse(code + "X = 1\n" + code.replace('f', 'g'))
+        edits = ((2, 2, "Y = 2\n"),
+                 (9, 9, "def h():\n    pass\n"),
+                 (2, 3, ""),
+                 )
+        for start, stop, text in edits:
+            source = code_sort.edit(start, stop, text)
+            _, expected = codesort.parse_code(source.data)
+            self.assertEqual(self.block_rows(code_sort.code_blocks),
+                             self.block_rows(expected))
+
+    def test_last_block(self):
+        """ Edits of code without definitions, or of its last block """
+        code = ("import os\n\n\n"
+                "def a():\n    return 1\n\n\n"
+                "def b():\n    return 2\n")
+        for code, start, stop, text in (
+                ("x = 1\n", 0, 0, "y = 2\n"),
+                ("x = 1\n", 1, 1, "y = 2\n"),
+                (code, 8, 9, "    return 3\n"),
+                (code, 9, 9, "\n\ndef c():\n    pass\n"),
+                (code, 5, 9, ""),
+                ):
+            code_sort = codesort.CodeSort("unused.py")
+            code_sort.parse(code)
+            source = code_sort.edit(start, stop, text)
+            _, expected = codesort.parse_code(source.data)
+            self.assertEqual(self.block_rows(code_sort.code_blocks),
+                             self.block_rows(expected))
+
+    def test_invalid_code(self):
+        """ Code that does not tokenize raises, and is parsed again later """
+        code_sort = codesort.CodeSort("unused.py")
+        code_sort.parse("x = 1\n\n\ndef f():\n    pass\n")
+        self.assertRaises(tokenize.TokenError, code_sort.edit, 0, 0,
+                          "y = (\n")
+        self.assertIsNone(code_sort.code_blocks)
+        code_sort.edit(0, 1, "y = ()\n")
+        self.assertEqual([code_block.name
+                          for code_block in code_sort.code_blocks],
+                         ['y', 'x', 'f'])
+
+    def test_statement_without_tokens(self):
+        """ Tokens that no block can be made of raise a TokenError """
+        code_sort = codesort.CodeSort("unused.py")
+        code_sort.parse("x = 1\n\n\ndef f():\n    pass\n")
+        self.assertRaises(tokenize.TokenError, code_sort.edit, 0, 0,
+                          " @d)class A:\n")
+
+
+class Main(unittest.TestCase):
+    """ Test the command line of main """
+    def setUp(self):
+        self.argv = sys.argv
+
+    def tearDown(self):
+        sys.argv = self.argv
+
+    def test_bad_jobs(self):
+        """ A --jobs or --io-jobs that is not a positive number is refused """
+        for argv in (['--jobs=x'], ['--jobs=0'], ['-j', 'x'],
+                     ['--io-jobs=x']):
+            sys.argv = ['codesort.py', '.'] + argv
+            self.assertEqual(codesort.main(), 2)
 
 
 class CodeBlockKnownValues(unittest.TestCase):
@@ -86,6 +364,22 @@ class CodeBlockKnownValues(unittest.TestCase):
             result_obj = codesort.CodeBlock(chunk)
             self.assertEqual(expected[1], result_obj.code_type)
 
+    def test_decorator_count(self):
+        """ Decorators are counted and kept with their function """
+        chunk = "@decorator1\n@decorator2\ndef my_function(a):\n    pass"
+        result_obj = codesort.CodeBlock(chunk)
+        self.assertEqual(result_obj.decorator_count, 2)
+        self.assertEqual(result_obj.code_type, 'function')
+        self.assertEqual(result_obj.name, 'my_function')
+
+    def test_sort_key(self):
+        """ Methods are keyed by the class body sorting schema """
+        result_obj = codesort.CodeBlock(self.chunk_1)
+        keys = [child.sort_key for child in result_obj.children]
+        self.assertEqual(keys, [(codesort.DUNDER, 0, '__init__', '__init__'),
+                                (codesort.PUBLIC, 'method', 'method'),
+                                ])
+
     def test_kvt_line_count(self):
         """ Known-value testing for the CodeBlock line_count attribute. """
         for chunk, expected in self.known_values:
@@ -146,24 +440,99 @@ class ClassifyBlock(unittest.TestCase):
             self.assertNotEqual(codesort.classify_block(block), 'constant')
 
 
+class ClassifyBlocks(unittest.TestCase):
+    """ Unit testing for the classify_blocks function """
+    def test_known_values(self):
+        """ Every block gets the type that classify_block gives it """
+        blocks = [block for block, _ in ClassifyBlock.examples]
+        blocks.extend(['Constant=[x for x in range(5)]',
+                       '@decorator',
+                       '@first\n@second\n\nclass Late(object):',
+                       '   ',
+                       '',
+                       ])
+        self.assertEqual(codesort.classify_blocks(blocks),
+                         [codesort.classify_block(block)
+                          for block in blocks])
+        self.assertEqual(codesort.classify_blocks(blocks[:9]),
+                         [expected for _, expected in ClassifyBlock.examples])
+        self.assertEqual(codesort.classify_blocks([]), [])
+
+
+class BinaryFileCompare(unittest.TestCase):
+    """ Unit testing for the binary_file_compare function """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, data):
+        """ Writes data to a file in the temp dir and returns its path """
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'wb') as openfile:
+            openfile.write(data)
+        return path
+
+    def test_known_values(self):
+        """ Known-value testing, in chunked and in hash mode """
+        chunk = codesort.COMPARE_CHUNK_SIZE
+        data = b"x" * (2 * chunk + 10)
+        ref = self._write("ref", data)
+        known_values = ((b"", b"", True),
+                        (b"", b"a", False),
+                        (b"abc", b"abd", False),
+                        (data, data, True),
+                        (data, data[:-1] + b"y", False),
+                        (data, b"y" + data[1:], False),
+                        (data, data + b"x", False),
+                        )
+        for first, second, expected in known_values:
+            ref = self._write("ref", first)
+            tmp = self._write("tmp", second)
+            for use_hash in (False, True):
+                self.assertEqual(codesort.binary_file_compare(ref, tmp,
+                                                              use_hash),
+                                 expected)
+
+
 class SplitBlocks(unittest.TestCase):
-    """ doc """
+    """ Unit testing for the split_blocks function """
+    known_kinds = [('docstring', ''),
+                   ('import', '__future__'),
+                   ('function', 'ClassA'),
+                   ('class', 'ClassB'),
+                   ('function', 'module_func_a'),
+                   ('function', 'module_func_b'),
+                   ('function', 'module_func_c'),
+                   ('other', '__main__'),
+                   ('instance_var', 'x'),
+                   ('instance_var', 'y'),
+                   ('other', ''),
+                   ]
+
     def test_known_values(self):
-        """ doc """
+        """ Known-value testing for the split_blocks function """
         for path in SORTED_TEST_PATHS:
             with open(path) as openfile:
                 file_text = "".join(openfile.readlines())
-            try:
-                # TODO: remove dependence on find_fold_points
-                #   (This currently tests two things which is a no-no.)
-#                codesort.split_blocks(file_text,
-#                                      codesort.find_fold_points(file_text))
-                codesort.split_blocks(file_text,
-                                      ffp.find_fold_points(file_text))
-                passed = True
-            except:
-                passed = False
-            self.assertTrue(passed)
+            blocks = codesort.split_blocks(file_text)
+            kinds = [(block.kind, block.name) for block, _ in blocks]
+            self.assertEqual(kinds, self.known_kinds)
+
+    def test_block_text(self):
+        """ Leading comments are part of the block text """
+        code = "x = 1\n\n# set y\ny = 2\n"
+        blocks = codesort.split_blocks(code)
+        self.assertEqual([text for _, text in blocks],
+                         ["x = 1\n", "# set y\ny = 2\n"])
+
+    def test_line_endings(self):
+        """ Block text keeps the line endings of the code """
+        code = "x = 1\r\n\r\n# set y\r\ny = 2"
+        blocks = codesort.split_blocks(code)
+        self.assertEqual([text for _, text in blocks],
+                         ["x = 1\r\n", "# set y\r\ny = 2"])
 
 
 if __name__ == "__main__":
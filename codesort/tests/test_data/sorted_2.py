@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Docstring!
+"""
+
+
+from __future__ import print_function, division
+import os
+
+
+__author__ = "Somebody"
+LIMIT = 5
+
+
+class Apple(object):
+    """ Apple, for sorting! """
+    pass
+
+
+class Zebra(object):
+    """ Zebra, for sorting! """
+    color = "striped"
+
+    def __init__(self):
+        """ Overriding, first """
+        pass
+
+    def __str__(self):
+        """ Overriding, after __init__ """
+        return "Zebra"
+
+    # The private method comes before the public ones
+    def _private_a(self):
+        """ Private """
+        return 1
+
+    @property
+    def public_a(self):
+        """ Decorated """
+        return 2
+
+    def public_b(self):
+        """ Public """
+        return self._private_a()
+
+
+@decorator
+def alpha(b):
+    """ Another module function """
+    return b
+
+
+def beta(a):
+    """ A module function """
+    return a
+
+
+def main():
+    """ Always last of the functions """
+    print(Zebra().public_b())
+
+
+# A comment that starts the orphaned module code
+x = 5
+print(x)
+
+
+if __name__ == "__main__":
+    main()
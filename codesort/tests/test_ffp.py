@@ -13,6 +13,10 @@ Created on Wed Jul 02 17:06:51 2014
 from __future__ import print_function
 import unittest
 import os
+import shutil
+import tempfile
+import tokenize
+from StringIO import StringIO
 import codesort.find_fold_points as ffp
 
 
@@ -163,6 +167,107 @@ def myfunc2(a):
         self.assertSetEqual(set(result), self.file_3_result)
 
 
+class CountingFile(StringIO):
+    """ A StringIO that counts how many lines were read from it """
+    def __init__(self, text):
+        StringIO.__init__(self, text)
+        self.lines_read = 0
+
+    def readline(self, *args):
+        self.lines_read += 1
+        return StringIO.readline(self, *args)
+
+
+class IterFoldPoints(unittest.TestCase):
+    """ Test the iter_fold_points generator """
+    root_dir = os.path.split(__file__)[0]
+    file_1_path = os.path.join(root_dir, "test_data", "sorted_1.py")
+
+    def test_sources(self):
+        """ Paths, open files and strings give the same fold points """
+        with open(self.file_1_path) as openfile:
+            file_text = openfile.read()
+        expected = ffp.find_fold_points(file_text)
+        self.assertSetEqual(set(expected), FindFoldPoints.file_1_result)
+        self.assertEqual(list(ffp.iter_fold_points(self.file_1_path)),
+                         expected)
+        with open(self.file_1_path) as openfile:
+            self.assertEqual(list(ffp.iter_fold_points(openfile)),
+                             expected)
+
+    def test_lazy(self):
+        """ Folds are yielded before the rest of the file is read """
+        code = "".join("def func_{}(a):\n    return a\n\n".format(x)
+                       for x in range(1000))
+        source = CountingFile(code)
+        folds = ffp.iter_fold_points(source)
+        self.assertEqual(next(folds), (1, 2, 1))
+        self.assertLess(source.lines_read, 10)
+        self.assertEqual(len(list(folds)), 999)
+
+
+class MappedReader(unittest.TestCase):
+    """ Test the MappedReader class """
+    table = "".join('    "key_{0}": [{0}, "(]"],  # {0}\n'.format(x)
+                    for x in range(4000))
+    code = ("class Small(object):\n"
+            "    TABLE = {\n"
+            + table +
+            "    }\n"
+            "\n"
+            "TABLE = {\n"
+            + table +
+            "}  # end\n"
+            "# comment\n"
+            "def func(a):\n"
+            "    return a\n"
+            "SUM = [1] + [\n"
+            + table.replace('"key', '("key').replace(',  #', '),  #') +
+            "]\n"
+            "if True:\n"
+            "    pass\n")
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.temp_dir, 'data.py')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def fold_points(self, code):
+        """ Fold points of code, as a file, and the skips of the reader """
+        with open(self.filepath, 'wb') as openfile:
+            openfile.write(code)
+        with ffp._mapped_file(self.filepath) as mapping:
+            reader = ffp.MappedReader(mapping)
+            tokens = reader.track(tokenize.generate_tokens(reader.readline))
+            return list(ffp.fold_points_from_tokens(tokens)), reader.skips
+
+    def test_skips(self):
+        """ Top-level data statements are skipped, with the same folds """
+        folds, skips = self.fold_points(self.code)
+        self.assertEqual(folds, ffp.find_fold_points(self.code))
+        self.assertEqual(skips, [(4005, 4001), (4009, 4001)])
+        self.assertEqual(list(ffp.iter_fold_points(self.filepath)), folds)
+
+    def test_not_skipped(self):
+        """ Statements that the bracket scan cannot follow are tokenized """
+        for code in ('TABLE = [\n' + self.table + '"""]"""]\n',
+                     'TABLE = [\n' + self.table + '] + \\\n    []\n',
+                     'TABLE = [\n' + self.table + '    "a\\\n    b"]\n',
+                     'TABLE = [\n' + self.table[:1000] + ']\n',
+                     'TEXT = """\nTABLE = [\n' + self.table + ']\n"""\n'):
+            code += "def func(a):\n    return a\n"
+            folds, skips = self.fold_points(code)
+            self.assertEqual(skips, [])
+            self.assertEqual(folds, ffp.find_fold_points(code))
+
+    def test_empty(self):
+        """ Empty files, which cannot be mapped, have no folds """
+        open(self.filepath, 'wb').close()
+        self.assertEqual(ffp.find_fold_points(self.filepath), [])
+
+
 def main():
     """ Main Code """
     unittest.main(exit=False, verbosity=1)
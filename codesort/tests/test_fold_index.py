@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_fold_index.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 15:31:20 2026
+@modified:      Sun Oct 18 15:31:20 2026
+@descr:         Unit Testing for codesort.fold_index module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import codesort.codesort as codesort
+import codesort.find_fold_points as ffp
+from codesort.fold_index import FoldIndex
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+SORTED_PATH = os.path.join(DATA_PATH, "sorted_1.py")
+
+
+class FoldIndexTest(unittest.TestCase):
+    """ Test the FoldIndex class """
+    def setUp(self):
+        self.folds = ffp.find_fold_points(SORTED_PATH)
+        self.index = FoldIndex.from_fold_points(SORTED_PATH)
+
+    def test_top_level(self):
+        """ Only folds of indent 1 are top-level """
+        result = [self.index.fold(x) for x in self.index.top_level()]
+        expected = sorted(fold for fold in self.folds if fold[2] == 1)
+        self.assertEqual(result, expected)
+
+    def test_children(self):
+        """ Children of the first class are its methods """
+        first_class = self.index.top_level()[0]
+        result = [self.index.fold(x)
+                  for x in self.index.children(first_class)]
+        self.assertEqual(result, [(12, 14, 2),
+                                  (16, 18, 2),
+                                  (20, 22, 2),
+                                  (24, 26, 2),
+                                  (28, 30, 2),
+                                  (32, 34, 2),
+                                  ])
+
+    def test_enclosing(self):
+        """ enclosing() agrees with a scan of every fold """
+        for row in range(0, 90):
+            containing = [fold for fold in self.folds
+                          if fold[0] <= row <= fold[1]]
+            number = self.index.enclosing(row)
+            if not containing:
+                self.assertEqual(number, -1)
+            else:
+                innermost = max(containing, key=lambda fold: fold[2])
+                self.assertEqual(self.index.fold(number), innermost)
+
+    def test_parents(self):
+        """ Each fold lies within its parent """
+        for number in range(len(self.index)):
+            parent = self.index.parents[number]
+            if parent != -1:
+                self.assertLessEqual(self.index.starts[parent],
+                                     self.index.starts[number])
+                self.assertGreaterEqual(self.index.ends[parent],
+                                        self.index.ends[number])
+
+
+class BlockAt(unittest.TestCase):
+    """ Test block queries through CodeSort """
+    def test_block_at(self):
+        """ The innermost block enclosing a row is found """
+        code_sort = codesort.CodeSort(SORTED_PATH)
+        code_sort.parse()
+        known_values = ((1, 'docstring', ''),
+                        (13, 'docstring', ''),
+                        (14, 'other', ''),
+                        (16, 'function', '_private_a'),
+                        (35, None, None),
+                        (37, 'class', 'ClassB'),
+                        (85, 'instance_var', 'x'),
+                        )
+        for row, kind, name in known_values:
+            block = code_sort.block_at(row)
+            if kind is None:
+                self.assertIsNone(block)
+            else:
+                self.assertEqual((block.kind, block.name), (kind, name))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
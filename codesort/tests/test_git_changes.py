@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_git_changes.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 20:31:08 2026
+@modified:      Sun Oct 18 20:31:08 2026
+@descr:         Unit Testing for codesort.git_changes module and the
+                --since mode
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+import codesort.codesort as codesort
+import codesort.git_changes as git_changes
+
+
+FUNCTIONS = ["def {}():\n    return {!r}\n".format(name, name)
+             for name in ('d', 'c', 'b', 'a')]
+
+
+class ParseDiff(unittest.TestCase):
+    """ Test the parse_diff function """
+    def test_known_values(self):
+        """ Rows of added, changed and removed lines of each file """
+        diff = ["diff --git a/x.py b/x.py",
+                "--- a/x.py",
+                "+++ b/x.py",
+                "@@ -3 +3 @@ def f():",
+                "-    return 1",
+                "+    return 2",
+                "@@ -10,0 +11,2 @@",
+                "+++ added line, not a header",
+                "+",
+                "@@ -20,2 +21,0 @@",
+                "-",
+                "-",
+                "diff --git a/gone.py b/gone.py",
+                "--- a/gone.py",
+                "+++ /dev/null",
+                "@@ -1 +0,0 @@",
+                "-x = 1",
+                "diff --git a/new file.py b/new file.py",
+                "--- /dev/null",
+                "+++ b/new file.py\t",
+                "@@ -0,0 +1 @@",
+                "+x = 1",
+                ]
+        self.assertEqual(list(git_changes.parse_diff(diff)),
+                         [('x.py', [(3, 3), (11, 12), (21, 22)]),
+                          ('new file.py', [(1, 1)]),
+                          ])
+
+
+class ChangedRows(unittest.TestCase):
+    """ Test changed_rows and sorting since a revision in a git repo """
+    def setUp(self):
+        self.temp_dir = os.path.realpath(tempfile.mkdtemp())
+        self.path = os.path.join(self.temp_dir, 'module.py')
+        self.write(self.path, '\n\n'.join(FUNCTIONS))
+        self.write(os.path.join(self.temp_dir, 'notes.txt'), 'notes\n')
+        self.git('init', '-q')
+        self.git('add', '.')
+        self.git('-c', 'user.name=test', '-c', 'user.email=test@example.com',
+                 'commit', '-q', '-m', 'base')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def git(self, *args):
+        """ Runs git in the temporary repository """
+        with open(os.devnull, 'wb') as devnull:
+            subprocess.check_call(['git'] + list(args), cwd=self.temp_dir,
+                                  stdout=devnull)
+
+    def write(self, path, code):
+        """ Writes code to path """
+        with open(path, 'wb') as openfile:
+            openfile.write(code)
+
+    def test_unchanged(self):
+        """ Nothing changed since the base revision """
+        self.assertEqual(git_changes.changed_rows('HEAD', [self.temp_dir]),
+                         {})
+
+    def test_changed_rows(self):
+        """ Edited .py files give their rows, new ones give None """
+        functions = list(FUNCTIONS)
+        functions[1] = functions[1].replace("'c'", "'C'")
+        self.write(self.path, '\n\n'.join(functions))
+        self.write(os.path.join(self.temp_dir, 'notes.txt'), 'changed\n')
+        new_path = os.path.join(self.temp_dir, 'new.py')
+        self.write(new_path, 'x = 1\n')
+        changes = git_changes.changed_rows('HEAD', [self.temp_dir])
+        self.assertEqual(changes, {self.path: [(6, 6)], new_path: None})
+        # A path limits the files to those under it.
+        changes = git_changes.changed_rows('HEAD', [self.path])
+        self.assertEqual(changes, {self.path: [(6, 6)]})
+
+    def test_sort_since(self):
+        """ Changed blocks are merged in, the others stay as they were """
+        new_function = "def a():\n    return 'A'\n"
+        self.write(self.path, '\n\n'.join(FUNCTIONS[:3] + [new_function]))
+        rows = git_changes.changed_rows('HEAD', [self.temp_dir])[self.path]
+        code_sort = codesort.CodeSort(self.path, rows=rows)
+        self.assertFalse(code_sort.check())
+        code_sort.sort()
+        with open(self.path, 'rb') as openfile:
+            code = openfile.read()
+        # d, c and b were not touched, so they are still out of order.
+        expected = [new_function] + FUNCTIONS[:3]
+        self.assertEqual(code, '\n\n'.join(expected))
+
+    def test_not_a_repository(self):
+        """ git errors are raised as GitError """
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self.assertRaises(git_changes.GitError, git_changes.changed_rows,
+                              'HEAD', [temp_dir])
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertRaises(git_changes.GitError, git_changes.changed_rows,
+                          'no-such-revision', [self.temp_dir])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
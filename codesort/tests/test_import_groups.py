@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_import_groups.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 23:20:41 2026
+@modified:      Sun Oct 18 23:20:41 2026
+@descr:         Unit Testing for codesort.import_groups module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+import codesort.codesort as codesort
+import codesort.import_groups as import_groups
+from codesort.import_groups import STDLIB, THIRD_PARTY, LOCAL
+
+
+UNGROUPED = ("from __future__ import print_function\n"
+             "import sibling\n"
+             "import installed\n"
+             "import os\n"
+             "from . import relative\n"
+             "import sys\n"
+             "\n"
+             "CONSTANT = 1\n"
+             "import json\n"
+             "\n"
+             "\n"
+             "def f():\n"
+             "    pass\n"
+             )
+
+GROUPED = ("from __future__ import print_function\n"
+           "import os\n"
+           "import sys\n"
+           "import installed\n"
+           "import sibling\n"
+           "from . import relative\n"
+           "\n"
+           "CONSTANT = 1\n"
+           "import json\n"
+           "\n"
+           "\n"
+           "def f():\n"
+           "    pass\n"
+           )
+
+
+class ImportClassifier(unittest.TestCase):
+    """ Test the ImportClassifier class """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.site = os.path.join(self.temp_dir, 'site-packages')
+        self.project = os.path.join(self.temp_dir, 'project')
+        for directory in (self.site, self.project):
+            os.mkdir(directory)
+        self.touch(self.site, 'installed.py')
+        self.touch(self.project, '__init__.py')
+        self.touch(self.project, 'sibling.py')
+        os.mkdir(os.path.join(self.project, 'package'))
+        self.touch(self.project, 'package', '__init__.py')
+        self.touch(self.project, 'other.py')
+        sys.path[:0] = [self.site, self.temp_dir]
+        self.classifier = import_groups.ImportClassifier()
+
+    def tearDown(self):
+        sys.path.remove(self.site)
+        sys.path.remove(self.temp_dir)
+        shutil.rmtree(self.temp_dir)
+
+    def touch(self, *parts):
+        """ Creates an empty file """
+        open(os.path.join(*parts), 'w').close()
+
+    def test_known_values(self):
+        """ Every kind of name gets its group """
+        for name, expected in (('os', STDLIB),
+                               ('sys', STDLIB),
+                               ('__future__', STDLIB),
+                               ('installed', THIRD_PARTY),
+                               ('not_installed_anywhere', THIRD_PARTY),
+                               ('project', LOCAL),
+                               ('sibling', LOCAL),
+                               ('package', LOCAL),
+                               ('.', LOCAL),
+                               ('', LOCAL),
+                               ):
+            self.assertEqual(self.classifier.group(name, self.project),
+                             expected, name)
+
+    def test_project_root(self):
+        """ The top-level package of the project of a file is local """
+        root = os.path.join(self.temp_dir, 'root')
+        directory = os.path.join(root, 'top', 'sub')
+        os.makedirs(directory)
+        self.touch(root, 'top', '__init__.py')
+        self.touch(directory, '__init__.py')
+        self.touch(root, 'script.py')
+        self.assertEqual(self.classifier.project_root(directory), root)
+        self.assertEqual(self.classifier.project_root(root), root)
+        for name in ('top', 'script'):
+            self.assertEqual(self.classifier.group(name, directory), LOCAL)
+        self.assertEqual(self.classifier.group('top'), THIRD_PARTY)
+
+    def test_codesort_modules(self):
+        """ The modules of codesort itself do not pass for local ones """
+        sys.path.insert(0, import_groups.CODESORT_DIRECTORY)
+        try:
+            for name in ('cache', 'parallel', 'profiling'):
+                self.assertEqual(self.classifier.group(name, self.project),
+                                 THIRD_PARTY, name)
+        finally:
+            sys.path.remove(import_groups.CODESORT_DIRECTORY)
+
+    def test_memoized(self):
+        """ Names and directories are only looked up once """
+        self.assertEqual(self.classifier.group('installed'), THIRD_PARTY)
+        self.assertEqual(self.classifier.group('os'), STDLIB)
+        self.assertEqual(self.classifier.groups, {'installed': THIRD_PARTY})
+        self.assertEqual(self.classifier.modules_in(self.project),
+                         set(['__init__', 'sibling', 'package', 'other']))
+        self.touch(self.project, 'late.py')
+        self.assertEqual(self.classifier.group('late', self.project),
+                         THIRD_PARTY)
+
+    def test_sort(self):
+        """ Runs of imports are grouped, keeping their order """
+        path = os.path.join(self.project, 'module.py')
+        with open(path, 'w') as openfile:
+            openfile.write(UNGROUPED)
+        code_sort = codesort.CodeSort(path)
+        self.assertFalse(code_sort.check())
+        code_sort.sort()
+        with open(path) as openfile:
+            self.assertEqual(openfile.read(), GROUPED)
+        self.assertTrue(code_sort.check())
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
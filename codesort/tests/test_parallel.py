@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_parallel.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 12:20:41 2026
+@modified:      Sun Oct 18 12:20:41 2026
+@descr:         Unit Testing for codesort.parallel module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import tempfile
+import codesort.codesort as codesort
+import codesort.parallel as parallel
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+UNSORTED_PATH = os.path.join(DATA_PATH, "unsorted_2.py")
+SORTED_PATH = os.path.join(DATA_PATH, "sorted_2.py")
+
+
+class SortFiles(unittest.TestCase):
+    """ Test finding and sorting many files """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, 'pkg', 'sub'))
+        os.makedirs(os.path.join(self.temp_dir, '.hidden'))
+        self.unsorted = [os.path.join(self.temp_dir, 'pkg', 'a.py'),
+                         os.path.join(self.temp_dir, 'pkg', 'sub', 'b.py'),
+                         ]
+        self.sorted = [os.path.join(self.temp_dir, 'pkg', 'sub', 'c.py')]
+        self.broken = [os.path.join(self.temp_dir, 'broken.py')]
+        for path in self.unsorted:
+            shutil.copy(UNSORTED_PATH, path)
+        for path in self.sorted:
+            shutil.copy(SORTED_PATH, path)
+        with open(self.broken[0], 'w') as openfile:
+            openfile.write("def broken(\n")
+        shutil.copy(UNSORTED_PATH, os.path.join(self.temp_dir, '.hidden'))
+        with open(os.path.join(self.temp_dir, 'pkg', 'notes.txt'), 'w'):
+            pass
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_find_python_files(self):
+        """ Only .py files outside of hidden directories are found """
+        found = parallel.find_python_files([self.temp_dir])
+        self.assertEqual(sorted(found),
+                         sorted(self.unsorted + self.sorted + self.broken))
+
+    def test_sort_files(self):
+        """ Every file is sorted and reported exactly once """
+        for jobs in (1, 2):
+            results = parallel.sort_files(
+                parallel.find_python_files([self.temp_dir]), jobs)
+            statuses = dict((path, status) for path, status, _ in results)
+            expected = dict([(path, parallel.UNCHANGED)
+                             for path in self.sorted + self.unsorted] +
+                            [(path, parallel.ERROR) for path in self.broken])
+            if jobs == 1:
+                for path in self.unsorted:
+                    expected[path] = parallel.SORTED
+            self.assertEqual(statuses, expected)
+            for path in self.unsorted:
+                self.assertTrue(codesort.binary_file_compare(path,
+                                                             SORTED_PATH))
+
+    def test_summary(self):
+        """ The summary counts each status """
+        summary = parallel.Summary()
+        for path in self.unsorted + self.sorted + self.broken:
+            summary.add(parallel.sort_file(path))
+        self.assertEqual(str(summary),
+                         "4 files: 2 sorted, 1 unchanged, 1 errors")
+
+    def test_check_files(self):
+        """ Checking reports unsorted files and leaves them alone """
+        for jobs in (1, 2):
+            results = parallel.sort_files(
+                parallel.find_python_files([self.temp_dir]), jobs,
+                check=True)
+            statuses = dict((path, status) for path, status, _ in results)
+            expected = dict([(path, parallel.UNSORTED)
+                             for path in self.unsorted] +
+                            [(path, parallel.UNCHANGED)
+                             for path in self.sorted] +
+                            [(path, parallel.ERROR) for path in self.broken])
+            self.assertEqual(statuses, expected)
+            for path in self.unsorted:
+                self.assertTrue(codesort.binary_file_compare(path,
+                                                             UNSORTED_PATH))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
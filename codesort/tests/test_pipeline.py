@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_pipeline.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 19:40:03 2026
+@modified:      Sun Oct 18 19:40:03 2026
+@descr:         Unit Testing for codesort.pipeline module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import tempfile
+import codesort.codesort as codesort
+import codesort.parallel as parallel
+import codesort.pipeline as pipeline
+from codesort.cache import ResultCache, StatIndex
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+UNSORTED_PATH = os.path.join(DATA_PATH, "unsorted_2.py")
+SORTED_PATH = os.path.join(DATA_PATH, "sorted_2.py")
+
+
+class SortFiles(unittest.TestCase):
+    """ Test sorting files through the pipeline """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.unsorted = [os.path.join(self.temp_dir, '{}.py'.format(x))
+                         for x in range(6)]
+        self.sorted = [os.path.join(self.temp_dir, 'sorted.py')]
+        self.broken = [os.path.join(self.temp_dir, 'broken.py'),
+                       os.path.join(self.temp_dir, 'missing.py')]
+        for path in self.unsorted:
+            shutil.copy(UNSORTED_PATH, path)
+        shutil.copy(SORTED_PATH, self.sorted[0])
+        with open(self.broken[0], 'w') as openfile:
+            openfile.write("def broken(\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def statuses(self, *args, **kwargs):
+        """ {filepath: status} of a run of the pipeline """
+        filepaths = self.unsorted + self.sorted + self.broken
+        results = list(pipeline.sort_files(filepaths, *args, **kwargs))
+        self.assertEqual(len(results), len(filepaths))
+        return dict((path, status) for path, status, _ in results)
+
+    def test_sort_files(self):
+        """ Every file is sorted and reported exactly once """
+        for jobs in (1, 2):
+            for path in self.unsorted:
+                shutil.copy(UNSORTED_PATH, path)
+            statuses = self.statuses(jobs, io_jobs=3)
+            expected = dict([(path, parallel.SORTED)
+                             for path in self.unsorted] +
+                            [(path, parallel.UNCHANGED)
+                             for path in self.sorted] +
+                            [(path, parallel.ERROR) for path in self.broken])
+            self.assertEqual(statuses, expected)
+            for path in self.unsorted:
+                self.assertTrue(codesort.binary_file_compare(path,
+                                                             SORTED_PATH))
+
+    def test_cache(self):
+        """ Sorted files are recorded in the cache and the index """
+        cache = ResultCache(signature=codesort.schema_signature())
+        index = StatIndex()
+        self.statuses(1, cache=cache, index=index)
+        # The unsorted content, and the sorted content that it shares with
+        # sorted.py.
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(index.lookup(self.unsorted[0]))
+        statuses = self.statuses(1, cache=cache, index=index)
+        self.assertEqual(statuses[self.unsorted[0]], parallel.UNCHANGED)
+
+    def test_opener(self):
+        """ Every read and write goes through the opener """
+        opened = []
+
+        def opener(filepath, mode):
+            opened.append((os.path.basename(filepath), mode))
+            return open(filepath, mode)
+
+        self.statuses(1, opener=opener)
+        self.assertIn(('0.py', 'rb'), opened)
+        self.assertIn(('0.py', 'r+b'), opened)
+        self.assertNotIn(('sorted.py', 'r+b'), opened)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_profiling.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 22:31:47 2026
+@modified:      Sun Oct 18 22:31:47 2026
+@descr:         Unit Testing for codesort.profiling module
+"""
+
+from __future__ import print_function
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+import codesort.codesort as codesort
+import codesort.parallel as parallel
+import codesort.pipeline as pipeline
+import codesort.profiling as profiling
+from codesort.cache import ResultCache
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+UNSORTED_PATH = os.path.join(DATA_PATH, "unsorted_2.py")
+
+SORT_STAGES = ['read', 'tokenize', 'tree', 'blocks', 'sort', 'write']
+COUNTERS = ['blocks', 'bytes', 'changed', 'lines', 'tokens']
+
+
+class FileProfile(unittest.TestCase):
+    """ Test the FileProfile class """
+    def test_record(self):
+        """ Stages keep their order, and repeated stages add up """
+        profile = profiling.FileProfile('a.py')
+        profile.stages = [('read', 1.0), ('sort', 2.0), ('read', 0.5)]
+        other = profiling.FileProfile(None)
+        other.stages = [('write', 0.25)]
+        profile.count('bytes', 10)
+        other.count('bytes', 5)
+        other.count('changed', 1)
+        profile.extend(other)
+        record = profile.record()
+        self.assertEqual(list(record['stages'].items()),
+                         [('read', 1.5), ('sort', 2.0), ('write', 0.25)])
+        self.assertEqual(record['counters'], {'bytes': 15, 'changed': 1})
+        self.assertEqual(record['total'], 3.75)
+        self.assertEqual(record['file'], 'a.py')
+
+    def test_json_lines(self):
+        """ Each record is written as a line of JSON """
+        stream = StringIO()
+        hook = profiling.json_lines(stream)
+        for number in range(2):
+            hook(profiling.FileProfile('{}.py'.format(number)).record())
+        lines = stream.getvalue().splitlines()
+        self.assertEqual([json.loads(line)['file'] for line in lines],
+                         ['0.py', '1.py'])
+
+
+class Hook(unittest.TestCase):
+    """ Test the records that sorting files hands to the hook """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = [os.path.join(self.temp_dir, '{}.py'.format(x))
+                      for x in range(3)]
+        for path in self.paths:
+            shutil.copy(UNSORTED_PATH, path)
+        self.records = []
+        profiling.set_hook(self.records.append)
+
+    def tearDown(self):
+        profiling.set_hook(None)
+        shutil.rmtree(self.temp_dir)
+
+    def assertRecords(self, stages, changed=1):
+        """ Every file got a single record with stages """
+        self.assertEqual(sorted(record['file'] for record in self.records),
+                         self.paths)
+        for record in self.records:
+            self.assertEqual(list(record['stages']), stages)
+            self.assertEqual(sorted(record['counters']), COUNTERS)
+            self.assertEqual(record['counters']['changed'], changed)
+            self.assertEqual(record['counters']['bytes'],
+                             os.path.getsize(UNSORTED_PATH))
+            self.assertGreater(record['counters']['tokens'],
+                               record['counters']['blocks'])
+
+    def test_disabled(self):
+        """ Without a hook, there is nothing to profile """
+        profiling.set_hook(None)
+        self.assertIsNone(profiling.start(self.paths[0]))
+        codesort.CodeSort(self.paths[0]).sort()
+        self.assertEqual(self.records, [])
+
+    def test_sort(self):
+        """ Sorting a file records every stage """
+        for path in self.paths:
+            codesort.CodeSort(path).sort()
+        self.assertRecords(SORT_STAGES)
+
+    def test_check(self):
+        """ Checking a file records its read and check """
+        codesort.CodeSort(self.paths[0]).check()
+        self.assertEqual(list(self.records[0]['stages']), ['read', 'check'])
+
+    def test_sort_files(self):
+        """ The records of worker processes reach the hook of the parent """
+        results = list(parallel.sort_files(self.paths, 2))
+        self.assertEqual(len(results), len(self.paths))
+        self.assertRecords(SORT_STAGES)
+
+    def test_pipeline(self):
+        """ The pipeline records the stages of each file """
+        for jobs in (1, 2):
+            del self.records[:]
+            for path in self.paths:
+                shutil.copy(UNSORTED_PATH, path)
+            list(pipeline.sort_files(self.paths, jobs, io_jobs=2,
+                                     cache=ResultCache()))
+            self.assertRecords(['read', 'cache', 'tokenize', 'tree',
+                                'blocks', 'sort', 'write'])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_server.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 18:44:52 2026
+@modified:      Sun Oct 18 18:44:52 2026
+@descr:         Unit Testing for codesort.server and codesort.client modules
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import codesort.codesort as codesort
+import codesort.parallel as parallel
+import codesort.server as server
+import codesort.client as client
+
+
+DATA_PATH = os.path.join(os.path.split(__file__)[0], 'test_data')
+UNSORTED_PATH = os.path.join(DATA_PATH, "unsorted_2.py")
+SORTED_PATH = os.path.join(DATA_PATH, "sorted_2.py")
+
+
+class SortServer(unittest.TestCase):
+    """ Test the daemon through its client """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.temp_dir, 'codesort.sock')
+        self.path = os.path.join(self.temp_dir, 'a.py')
+        shutil.copy(UNSORTED_PATH, self.path)
+        self.server = server.SortServer(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+
+    def tearDown(self):
+        if self.thread.is_alive():
+            server.shutdown(self.socket_path)
+            self.thread.join()
+        shutil.rmtree(self.temp_dir)
+
+    def request(self, check=False):
+        """ Results of a request for the temporary directory """
+        return list(client.request([self.temp_dir], check,
+                                   socket_path=self.socket_path))
+
+    def test_sort(self):
+        """ The daemon sorts files, and then knows them to be sorted """
+        self.assertEqual(self.request(True),
+                         [(self.path, parallel.UNSORTED, '')])
+        self.assertEqual(self.request(),
+                         [(self.path, parallel.SORTED, '')])
+        self.assertTrue(codesort.binary_file_compare(self.path, SORTED_PATH))
+        self.assertEqual(self.request(True),
+                         [(self.path, parallel.UNCHANGED, '')])
+        # The unsorted and the sorted content are both in the warm cache.
+        self.assertEqual(len(self.server.cache), 2)
+
+    def test_shutdown(self):
+        """ A shutdown stops the daemon and removes its socket """
+        server.shutdown(self.socket_path)
+        self.thread.join()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_already_running(self):
+        """ A second daemon does not steal the socket of the first """
+        self.assertRaises(server.DaemonRunning, server.SortServer,
+                          self.socket_path)
+
+    def test_serve_already_running(self):
+        """ --serve with a daemon running exits with an error message """
+        argv = sys.argv
+        sys.argv = ['codesort.py', '--serve',
+                    '--socket={}'.format(self.socket_path)]
+        try:
+            self.assertEqual(codesort.main(), 1)
+        finally:
+            sys.argv = argv
+
+    def test_empty_request(self):
+        """ A connection closed without a request gets no answer """
+        errors = []
+        self.server.handle_error = lambda *args: errors.append(args)
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        probe.connect(self.socket_path)
+        probe.shutdown(socket.SHUT_WR)
+        self.assertEqual(probe.recv(1024), '')
+        probe.close()
+        self.assertEqual(len(self.request(True)), 1)
+        self.assertEqual(errors, [])
+
+    def test_stale_socket(self):
+        """ A socket left behind by a dead daemon is replaced """
+        server.shutdown(self.socket_path)
+        self.thread.join()
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+        self.server = server.SortServer(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+        self.assertEqual(len(self.request(True)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_sharding.py
+@vers:          0.1
+@author:        dthor
+@created:       Mon Oct 19 01:05:37 2026
+@modified:      Mon Oct 19 01:05:37 2026
+@descr:         Unit Testing for codesort.sharding module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import tempfile
+import codesort.codesort as codesort
+import codesort.sharding as sharding
+from codesort.source_buffer import SourceBuffer
+
+
+CLASS_CODE = '''class Class{0}(object):
+    """ Class {0} """
+    def method_b(self):
+        return 2
+
+    @property
+    def method_a(self):
+        return 1
+
+
+'''
+
+FUNCTION_CODE = '''def function_{0}(a):
+    return a
+
+
+'''
+
+
+def generate_code(count):
+    """ Unsorted classes and functions, from the last to the first """
+    parts = ['""" Generated module """\n', 'import os\n\n\n']
+    for number in reversed(range(count)):
+        parts.append(CLASS_CODE.format(number))
+        parts.append(FUNCTION_CODE.format(number))
+    parts.append('if __name__ == "__main__":\n    pass\n')
+    return ''.join(parts)
+
+
+class SplitPoints(unittest.TestCase):
+    """ Test the split_points function """
+    def setUp(self):
+        sharding.MIN_SHARDED_SIZE = 0
+
+    def tearDown(self):
+        sharding.MIN_SHARDED_SIZE = 1 << 20
+
+    def test_known_values(self):
+        """ Shards start at top-level classes and functions """
+        code = ("import os\n\n\n"
+                "def b():\n    pass\n\n\n"
+                "# about a\n\n"
+                "def a():\n    pass\n\n"
+                "@dec\nclass C(object):\n    pass\n")
+        source = SourceBuffer(code)
+        shards = sharding.split_points(source, 10)
+        self.assertEqual([row for _, _, row in shards], [1, 4, 13])
+        self.assertEqual([code[start:stop] for start, stop, _ in shards],
+                         ["import os\n\n\n",
+                          "def b():\n    pass\n\n\n# about a\n\n"
+                          "def a():\n    pass\n\n",
+                          "@dec\nclass C(object):\n    pass\n"])
+
+    def test_small_file(self):
+        """ Small files, or a single shard, are not split """
+        source = SourceBuffer(generate_code(20))
+        self.assertEqual(len(sharding.split_points(source, 1)), 1)
+        sharding.MIN_SHARDED_SIZE = 1 << 20
+        self.assertEqual(sharding.split_points(source, 8),
+                         [(0, len(source.data), 1)])
+
+    def test_decorator(self):
+        """ Blank lines after a decorator are no split point """
+        code = "x = 1\n\n\n@register\n\n\ndef f():\n    pass\n"
+        source = SourceBuffer(code)
+        self.assertEqual(sharding.split_points(source, 10),
+                         [(0, 8, 1), (8, len(code), 4)])
+
+
+class SortSource(unittest.TestCase):
+    """ Test the sort_source function """
+    def setUp(self):
+        sharding.MIN_SHARDED_SIZE = 0
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        sharding.MIN_SHARDED_SIZE = 1 << 20
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_serial(self):
+        """ The shards are sorted and stitched like the whole file """
+        source = SourceBuffer(generate_code(40))
+        _, code_blocks = codesort.parse_code(source)
+        expected = codesort.sorted_spans(code_blocks, source)
+        sharded_blocks, spans = sharding.sort_source(source, 2)
+        self.assertEqual(spans, expected)
+        self.assertEqual([(code_block.block.start, code_block.sort_key)
+                          for code_block in sharded_blocks],
+                         [(code_block.block.start, code_block.sort_key)
+                          for code_block in code_blocks])
+
+    def test_worker_setup(self):
+        """ A worker maps the file from its path, as a spawned one does """
+        import pickle
+        import codesort.parallel as parallel
+
+        code = generate_code(10)
+        filepath = os.path.join(self.temp_dir, 'shared.py')
+        with open(filepath, 'wb') as openfile:
+            openfile.write(code)
+        initargs = pickle.loads(pickle.dumps((filepath,
+                                              parallel.worker_args())))
+        sharding._init_worker(*initargs)
+        try:
+            self.assertEqual(sharding.SHARED_SOURCE[:], code)
+        finally:
+            sharding.SHARED_SOURCE.close()
+            sharding.SHARED_SOURCE = None
+
+    def test_split_in_string(self):
+        """ A file split inside a string is left to a single process """
+        code = generate_code(10)
+        text = "TEXT = '''\n{}'''\n\n\n".format(code.replace('"""', ''))
+        source = SourceBuffer(code + text + code)
+        self.assertIsNone(sharding.sort_source(source, 8))
+
+    def test_split_after_decorator(self):
+        """ A shard that ends with a lone decorator is not sorted apart """
+        code = "x = 1\n\n\n@register(\n    1)\n\n\ndef f():\n    pass\n"
+        source = SourceBuffer(code * 4)
+        self.assertIsNone(sharding.sort_source(source, 8))
+
+    def test_codesort_jobs(self):
+        """ CodeSort with jobs sorts a file like a single process does """
+        code = generate_code(40)
+        sorted_code = codesort.sort_code(code)
+        filepath = os.path.join(self.temp_dir, 'generated.py')
+        with open(filepath, 'wb') as openfile:
+            openfile.write(code)
+        code_sort = codesort.CodeSort(filepath, jobs=2)
+        code_sort.sort()
+        with open(filepath, 'rb') as openfile:
+            self.assertEqual(openfile.read(), sorted_code)
+        self.assertTrue(code_sort.changed)
+        # Only the top-level blocks come back from the workers.
+        self.assertEqual(len(code_sort.code_blocks), 83)
+        self.assertEqual([code_block for code_block in code_sort.code_blocks
+                          if code_block.children], [])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
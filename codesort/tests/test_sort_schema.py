@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_sort_schema.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 21:46:02 2026
+@modified:      Sun Oct 18 21:46:02 2026
+@descr:         Unit Testing for codesort.sort_schema module
+"""
+
+from __future__ import print_function
+import unittest
+import os
+import shutil
+import tempfile
+import codesort.codesort as codesort
+import codesort.parallel as parallel
+import codesort.sort_schema as sort_schema
+
+
+UNSORTED_CLASS = ("class A(object):\n"
+                  "    def b(self):\n"
+                  "        pass\n"
+                  "\n"
+                  "    def tearDown(self):\n"
+                  "        pass\n"
+                  "\n"
+                  "    def setUp(self):\n"
+                  "        pass\n"
+                  "\n"
+                  "    def __str__(self):\n"
+                  "        pass\n"
+                  "\n"
+                  "    def __init__(self):\n"
+                  "        pass\n"
+                  )
+
+
+def method_names(code):
+    """ Names of the methods of the class in code, in order """
+    return [line.split()[1].split('(')[0] for line in code.splitlines()
+            if line.strip().startswith('def ')]
+
+
+class MemberKey(unittest.TestCase):
+    """ Test the member_key function and configure """
+    def tearDown(self):
+        sort_schema.configure()
+
+    def test_known_values(self):
+        """ Keys of the default orderings """
+        for name, expected in (('__init__',
+                                (sort_schema.DUNDER, 0, '__init__',
+                                 '__init__')),
+                               ('__eq__',
+                                (sort_schema.DUNDER,
+                                 len(sort_schema.DUNDER_ORDER), '__eq__',
+                                 '__eq__')),
+                               ('_Private', (sort_schema.PRIVATE, '_private',
+                                             '_Private')),
+                               ('setUp', (sort_schema.PUBLIC, 'setup',
+                                          'setUp')),
+                               ):
+            self.assertEqual(sort_schema.member_key(name), expected)
+
+    def test_cached_keys(self):
+        """ Named members share the key of the table """
+        self.assertIs(sort_schema.member_key('__init__'),
+                      sort_schema.member_key('__init__'))
+
+    def test_configure(self):
+        """ Custom orderings change how class bodies are sorted """
+        self.assertEqual(method_names(codesort.sort_code(UNSORTED_CLASS)),
+                         ['__init__', '__str__', 'b', 'setUp', 'tearDown'])
+        signature = codesort.schema_signature()
+        sort_schema.configure(['__str__', '__init__'], ['setUp', 'tearDown'])
+        self.assertEqual(method_names(codesort.sort_code(UNSORTED_CLASS)),
+                         ['__str__', '__init__', 'setUp', 'tearDown', 'b'])
+        self.assertNotEqual(codesort.schema_signature(), signature)
+        sort_schema.configure()
+        self.assertEqual(codesort.schema_signature(), signature)
+
+
+class LoadConfig(unittest.TestCase):
+    """ Test the load_config function """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'setup.cfg')
+
+    def tearDown(self):
+        sort_schema.configure()
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, text):
+        """ Writes the config file """
+        with open(self.path, 'w') as openfile:
+            openfile.write(text)
+
+    def test_known_values(self):
+        """ Orderings are split on commas and whitespace """
+        self.write("[codesort]\n"
+                   "dunder_order = __init__, __str__\n"
+                   "method_order =\n"
+                   "    setUp\n"
+                   "    tearDown\n")
+        self.assertEqual(sort_schema.load_config(self.path),
+                         (['__init__', '__str__'], ['setUp', 'tearDown']))
+
+    def test_defaults(self):
+        """ Orderings that the file leaves out keep their default """
+        self.write("[flake8]\nmax-line-length = 79\n")
+        self.assertEqual(sort_schema.load_config(self.path), (None, ()))
+
+    def test_bad_file(self):
+        """ A file that is not a config file raises ValueError """
+        self.write("dunder_order = __init__\n")
+        self.assertRaises(ValueError, sort_schema.load_config, self.path)
+
+    def test_workers(self):
+        """ Worker processes sort with the orderings of the parent """
+        self.write("[codesort]\nmethod_order = setUp tearDown\n")
+        sort_schema.configure(*sort_schema.load_config(self.path))
+        paths = [os.path.join(self.temp_dir, '{}.py'.format(x))
+                 for x in range(2)]
+        for path in paths:
+            with open(path, 'w') as openfile:
+                openfile.write(UNSORTED_CLASS)
+        results = list(parallel.sort_files(paths, 2))
+        self.assertEqual(set(status for _, status, _ in results),
+                         set([parallel.SORTED]))
+        for path in paths:
+            with open(path) as openfile:
+                self.assertEqual(method_names(openfile.read())[2:4],
+                                 ['setUp', 'tearDown'])
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)
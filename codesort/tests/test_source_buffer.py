@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+@name:          test_source_buffer.py
+@vers:          0.1
+@author:        dthor
+@created:       Sun Oct 18 16:41:05 2026
+@modified:      Sun Oct 18 16:41:05 2026
+@descr:         Unit Testing for codesort.source_buffer module
+"""
+
+from __future__ import print_function
+import unittest
+import errno
+import os
+import shutil
+import tempfile
+from codesort.source_buffer import SourceBuffer
+
+
+class FullDisk(object):
+    """
+    A file that runs out of space halfway through its first write. Every
+    other call goes to the real file.
+    """
+    def __init__(self, open_file):
+        self.open_file = open_file
+        self.failed = False
+
+    def __getattr__(self, name):
+        return getattr(self.open_file, name)
+
+    def write(self, data):
+        if self.failed:
+            return self.open_file.write(data)
+        self.failed = True
+        self.open_file.write(data[:len(data) // 2])
+        raise IOError(errno.ENOSPC, "No space left on device")
+
+
+class SourceBufferTest(unittest.TestCase):
+    """ Unit Testing for the SourceBuffer class """
+    code = "a = 1\r\nb = 2\r\n\r\nc = 3"
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_offsets(self):
+        """ Every line start is in the offset table """
+        source = SourceBuffer(self.code)
+        self.assertEqual(len(source), 4)
+        self.assertEqual(list(source.offsets), [0, 7, 14, 16, 21])
+        self.assertTrue(source.missing_eol)
+        self.assertEqual(source.newline, '\r\n')
+
+    def test_empty(self):
+        """ Empty code has no lines """
+        source = SourceBuffer('')
+        self.assertEqual(len(source), 0)
+        self.assertFalse(source.missing_eol)
+        self.assertEqual(list(source.lines()), [])
+        self.assertEqual(source.join([(0, 0)]), '')
+
+    def test_lines(self):
+        """ The last line is given a line ending for the tokenizer """
+        source = SourceBuffer(self.code)
+        self.assertEqual(list(source.lines()),
+                         ["a = 1\r\n", "b = 2\r\n", "\r\n", "c = 3\n"])
+
+    def test_replace(self):
+        """ Edits give the same buffer as the edited code would """
+        for start, stop, text in ((1, 2, "b = 22\r\n"),
+                                  (0, 0, "x = 0\r\ny = 0\r\n"),
+                                  (1, 3, ""),
+                                  (3, 4, "c = 3\r\n"),
+                                  (2, 3, "# joined to the next line: "),
+                                  (4, 4, "d = 4"),
+                                  ):
+            source = SourceBuffer(self.code)
+            edited = (self.code[:source.offsets[start]] + text +
+                      self.code[source.offsets[stop]:])
+            rows = source.replace(start, stop, text)
+            expected = SourceBuffer(edited)
+            self.assertEqual(source.data, edited)
+            self.assertEqual(list(source.offsets), list(expected.offsets))
+            self.assertEqual(source.missing_eol, expected.missing_eol)
+            self.assertEqual(rows, len(expected) - 4)
+            self.assertEqual(list(source.lines(1)), list(expected.lines(1)))
+
+    def test_view(self):
+        """ Views are slices of the source, not copies """
+        source = SourceBuffer(self.code)
+        view = source.view(1, 3)
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(view.tobytes(), "b = 2\r\n\r\n")
+        self.assertEqual(source.text(1, 3), "b = 2\r\n\r\n")
+
+    def test_join_unchanged(self):
+        """ The source spans rebuild the source exactly """
+        source = SourceBuffer(self.code)
+        spans = [(0, 2), (2, 2), (2, 4)]
+        self.assertTrue(source.is_original(spans))
+        self.assertEqual(source.join(spans), self.code)
+
+    def test_join_moved_last_line(self):
+        """ A moved last line gets the file's line ending """
+        source = SourceBuffer(self.code)
+        spans = [(3, 4), (0, 3)]
+        self.assertFalse(source.is_original(spans))
+        self.assertEqual(source.join(spans), "c = 3\r\na = 1\r\nb = 2\r\n")
+
+    def test_write(self):
+        """ Writing the chunks gives the same bytes as joining them """
+        source = SourceBuffer(self.code)
+        spans = [(3, 4), (2, 3), (0, 2)]
+        path = os.path.join(self.temp_dir, "out.py")
+        with open(path, 'wb') as open_file:
+            size = source.write(open_file, spans)
+        with open(path, 'rb') as open_file:
+            written = open_file.read()
+        self.assertEqual(written, source.join(spans))
+        self.assertEqual(size, len(written))
+
+    def test_rewrite(self):
+        """ Only the lines from the first change on are written again """
+        path = os.path.join(self.temp_dir, "in.py")
+        with open(path, 'wb') as open_file:
+            open_file.write(self.code)
+        source = SourceBuffer(self.code)
+        spans = [(0, 2), (3, 4), (2, 3)]
+        self.assertEqual(source.unchanged_rows(spans), 2)
+        with open(path, 'r+b') as open_file:
+            size = source.rewrite(open_file, spans)
+        with open(path, 'rb') as open_file:
+            self.assertEqual(open_file.read(), source.join(spans))
+        self.assertEqual(size, len(source.join(spans)) - 14)
+
+    def test_rewrite_full_disk(self):
+        """ A failed rewrite leaves the original file behind """
+        path = os.path.join(self.temp_dir, "in.py")
+        with open(path, 'wb') as open_file:
+            open_file.write(self.code)
+        source = SourceBuffer(self.code)
+        with open(path, 'r+b') as open_file:
+            self.assertRaises(IOError, source.rewrite, FullDisk(open_file),
+                              [(3, 4), (0, 3)])
+        with open(path, 'rb') as open_file:
+            self.assertEqual(open_file.read(), self.code)
+
+    def test_mmap(self):
+        """ A mapped file gives the same output as a read one """
+        path = os.path.join(self.temp_dir, "in.py")
+        with open(path, 'wb') as open_file:
+            open_file.write(self.code)
+        source = SourceBuffer.from_file(path, use_mmap=True)
+        spans = [(3, 4), (0, 3)]
+        self.assertEqual(source.join(spans),
+                         SourceBuffer(self.code).join(spans))
+        self.assertEqual(str(source.view(0, 1)), "a = 1\r\n")
+        source.data.close()
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False, verbosity=1)